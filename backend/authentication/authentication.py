@@ -0,0 +1,41 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .revocation import is_revoked
+from .user_cache import cache_user, get_cached_user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that rejects revoked tokens (see authentication.revocation)
+    and resolves the token's user from authentication.user_cache
+    """
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if is_revoked(validated_token):
+            raise InvalidToken(_("Token has been revoked"))
+        return validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user, version = get_cached_user(user_id)
+        if user is None:
+            # Loads the row and rejects missing or inactive users, which are never cached
+            user = super().get_user(validated_token)
+            cache_user(user, version)
+            return user
+
+        # Cached users were active when cached; deactivation invalidates them
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
@@ -1,3 +1,21 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class RevokedToken(models.Model):
+    """
+    A JWT revoked before it expired (logout, refresh rotation), kept until
+    it would have expired anyway (see authentication.revocation).
+    """
+    jti = models.CharField(max_length=255, unique=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='revoked_tokens'
+    )
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-revoked_at']
+
+    def __str__(self):
+        return self.jti
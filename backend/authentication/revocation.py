@@ -0,0 +1,128 @@
+"""
+Denylist of revoked JWTs.
+
+Logging out revokes the presented access and refresh tokens, and refreshing
+revokes the rotated refresh token (``BLACKLIST_AFTER_ROTATION``). Revoked
+``jti``s are stored in ``RevokedToken`` until the token would have expired
+anyway. Each process keeps a Bloom filter of the unexpired ones, so checking
+a token that was never revoked (nearly every request) costs a few hash
+lookups and no query; only a filter hit (a revoked token, or a false
+positive at ``AUTH_REVOCATION_ERROR_RATE``) is confirmed against the table.
+
+A revocation is added to the revoking process's filter at once. Other
+processes poll the table's latest ``revoked_at`` and row count at most every
+``AUTH_REVOCATION_REFRESH_INTERVAL`` seconds and rebuild their filter when
+either changed, so they may accept a revoked token for that long. The table
+is the only shared state, so this holds whatever cache backend is configured.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .models import RevokedToken
+
+
+# Room for this many revocations before a rebuild, whatever the table holds
+MIN_CAPACITY = 1024
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter of strings sized for ``capacity`` items at ``error_rate``"""
+
+    def __init__(self, capacity, error_rate):
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, item):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(item))
+
+
+class LocalDenylist:
+    """This process's Bloom filter of revoked ``jti``s and the table state it was built from"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.filter = None
+        self.state = None
+        self.checked_at = 0
+
+    def refresh(self):
+        now = time.monotonic()
+        if self.filter is not None and now - self.checked_at < settings.AUTH_REVOCATION_REFRESH_INTERVAL:
+            return
+        with self.lock:
+            self.checked_at = now
+            state = table_state()
+            if self.filter is None or state != self.state:
+                # Read the state first: a revocation during the rebuild changes it again
+                self.filter = self.build()
+                self.state = state
+
+    def build(self):
+        jtis = list(RevokedToken.objects.filter(expires_at__gt=timezone.now()).values_list('jti', flat=True))
+        bloom = BloomFilter(max(2 * len(jtis), MIN_CAPACITY), settings.AUTH_REVOCATION_ERROR_RATE)
+        for jti in jtis:
+            bloom.add(jti)
+        return bloom
+
+    def __contains__(self, jti):
+        self.refresh()
+        return jti in self.filter
+
+    def add(self, jti):
+        self.refresh()
+        with self.lock:
+            self.filter.add(jti)
+
+    def clear(self):
+        with self.lock:
+            self.filter = None
+            self.state = None
+
+
+DENYLIST = LocalDenylist()
+
+
+def table_state():
+    """The latest revocation and row count; pruning or revoking anywhere changes it"""
+    state = RevokedToken.objects.aggregate(revoked_at=Max('revoked_at'), count=Count('pk'))
+    return state['revoked_at'], state['count']
+
+
+def revoke(token):
+    """Deny ``token`` (a simplejwt Token) until it expires"""
+    jti = token.get(api_settings.JTI_CLAIM)
+    if jti is None:
+        return
+    RevokedToken.objects.get_or_create(jti=jti, defaults={
+        'user_id': token.get(api_settings.USER_ID_CLAIM),
+        'expires_at': datetime_from_epoch(token['exp']),
+    })
+    # Expired tokens fail signature checks anyway
+    RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    DENYLIST.add(jti)
+
+
+def is_revoked(token):
+    jti = token.get(api_settings.JTI_CLAIM)
+    if jti is None or jti not in DENYLIST:
+        return False
+    return RevokedToken.objects.filter(jti=jti).exists()
@@ -0,0 +1,6 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """Documents CachedJWTAuthentication as the bearer scheme of simplejwt's JWTAuthentication"""
+    target_class = 'authentication.authentication.CachedJWTAuthentication'
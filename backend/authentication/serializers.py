@@ -1,7 +1,12 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .revocation import is_revoked, revoke
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -65,6 +70,32 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         return token
 
 
+class DenylistTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refuses revoked refresh tokens and revokes the old one after rotation"""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if is_revoked(refresh):
+            raise TokenError("Token has been revoked")
+        data = super().validate(attrs)
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            revoke(refresh)
+        return data
+
+
+class LogoutSerializer(serializers.Serializer):
+    refresh = serializers.CharField(required=False)
+
+    def validate_refresh(self, value):
+        try:
+            refresh = RefreshToken(value)
+        except TokenError as e:
+            raise serializers.ValidationError(str(e))
+        if str(refresh.get(api_settings.USER_ID_CLAIM)) != str(self.context['request'].user.pk):
+            raise serializers.ValidationError("Token belongs to another user")
+        return refresh
+
+
 class ChangePasswordSerializer(serializers.Serializer):
     old_password = serializers.CharField(write_only=True)
     new_password = serializers.CharField(write_only=True, min_length=8)
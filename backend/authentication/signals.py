@@ -0,0 +1,28 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .user_cache import invalidate_user
+
+
+def invalidate_user_on_commit(user_id):
+    # Invalidate now and again after commit, in case a concurrent request
+    # re-cached the committed row in between
+    invalidate_user(user_id)
+    transaction.on_commit(lambda: invalidate_user(user_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Profile edits, password changes and is_staff/is_active toggles all save the user
+    invalidate_user_on_commit(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_cached_user_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    if action.startswith('post_'):
+        for user_id in (pk_set or ()) if reverse else [instance.pk]:
+            invalidate_user_on_commit(user_id)
@@ -1,3 +1,152 @@
-from django.test import TestCase
+import time
+import uuid
+from contextlib import redirect_stderr
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import RevokedToken
+from .revocation import DENYLIST, BloomFilter
+from .user_cache import LOCAL_USERS
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        LOCAL_USERS.clear()
+        self.addCleanup(LOCAL_USERS.clear)
+        self.user = User.objects.create_user('client', email='client@example.com', password='Old-pass-123')
+        self.api = APIClient()
+        self.api.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def user_queries(self, method, path, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.api, method)(path, data, format='json')
+        return response, [query['sql'] for query in queries if 'FROM "auth_user"' in query['sql']]
+
+    def test_repeat_requests_skip_user_query(self):
+        response, queries = self.user_queries('get', '/api/auth/profile/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        response, queries = self.user_queries('get', '/api/auth/profile/')
+        self.assertEqual(response.data['email'], 'client@example.com')
+        self.assertEqual(queries, [])
+        # Without the per-process copy the shared cache still answers
+        LOCAL_USERS.clear()
+        self.assertEqual(self.user_queries('get', '/api/auth/profile/')[1], [])
+
+    def test_profile_and_password_changes_invalidate(self):
+        self.api.get('/api/auth/profile/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.api.patch('/api/auth/profile/', {'first_name': 'Ada'}, format='json')
+        response, queries = self.user_queries('get', '/api/auth/profile/')
+        self.assertEqual(response.data['first_name'], 'Ada')
+        self.assertEqual(len(queries), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.api.put('/api/auth/change-password/', {
+                'old_password': 'Old-pass-123', 'new_password': 'New-pass-456', 'confirm_password': 'New-pass-456',
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        LOCAL_USERS.clear()
+        User.objects.filter(pk=self.user.pk).update(first_name='Stale')
+        self.assertEqual(self.api.get('/api/auth/profile/').data['first_name'], 'Stale')
+
+    def test_flag_changes_take_effect(self):
+        self.assertEqual(self.api.get('/api/auth/profile/').data['is_staff'], False)
+        self.user.is_staff = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.api.get('/api/auth/profile/').data['is_staff'], True)
+
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.api.get('/api/auth/profile/').status_code, 401)
+
+    def test_unshared_cache_expires_with_the_local_copy(self):
+        self.api.get('/api/auth/profile/')
+        # As another worker would, whose local-memory cache never sees the invalidation
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        LOCAL_USERS.clear()
+        self.assertEqual(self.api.get('/api/auth/profile/').status_code, 200)
+        LOCAL_USERS.clear()
+        later = time.time() + 6
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=later):
+            self.assertEqual(self.api.get('/api/auth/profile/').status_code, 401)
+
+    def test_schema_documents_the_bearer_scheme(self):
+        with redirect_stderr(StringIO()):
+            schema = SchemaGenerator().get_schema(request=None, public=True)
+        self.assertEqual(schema['components']['securitySchemes']['jwtAuth'], {
+            'type': 'http', 'scheme': 'bearer', 'bearerFormat': 'JWT',
+        })
+
+
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        LOCAL_USERS.clear()
+        DENYLIST.clear()
+        self.addCleanup(DENYLIST.clear)
+        self.user = User.objects.create_user('client', email='client@example.com')
+        self.refresh = RefreshToken.for_user(self.user)
+        self.api = APIClient()
+        self.api.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+
+    def test_logout_revokes_access_and_refresh_tokens(self):
+        self.assertEqual(self.api.get('/api/auth/profile/').status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.api.post('/api/auth/logout/', {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(RevokedToken.objects.count(), 2)
+        self.assertEqual(self.api.get('/api/auth/profile/').status_code, 401)
+        response = self.api.post('/api/auth/refresh/', {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_logout_rejects_another_users_refresh_token(self):
+        other = RefreshToken.for_user(User.objects.create_user('other'))
+        response = self.api.post('/api/auth/logout/', {'refresh': str(other)}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(RevokedToken.objects.exists())
+
+    def test_rotated_refresh_token_is_revoked(self):
+        response = self.api.post('/api/auth/refresh/', {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.api.post('/api/auth/refresh/', {'refresh': response.data['refresh']},
+                                       format='json').status_code, 200)
+        self.assertEqual(self.api.post('/api/auth/refresh/', {'refresh': str(self.refresh)},
+                                       format='json').status_code, 401)
+
+    def test_unrevoked_tokens_skip_the_denylist_table(self):
+        self.api.get('/api/auth/profile/')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.api.get('/api/auth/profile/').status_code, 200)
+        self.assertEqual(len(queries), 0)
+
+    @override_settings(AUTH_REVOCATION_REFRESH_INTERVAL=0)
+    def test_revocations_by_other_processes_rebuild_the_filter(self):
+        self.assertEqual(self.api.get('/api/auth/profile/').status_code, 200)
+        access = self.refresh.access_token
+        # Written straight to the table, as another worker would, with no cache in common
+        RevokedToken.objects.create(jti=access['jti'], expires_at=datetime.now(dt_timezone.utc) + timedelta(hours=1))
+        cache.clear()
+        self.api.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(self.api.get('/api/auth/profile/').status_code, 401)
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.001)
+        items = [uuid.uuid4().hex for _ in range(1000)]
+        for item in items:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in items))
+        self.assertLess(sum(uuid.uuid4().hex in bloom for _ in range(10000)), 50)
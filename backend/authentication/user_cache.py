@@ -0,0 +1,90 @@
+"""
+Two-level cache of the ``User`` rows behind JWT-authenticated requests.
+
+Entries are keyed on the user id and a per-user version token kept in the
+shared cache (``AUTH_USER_CACHE_ALIAS``). ``invalidate_user`` replaces the
+version, which orphans every cached copy at once; it runs after any save or
+delete of a user and after group/permission changes (see signals.py), which
+covers profile edits, password changes and is_staff/is_active toggles in
+the admin. A per-process layer answers repeat requests without touching
+the shared cache for ``AUTH_USER_LOCAL_TIMEOUT`` seconds, so another
+worker may see a change that much later.
+
+A local-memory cache is not shared, so another worker never sees the new
+version; entries there also expire after ``AUTH_USER_LOCAL_TIMEOUT``
+seconds, which bounds the stale window the same way.
+"""
+import copy
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+LOCAL_USERS = {}
+LOCAL_USERS_LOCK = threading.Lock()
+LOCAL_USERS_MAX = 10000
+
+
+def user_cache():
+    return caches[settings.AUTH_USER_CACHE_ALIAS]
+
+
+def version_key(user_id):
+    return f'auth:user-version:{user_id}'
+
+
+def user_version(user_id):
+    """The current version token, creating one if the cache has none"""
+    version = user_cache().get(version_key(user_id))
+    if version is None:
+        version = uuid.uuid4().hex
+        # add() so concurrent requests agree on the first version
+        if not user_cache().add(version_key(user_id), version, None):
+            version = user_cache().get(version_key(user_id), version)
+    return version
+
+
+def get_cached_user(user_id):
+    """
+    Return (a private copy of the cached user or None, version). Pass the
+    version to ``cache_user`` after a miss: taken before the database read,
+    it keeps a change committed in between from being cached as current.
+    """
+    now = time.monotonic()
+    with LOCAL_USERS_LOCK:
+        entry = LOCAL_USERS.get(user_id)
+    if entry is not None and entry[0] > now:
+        return copy.copy(entry[1]), None
+
+    version = user_version(user_id)
+    user = user_cache().get(f'auth:user:{user_id}:{version}')
+    if user is not None:
+        remember_locally(user_id, user, now)
+        return copy.copy(user), version
+    return None, version
+
+
+def cache_user(user, version):
+    if isinstance(user_cache(), LocMemCache):
+        timeout = min(settings.AUTH_USER_CACHE_TIMEOUT, settings.AUTH_USER_LOCAL_TIMEOUT)
+    else:
+        timeout = settings.AUTH_USER_CACHE_TIMEOUT
+    user_cache().set(f'auth:user:{user.pk}:{version}', user, timeout)
+    remember_locally(user.pk, copy.copy(user), time.monotonic())
+
+
+def remember_locally(user_id, user, now):
+    with LOCAL_USERS_LOCK:
+        if len(LOCAL_USERS) >= LOCAL_USERS_MAX:
+            LOCAL_USERS.clear()
+        LOCAL_USERS[user_id] = (now + settings.AUTH_USER_LOCAL_TIMEOUT, user)
+
+
+def invalidate_user(user_id):
+    user_cache().set(version_key(user_id), uuid.uuid4().hex, None)
+    with LOCAL_USERS_LOCK:
+        LOCAL_USERS.pop(user_id, None)
@@ -6,14 +6,16 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth.models import User
 from .serializers import (
     UserSerializer, RegisterSerializer, CustomTokenObtainPairSerializer,
-    ChangePasswordSerializer
+    ChangePasswordSerializer, LogoutSerializer
 )
+from .revocation import revoke
 
 
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = RegisterSerializer
     permission_classes = [AllowAny]
+    throttle_scope = 'register'
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -65,6 +67,15 @@ class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
+        serializer = LogoutSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+
+        # Revoke the access token of this request and, when given, its refresh token
+        if request.auth is not None:
+            revoke(request.auth)
+        if 'refresh' in serializer.validated_data:
+            revoke(serializer.validated_data['refresh'])
+
         return Response(
             {"message": "Successfully logged out"},
             status=status.HTTP_200_OK
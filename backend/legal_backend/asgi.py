@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'legal_backend.settings')
+# Route anonymous catalog reads to the async views (services/async_views.py)
+os.environ.setdefault('ASYNC_CATALOG_VIEWS', 'True')
 
 application = get_asgi_application()
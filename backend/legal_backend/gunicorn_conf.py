@@ -0,0 +1,55 @@
+"""
+Production gunicorn profile:
+
+    gunicorn -c python:legal_backend.gunicorn_conf legal_backend.wsgi:application
+
+The application is imported once in the master (``preload_app``) and warmed
+before the workers fork (see legal_backend.warmup), so they start with
+Django, DRF, the URL resolvers, the OpenAPI schema code and the catalog
+cache already loaded and shared copy-on-write. Command-line options override
+the settings here, so the ASGI profile adds ``--worker-class``.
+
+Code changes need a restart rather than a HUP: with preloading, the master
+keeps the code it imported.
+"""
+import logging
+import os
+
+
+logger = logging.getLogger('gunicorn.error')
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 3))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+preload_app = True
+# Skip warming, e.g. while the database is being restored
+warmup = os.environ.get('GUNICORN_WARMUP', 'True').lower() in ('true', '1', 'yes')
+
+
+def on_starting(server):
+    # Runs in the master after the preloaded app is imported and before any
+    # worker forks. Also before gunicorn reaps children, which would take the
+    # ldconfig/gcc processes ctypes.util.find_library starts for drf-spectacular.
+    from legal_backend.warmup import freeze, process_memory, warm_up
+
+    if warmup:
+        for path, (status, milliseconds) in warm_up().items():
+            logger.info('Warmed %s: %s in %.1fms', path, status, milliseconds)
+    freeze()
+    try:
+        logger.info('Master memory before fork: %d KiB RSS', process_memory()['rss'])
+    except OSError:
+        pass
+
+
+def post_worker_init(worker):
+    from legal_backend.warmup import process_memory
+
+    try:
+        memory = process_memory()
+    except OSError:
+        return
+    worker.log.info(
+        'Worker %s started: %d KiB shared with the master, %d KiB private',
+        worker.pid, memory['shared'], memory['private'],
+    )
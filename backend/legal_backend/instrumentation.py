@@ -0,0 +1,263 @@
+"""
+Per-request timing and query instrumentation.
+
+``InstrumentationMiddleware`` counts and times every SQL query of a request
+through ``connection.execute_wrapper``, splits the request into view and
+render time, and reports the result three ways:
+
+* a ``Server-Timing`` header, readable in the browser's network panel;
+* one JSON log line per request on the ``legal_backend.instrumentation``
+  logger, plus a warning when the same SQL runs repeatedly (an N+1);
+* per-route histograms served in Prometheus text format on ``/api/metrics/``
+  (staff only). Metrics are kept per process, so with several gunicorn
+  workers each scrape sees the worker that answered it.
+"""
+import json
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class RequestMetrics:
+    """Query and timing totals for one request; doubles as the execute wrapper"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+        self.view_started = self.view_finished = self.rendered = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def duplicates(self, threshold):
+        """SQL statements (with placeholders) that ran at least ``threshold`` times"""
+        return {sql: count for sql, count in self.statements.items() if count >= threshold}
+
+    def timings(self, finished):
+        total = finished - self.started
+        view = render = None
+        if self.view_started is not None:
+            view = (self.view_finished or finished) - self.view_started
+        if self.view_finished is not None:
+            render = (self.rendered or finished) - self.view_finished
+        return {'total': total, 'view': view, 'render': render, 'db': self.db_time}
+
+
+@contextmanager
+def collect_queries(metrics):
+    """Route every query on every database connection through ``metrics``"""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics))
+        yield metrics
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+    def samples(self, name, labels):
+        for bound, count in zip(self.buckets, self.counts):
+            yield f'{name}_bucket', {**labels, 'le': format_bound(bound)}, count
+        yield f'{name}_bucket', {**labels, 'le': '+Inf'}, self.count
+        yield f'{name}_sum', labels, self.sum
+        yield f'{name}_count', labels, self.count
+
+
+def format_bound(bound):
+    return repr(float(bound))
+
+
+class MetricsRegistry:
+    """Per-route request metrics for this process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.durations = defaultdict(lambda: Histogram(DURATION_BUCKETS))
+        self.db_durations = defaultdict(lambda: Histogram(DURATION_BUCKETS))
+        self.query_counts = defaultdict(lambda: Histogram(QUERY_BUCKETS))
+        self.responses = Counter()
+        self.n_plus_one = Counter()
+
+    def record(self, route, method, status, metrics, timings, duplicates):
+        key = (route, method)
+        with self.lock:
+            self.durations[key].observe(timings['total'])
+            self.db_durations[key].observe(timings['db'])
+            self.query_counts[key].observe(metrics.queries)
+            self.responses[(route, method, str(status))] += 1
+            if duplicates:
+                self.n_plus_one[key] += 1
+
+    def render(self):
+        families = [
+            ('http_request_duration_seconds', 'histogram', 'Request duration by route', self.durations),
+            ('http_request_db_duration_seconds', 'histogram', 'Time spent in SQL by route', self.db_durations),
+            ('http_request_queries', 'histogram', 'SQL queries per request by route', self.query_counts),
+        ]
+        lines = []
+        with self.lock:
+            for name, kind, description, histograms in families:
+                lines += [f'# HELP {name} {description}', f'# TYPE {name} {kind}']
+                for (route, method), histogram in sorted(histograms.items()):
+                    for sample, labels, value in histogram.samples(name, {'route': route, 'method': method}):
+                        lines.append(f'{sample}{format_labels(labels)} {value}')
+
+            lines += ['# HELP http_responses_total Responses by route and status', '# TYPE http_responses_total counter']
+            for (route, method, status), value in sorted(self.responses.items()):
+                labels = {'route': route, 'method': method, 'status': status}
+                lines.append(f'http_responses_total{format_labels(labels)} {value}')
+
+            lines += [
+                '# HELP http_n_plus_one_requests_total Requests that repeated the same SQL statement',
+                '# TYPE http_n_plus_one_requests_total counter',
+            ]
+            for (route, method), value in sorted(self.n_plus_one.items()):
+                labels = {'route': route, 'method': method}
+                lines.append(f'http_n_plus_one_requests_total{format_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels.items()
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+registry = MetricsRegistry()
+
+
+def route_name(request):
+    """Low-cardinality route label: the URL name, e.g. ``service-detail``"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route or 'unnamed'
+
+
+def server_timing(timings, metrics):
+    parts = [f'db;dur={timings["db"] * 1000:.1f};desc="{metrics.queries} queries"']
+    if timings['view'] is not None:
+        parts.append(f'view;dur={timings["view"] * 1000:.1f}')
+    if timings['render'] is not None:
+        parts.append(f'render;dur={timings["render"] * 1000:.1f}')
+    parts.append(f'total;dur={timings["total"] * 1000:.1f}')
+    return ', '.join(parts)
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'INSTRUMENTATION_DUPLICATE_QUERY_THRESHOLD', 5)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = request.instrumentation = RequestMetrics()
+        with collect_queries(metrics):
+            response = self.get_response(request)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = request.instrumentation = RequestMetrics()
+        # Async ORM queries run on the request's thread-sensitive executor
+        # thread, whose connections differ from the event loop's; wrap those
+        stack = ExitStack()
+        await sync_to_async(stack.enter_context)(collect_queries(metrics))
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        timings = metrics.timings(time.perf_counter())
+
+        route = route_name(request)
+        duplicates = metrics.duplicates(self.threshold)
+        response['Server-Timing'] = server_timing(timings, metrics)
+        registry.record(route, request.method, response.status_code, metrics, timings, duplicates)
+
+        # Off by default (INSTRUMENTATION_LOG_LEVEL); skip building the line then
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'event': 'request',
+                'method': request.method,
+                'path': request.path,
+                'route': route,
+                'status': response.status_code,
+                'total_ms': round(timings['total'] * 1000, 2),
+                'view_ms': round(timings['view'] * 1000, 2) if timings['view'] is not None else None,
+                'render_ms': round(timings['render'] * 1000, 2) if timings['render'] is not None else None,
+                'db_ms': round(timings['db'] * 1000, 2),
+                'queries': metrics.queries,
+            }))
+        if duplicates:
+            logger.warning(json.dumps({
+                'event': 'n_plus_one',
+                'method': request.method,
+                'route': route,
+                'duplicates': [{'sql': sql, 'count': count} for sql, count in duplicates.items()],
+            }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.instrumentation.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Called after the view returns and before DRF/template responses render
+        metrics = request.instrumentation
+        metrics.view_finished = time.perf_counter()
+        response.add_post_render_callback(lambda rendered: setattr(metrics, 'rendered', time.perf_counter()))
+        return response
+
+
+class MetricsView(APIView):
+    """Per-route request metrics of this process in Prometheus text format"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
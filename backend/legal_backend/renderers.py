@@ -0,0 +1,60 @@
+"""
+orjson-backed drop-ins for DRF's ``JSONRenderer`` and ``JSONParser``.
+
+The output is byte-for-byte what DRF renders: compact separators, raw UTF-8,
+U+2028/U+2029 escaped, datetimes in ISO 8601 with ``Z`` for UTC, UUIDs as
+strings and stray Decimals as numbers (types orjson lacks go through DRF's
+own encoder). The exception is the exponent notation of very small or large
+floats (``1e-7`` rather than ``1e-07``), which parses to the same value.
+Pretty-printed, ASCII-only or non-strict output, and installs without
+orjson, use the stdlib implementation.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib renderer and parser are used instead
+    orjson = None
+
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.ensure_ascii or not self.compact or not self.strict or (
+            self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits; let the stdlib render or raise as usual
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Keep the output a strict JavaScript subset, as JSONRenderer does
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,190 @@
+"""
+Cached OpenAPI schema.
+
+drf-spectacular introspects every view and serializer to build the schema,
+which SpectacularAPIView did on every request. Here the schema is generated
+once per code version: ``manage.py build_openapi_schema`` at deploy, or the
+first request after it. The YAML and JSON documents and their gzip variants
+are written to ``MEDIA_ROOT/schema/``, shared by every worker.
+``/api/schema/`` serves those bytes with an ETag.
+
+The docs pages load ``/api/schema/?format=json&v=<digest>``, which is cached
+for a year: a new schema has a new digest, so browsers never see a stale one.
+
+The code version hashes the project's Python sources, the versions of the
+packages that shape the schema and ``SPECTACULAR_SETTINGS``. A deploy that
+changes any of them writes a new artifact; older ones are pruned.
+"""
+import gzip
+import hashlib
+import os
+from functools import lru_cache
+from importlib.metadata import version as package_version
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.views.decorators.http import require_safe
+from drf_spectacular.plumbing import set_query_parameters
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularRedocView, SpectacularSwaggerView
+
+from services.snapshot import snapshot_lock, write_atomic
+
+
+SCHEMA_DIR = 'schema'
+SCHEMA_KEEP = 3
+
+FORMATS = {
+    'yaml': (OpenApiYamlRenderer, 'application/vnd.oai.openapi; charset=utf-8'),
+    'json': (OpenApiJsonRenderer, 'application/vnd.oai.openapi+json'),
+}
+
+SCHEMA_PACKAGES = ('Django', 'djangorestframework', 'drf-spectacular', 'djangorestframework-simplejwt')
+
+SKIP_DIRS = {'__pycache__', 'node_modules', 'staticfiles', 'media', 'venv', '.venv'}
+
+# (code version, format, encoding) -> (content, ETag); preloaded workers share it
+LOADED = {}
+
+
+@lru_cache(maxsize=None)
+def code_version():
+    digest = hashlib.sha256(repr(sorted(spectacular_settings.user_settings.items())).encode())
+    for package in SCHEMA_PACKAGES:
+        digest.update(package_version(package).encode())
+    for directory, subdirectories, files in os.walk(settings.BASE_DIR):
+        subdirectories[:] = sorted(name for name in subdirectories if name not in SKIP_DIRS and name[0] != '.')
+        for name in sorted(files):
+            if name.endswith('.py'):
+                path = os.path.join(directory, name)
+                digest.update(os.path.relpath(path, settings.BASE_DIR).encode())
+                with open(path, 'rb') as source:
+                    digest.update(source.read())
+    return digest.hexdigest()[:16]
+
+
+def schema_root():
+    return os.path.join(settings.MEDIA_ROOT, SCHEMA_DIR)
+
+
+def schema_path(format, encoding=None):
+    path = os.path.join(schema_root(), f'openapi.{code_version()}.{format}')
+    return path + '.gz' if encoding == 'gzip' else path
+
+
+def build_schema(force=False):
+    """Generate and write the schema for the current code version unless it exists; returns whether it built"""
+    root = schema_root()
+    os.makedirs(root, exist_ok=True)
+    with snapshot_lock(root):
+        if not force and all(os.path.exists(schema_path(format, 'gzip')) for format in FORMATS):
+            return False
+        generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+        schema = generator.get_schema(request=None, public=spectacular_settings.SERVE_PUBLIC)
+        for format, (renderer_class, _) in FORMATS.items():
+            content = renderer_class().render(schema, renderer_context={})
+            write_atomic(schema_path(format), content)
+            # Written last: its presence marks a complete build
+            write_atomic(schema_path(format, 'gzip'), gzip.compress(content, compresslevel=9, mtime=0))
+        prune_schemas(root, keep=SCHEMA_KEEP)
+    LOADED.clear()
+    return True
+
+
+def prune_schemas(root, keep):
+    versions = sorted(
+        (entry for entry in os.scandir(root) if entry.name.startswith('openapi.') and entry.name.endswith('.json')),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in versions[keep:]:
+        prefix = entry.path[:-len('json')]
+        for format in FORMATS:
+            for suffix in ('', '.gz'):
+                try:
+                    os.unlink(prefix + format + suffix)
+                except FileNotFoundError:
+                    pass
+
+
+def load_schema(format, encoding=None):
+    """Return (content, ETag) of the cached schema, building it on first use"""
+    key = (code_version(), format, encoding)
+    if key not in LOADED:
+        try:
+            with open(schema_path(format, encoding), 'rb') as artifact:
+                content = artifact.read()
+        except FileNotFoundError:
+            build_schema()
+            with open(schema_path(format, encoding), 'rb') as artifact:
+                content = artifact.read()
+        LOADED[key] = (content, '"%s"' % hashlib.sha256(content).hexdigest()[:32])
+    return LOADED[key]
+
+
+def schema_digest():
+    """Identifies the current JSON schema; the docs pages put it in the schema URL"""
+    return load_schema('json')[1].strip('"')
+
+
+def negotiate_format(request):
+    requested = request.GET.get('format')
+    if requested in FORMATS:
+        return requested
+    return 'json' if 'json' in request.headers.get('Accept', '') else 'yaml'
+
+
+def accepts_gzip(request):
+    """Whether Accept-Encoding allows gzip, honouring q-values (``gzip;q=0`` refuses it)"""
+    qualities = {}
+    for coding in request.headers.get('Accept-Encoding', '').split(','):
+        name, _, params = coding.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+    return qualities.get('gzip', qualities.get('x-gzip', qualities.get('*', 0.0))) > 0
+
+
+@require_safe
+def openapi_schema(request):
+    """The cached schema, YAML unless JSON is asked for with ?format=json or the Accept header"""
+    format = negotiate_format(request)
+    encoding = 'gzip' if accepts_gzip(request) else None
+    content, etag = load_schema(format, encoding)
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type=FORMATS[format][1])
+        response['Content-Disposition'] = f'inline; filename="{spectacular_settings.TITLE or "schema"}.{format}"'
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    if request.GET.get('v') == schema_digest():
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response['Cache-Control'] = 'no-cache'
+    patch_vary_headers(response, ['Accept', 'Accept-Encoding'])
+    return response
+
+
+class CachedSchemaMixin:
+    """Point a docs page at the immutable URL of the current schema"""
+
+    def _get_schema_url(self, request):
+        return set_query_parameters(super()._get_schema_url(request), format='json', v=schema_digest())
+
+
+class CachedSchemaSwaggerView(CachedSchemaMixin, SpectacularSwaggerView):
+    pass
+
+
+class CachedSchemaRedocView(CachedSchemaMixin, SpectacularRedocView):
+    pass
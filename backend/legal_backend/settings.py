@@ -53,6 +53,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover every other middleware
+    'legal_backend.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -64,6 +66,13 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Set by legal_backend/asgi.py: serve anonymous catalog reads with async views.
+# WhiteNoise is sync-only and would put every request back on a thread, so the
+# ASGI profile leaves static files to nginx.
+ASYNC_CATALOG_VIEWS = config('ASYNC_CATALOG_VIEWS', default=False, cast=bool)
+if ASYNC_CATALOG_VIEWS:
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
+
 ROOT_URLCONF = 'legal_backend.urls'
 
 TEMPLATES = [
@@ -104,6 +113,77 @@ else:
     }
 
 
+# Cache
+# Local memory by default. Set CACHE_BACKEND/CACHE_LOCATION to a file-based or
+# Redis cache in production so gunicorn workers share the cached pages; the
+# catalog version deciding which pages are current lives in the database.
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='trustedlegal-cache'),
+    }
+}
+
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=300, cast=int)
+# Seconds a process trusts its copy of the catalog version before re-reading it
+CATALOG_VERSION_REFRESH_INTERVAL = config('CATALOG_VERSION_REFRESH_INTERVAL', default=1, cast=float)
+
+# Pre-rendered catalog snapshots under MEDIA_ROOT/catalog/ (see /api/catalog/);
+# older versions are kept for clients still following a previous redirect
+CATALOG_SNAPSHOT_KEEP = config('CATALOG_SNAPSHOT_KEEP', default=5, cast=int)
+
+
+# Background jobs (admin Excel imports/exports), processed by `manage.py run_jobs`
+
+JOB_WORKERS = config('JOB_WORKERS', default=2, cast=int)
+# Jobs still 'running' this many seconds after they started are requeued when
+# run_jobs starts: the process that claimed them died without finishing
+JOB_STALE_AFTER = config('JOB_STALE_AFTER', default=3600, cast=int)
+
+
+# Email. Inquiry notifications go through an outbox table and are sent by
+# `manage.py process_outbox`, never on the request path (see services.outbox).
+
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=25, cast=int)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=30, cast=int)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='Legal Consultancy <noreply@localhost>')
+
+# Base URL of this backend, for admin links in emails
+BACKEND_URL = config('BACKEND_URL', default='http://localhost:8000')
+# Recipients for unassigned inquiries; empty means every active staff user with an email
+INQUIRY_NOTIFICATION_EMAILS = [email for email in config('INQUIRY_NOTIFICATION_EMAILS', default='').split(',') if email]
+# Notifications arriving within this many seconds are sent as one digest per recipient
+OUTBOX_DIGEST_WINDOW = config('OUTBOX_DIGEST_WINDOW', default=300, cast=int)
+
+
+# Request instrumentation (Server-Timing header, /api/metrics/, N+1 warnings).
+# Per-request JSON log lines are emitted at INFO; N+1 warnings at WARNING.
+
+INSTRUMENTATION_DUPLICATE_QUERY_THRESHOLD = config('INSTRUMENTATION_DUPLICATE_QUERY_THRESHOLD', default=5, cast=int)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'legal_backend.instrumentation': {
+            'handlers': ['console'],
+            'level': config('INSTRUMENTATION_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -153,6 +233,11 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Responsive copies of uploaded service/testimonial images, generated by the
+# job queue and stored next to the original (see services.images)
+IMAGE_DERIVATIVE_WIDTHS = [int(width) for width in config('IMAGE_DERIVATIVE_WIDTHS', default='320,640,1280').split(',')]
+IMAGE_DERIVATIVE_FORMATS = config('IMAGE_DERIVATIVE_FORMATS', default='webp,jpeg').split(',')
+
 
 # CORS settings
 CORS_ALLOWED_ORIGINS = config('CORS_ALLOWED_ORIGINS', default='http://localhost:3000').split(',')
@@ -176,15 +261,66 @@ if DEBUG:
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # simplejwt's JWTAuthentication with the user row cached (see authentication.user_cache)
+        'authentication.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    # orjson-backed JSON; falls back to the stdlib when orjson is missing
+    'DEFAULT_RENDERER_CLASSES': [
+        'legal_backend.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'legal_backend.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Token buckets for the scopes in THROTTLE_BUCKETS; views without a scope are not throttled
+    'DEFAULT_THROTTLE_CLASSES': [
+        'legal_backend.throttling.TokenBucketThrottle',
+    ],
+    # Reverse proxies in front of gunicorn whose X-Forwarded-For entries are trusted;
+    # 0 keys clients by REMOTE_ADDR
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
+}
+
+# Token-bucket limits per view scope (see legal_backend.throttling):
+# "<tokens>/<period>[:<burst>]" per client address, submitted email, or in total
+THROTTLE_ENABLED = config('THROTTLE_ENABLED', default=True, cast=bool)
+THROTTLE_CACHE_ALIAS = 'default'
+THROTTLE_BUCKETS = {
+    'inquiry_create': {
+        'ip': config('THROTTLE_INQUIRY_IP', default='20/hour:5'),
+        'email': config('THROTTLE_INQUIRY_EMAIL', default='10/hour:3'),
+        'global': config('THROTTLE_INQUIRY_GLOBAL', default='2/s:20'),
+    },
+    'register': {
+        'ip': config('THROTTLE_REGISTER_IP', default='10/hour:3'),
+        'email': config('THROTTLE_REGISTER_EMAIL', default='3/hour:1'),
+        'global': config('THROTTLE_REGISTER_GLOBAL', default='1/s:10'),
+    },
 }
 
+# Services, inquiries and testimonials use keyset pagination. While this is
+# True, list routes stay unpaginated unless the client sends cursor/page_size.
+API_PAGINATION_COMPAT = config('API_PAGINATION_COMPAT', default=True, cast=bool)
+
 # JWT Settings
+# Users behind JWT-authenticated requests are cached in the shared cache and,
+# briefly, per process; saving a user invalidates both
+AUTH_USER_CACHE_ALIAS = 'default'
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=300, cast=int)
+AUTH_USER_LOCAL_TIMEOUT = config('AUTH_USER_LOCAL_TIMEOUT', default=5, cast=int)
+
+# Revoked tokens (logout, refresh rotation) are checked against a per-process
+# Bloom filter, rebuilt when polling the table shows another process revoked
+# a token; see authentication.revocation
+AUTH_REVOCATION_REFRESH_INTERVAL = config('AUTH_REVOCATION_REFRESH_INTERVAL', default=5, cast=float)
+AUTH_REVOCATION_ERROR_RATE = 0.001
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
@@ -198,6 +334,7 @@ SIMPLE_JWT = {
     'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
+    'TOKEN_REFRESH_SERIALIZER': 'authentication.serializers.DenylistTokenRefreshSerializer',
 }
 
 # Spectacular settings for API documentation
@@ -0,0 +1,155 @@
+"""
+Token-bucket throttling for the anonymous write endpoints.
+
+A view names its throttle scope per action (``throttle_scopes = {'create':
+'inquiry_create'}``) or for every request (``throttle_scope``), and
+``THROTTLE_BUCKETS[scope]`` maps bucket keys to rates:
+
+* ``ip``: one bucket per client address (see DRF's ``NUM_PROXIES``);
+* ``email``: one bucket per submitted ``email`` field, case-insensitive;
+* ``global``: one bucket for all clients, which sheds writes during a flood
+  spread over many addresses.
+
+A rate is ``"<tokens>/<period>"`` with an optional ``":<burst>"`` bucket
+size (default: the tokens per period), so ``"20/hour:5"`` allows five
+requests at once and one more every three minutes.
+
+Buckets live in the ``THROTTLE_CACHE_ALIAS`` cache, shared by all workers
+when that is Redis or memcached; if the cache is unreachable they fall back
+to a per-process dict. A request takes a token from each of its buckets
+only when every one of them has a token, so a request rejected by one
+bucket costs the others nothing. DRF checks throttles before the handler
+runs, so a rejected request costs one cache read and never reaches
+serializer validation or the database. Reads and writes of a bucket are
+not atomic, so concurrent requests may occasionally overdraw it by a token.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'sec': 1, 'second': 1, 'm': 60, 'min': 60, 'minute': 60, 'h': 3600, 'hour': 3600, 'd': 86400,
+           'day': 86400}
+
+BUCKET_KEYS = ('ip', 'email', 'global')
+
+LOCAL_BUCKETS = OrderedDict()
+LOCAL_BUCKETS_LOCK = threading.Lock()
+LOCAL_BUCKETS_MAX = 10000
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """``'20/hour:5'`` -> (tokens refilled per second, bucket size)"""
+    tokens, _, rest = rate.partition('/')
+    period, _, burst = rest.partition(':')
+    return int(tokens) / PERIODS[period], int(burst) if burst else int(tokens)
+
+
+def take_token(state, now, refill, capacity):
+    """Return (allowed, new state, seconds until the next token) for a ``(tokens, timestamp)`` state"""
+    tokens, updated = state or (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * refill)
+    if tokens >= 1:
+        return True, (tokens - 1, now), 0
+    return False, (tokens, now), (1 - tokens) / refill
+
+
+def take_tokens(rates, states, now):
+    """
+    ``take_token`` from every bucket of ``rates`` (key -> rate); returns
+    (allowed only if every bucket had a token, new states, longest wait).
+    """
+    new_states, waits = {}, []
+    for key, rate in rates.items():
+        refill, capacity = parse_rate(rate)
+        allowed, new_states[key], wait = take_token(states.get(key), now, refill, capacity)
+        if not allowed:
+            waits.append(wait)
+    return not waits, new_states, max(waits, default=0)
+
+
+def bucket_timeout(rate):
+    # A full bucket carries no information, so the entry may expire then
+    refill, capacity = parse_rate(rate)
+    return int(capacity / refill) + 1
+
+
+def consume(key, rate, now=None):
+    """Take a token from the bucket ``key``; returns (allowed, seconds to wait)"""
+    return consume_all({key: rate}, now)
+
+
+def consume_all(rates, now=None):
+    """Take a token from every bucket of ``rates`` (key -> rate), or from none; returns (allowed, seconds to wait)"""
+    now = time.time() if now is None else now
+    try:
+        cache = caches[settings.THROTTLE_CACHE_ALIAS]
+        allowed, states, wait = take_tokens(rates, cache.get_many(list(rates)), now)
+        if allowed:
+            for key, state in states.items():
+                cache.set(key, state, bucket_timeout(rates[key]))
+        return allowed, wait
+    except Exception:
+        logger.warning('Throttle cache unavailable; using per-process buckets', exc_info=True)
+
+    with LOCAL_BUCKETS_LOCK:
+        allowed, states, wait = take_tokens(rates, LOCAL_BUCKETS, now)
+        if allowed:
+            for key, state in states.items():
+                LOCAL_BUCKETS[key] = state
+                LOCAL_BUCKETS.move_to_end(key)
+            while len(LOCAL_BUCKETS) > LOCAL_BUCKETS_MAX:
+                LOCAL_BUCKETS.popitem(last=False)
+    return allowed, wait
+
+
+class TokenBucketThrottle(BaseThrottle):
+    def get_scope(self, view):
+        scopes = getattr(view, 'throttle_scopes', None)
+        if scopes is not None:
+            return scopes.get(getattr(view, 'action', None))
+        return getattr(view, 'throttle_scope', None)
+
+    def get_bucket_ident(self, name, request):
+        if name == 'ip':
+            return self.get_ident(request)
+        if name == 'email':
+            # Parsing here raises the same ParseError the view would for a malformed body
+            email = request.data.get('email') if hasattr(request.data, 'get') else None
+            return email.strip().lower() if isinstance(email, str) and email.strip() else None
+        return ''
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        if not settings.THROTTLE_ENABLED:
+            return True
+        scope = self.get_scope(view)
+        buckets = settings.THROTTLE_BUCKETS.get(scope, {}) if scope else {}
+        rates = {}
+        for name in BUCKET_KEYS:
+            if name not in buckets:
+                continue
+            ident = self.get_bucket_ident(name, request)
+            if ident is None:
+                continue
+            # Hashed so keys are cache-safe and emails are not stored in the clear
+            rates[f"throttle:{scope}:{name}:{hashlib.md5(ident.encode()).hexdigest()}"] = buckets[name]
+        if not rates:
+            return True
+        allowed, wait = consume_all(rates)
+        if not allowed:
+            self.wait_seconds = wait
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
@@ -19,8 +19,9 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.http import JsonResponse
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 from services.admin_views import download_template
+from .instrumentation import MetricsView
+from .schema import CachedSchemaRedocView, CachedSchemaSwaggerView, openapi_schema
 
 def health_check(request):
     return JsonResponse({"status": "healthy", "message": "TrustedLegal BD API is running"})
@@ -31,13 +32,15 @@ urlpatterns = [
     path('admin/download-template/<str:model_type>/', download_template, name='download_template'),
     # Health check
     path('api/health/', health_check, name='health_check'),
+    # Per-route request metrics, Prometheus text format (staff only)
+    path('api/metrics/', MetricsView.as_view(), name='metrics'),
     # API endpoints
     path('api/auth/', include('authentication.urls')),
     path('api/', include('services.urls')),
-    # API documentation
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    # API documentation, served from the schema cached per code version
+    path('api/schema/', openapi_schema, name='schema'),
+    path('api/docs/', CachedSchemaSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    path('api/redoc/', CachedSchemaRedocView.as_view(url_name='schema'), name='redoc'),
 ]
 
 # Serve media files during development
@@ -0,0 +1,107 @@
+"""
+Warm a preloaded application before gunicorn forks its workers.
+
+``warm_up`` runs in the gunicorn master (see gunicorn_conf.py) and sends a
+few anonymous requests through the middleware chain: that builds the URL
+resolvers, imports every view, serializer and renderer, constructs the
+serializer fields, generates the OpenAPI schema and fills the catalog cache.
+Workers forked afterwards share those pages copy-on-write, and the first
+request after a deploy no longer pays for them. ``gc.freeze()`` then keeps
+the collector in the workers from writing to, and so copying, the shared
+objects.
+
+``process_memory`` splits a process's memory into the pages it still
+shares with the master and its own (Linux only).
+"""
+import gc
+import logging
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import close_caches
+from django.core.handlers.wsgi import WSGIHandler, WSGIRequest
+from django.db import connections
+from django.urls import get_resolver, reverse
+
+
+logger = logging.getLogger(__name__)
+
+WARMUP_PATHS = [
+    '/api/health/',
+    '/api/categories/',
+    '/api/services/',
+    '/api/services/featured/',
+    '/api/testimonials/',
+    '/api/testimonials/featured/',
+    '/api/schema/',
+]
+
+
+def warmup_host():
+    """A host name ALLOWED_HOSTS accepts, for the warm-up requests"""
+    for host in settings.ALLOWED_HOSTS:
+        host = host.strip().lstrip('.')
+        if host and host != '*':
+            return host
+    return 'localhost'
+
+
+def warmup_request(path, host):
+    # Built by hand: django.test would be one more package in every worker
+    return WSGIRequest({
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SERVER_NAME': host,
+        'SERVER_PORT': '80', 'HTTP_HOST': host, 'HTTP_ACCEPT': 'application/json', 'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.input': BytesIO(), 'wsgi.url_scheme': 'http',
+    })
+
+
+def warm_up(paths=WARMUP_PATHS):
+    """Request ``paths`` in-process; returns {path: (status, milliseconds)}"""
+    results = {}
+    try:
+        # Populates the resolver and the reverse lookup tables
+        get_resolver().url_patterns
+        reverse('health_check')
+
+        handler = WSGIHandler()
+        host = warmup_host()
+        for path in paths:
+            start = time.perf_counter()
+            try:
+                status = handler.get_response(warmup_request(path, host)).status_code
+            except Exception:
+                # A missing database must not keep the server from starting
+                logger.warning('Warm-up request to %s failed', path, exc_info=True)
+                status = None
+            results[path] = (status, (time.perf_counter() - start) * 1000)
+    finally:
+        # Workers must open their own connections rather than share the master's sockets
+        connections.close_all()
+        close_caches()
+
+    from .instrumentation import registry
+    registry.reset()
+    return results
+
+
+def freeze():
+    """Move everything allocated so far out of the collector's reach"""
+    gc.collect()
+    gc.freeze()
+
+
+def process_memory(pid='self'):
+    """{'rss', 'pss', 'shared', 'private'} in KiB from /proc/<pid>/smaps_rollup"""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as file:
+        for line in file:
+            name, _, value = line.partition(':')
+            if value.strip().endswith('kB'):
+                fields[name] = int(value.split()[0])
+    return {
+        'rss': fields['Rss'],
+        'pss': fields['Pss'],
+        'shared': fields['Shared_Clean'] + fields['Shared_Dirty'],
+        'private': fields['Private_Clean'] + fields['Private_Dirty'],
+    }
@@ -1,16 +1,15 @@
 from django.contrib import admin
 from django.urls import path, reverse
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.http import HttpResponse
-from .models import ServiceCategory, Service, ServiceInquiry, Testimonial
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.http import FileResponse, Http404, JsonResponse
+from .models import ServiceCategory, Service, ServiceInquiry, Testimonial, Job, OutboxMessage
 from .forms import ServiceAdminForm, ServiceCategoryAdminForm
-from .admin_excel import (
-    export_service_categories_excel, export_services_excel,
-    import_service_categories_excel, import_services_excel
-)
-import pandas as pd
-from datetime import datetime
+from .admin_excel import export_service_categories_excel, export_services_excel
+from .inquiries import apply_inquiry_changes
+from .jobs import enqueue_job
 
 
 @admin.register(ServiceCategory)
@@ -33,18 +32,9 @@ class ServiceCategoryAdmin(admin.ModelAdmin):
         if request.method == 'POST':
             excel_file = request.FILES.get('excel_file')
             if excel_file:
-                result = import_service_categories_excel(excel_file, request.user)
-                
-                if result['created'] or result['updated']:
-                    messages.success(
-                        request,
-                        f"Successfully imported: {result['created']} created, {result['updated']} updated"
-                    )
-                
-                for error in result['errors']:
-                    messages.error(request, error)
-                
-                return redirect('admin:services_servicecategory_changelist')
+                job = enqueue_job('import_service_categories', request.user, input_file=excel_file)
+                messages.info(request, f"Import queued as job #{job.pk}")
+                return redirect('admin:services_job_status', job.pk)
         
         context = {
             'title': 'Import Service Categories',
@@ -88,18 +78,9 @@ class ServiceAdmin(admin.ModelAdmin):
         if request.method == 'POST':
             excel_file = request.FILES.get('excel_file')
             if excel_file:
-                result = import_services_excel(excel_file, request.user)
-                
-                if result['created'] or result['updated']:
-                    messages.success(
-                        request,
-                        f"Successfully imported: {result['created']} created, {result['updated']} updated"
-                    )
-                
-                for error in result['errors']:
-                    messages.error(request, error)
-                
-                return redirect('admin:services_service_changelist')
+                job = enqueue_job('import_services', request.user, input_file=excel_file)
+                messages.info(request, f"Import queued as job #{job.pk}")
+                return redirect('admin:services_job_status', job.pk)
         
         context = {
             'title': 'Import Services',
@@ -140,6 +121,22 @@ class ServiceInquiryAdmin(admin.ModelAdmin):
         }),
     )
 
+    def changelist_view(self, request, extra_context=None):
+        if request.method != 'POST' or '_save' not in request.POST:
+            return super().changelist_view(request, extra_context=extra_context)
+        # save_model collects the list_editable rows; apply them with the bulk API's UPDATEs
+        request.inquiry_changes = {}
+        with transaction.atomic():
+            response = super().changelist_view(request, extra_context=extra_context)
+            apply_inquiry_changes(request.inquiry_changes)
+        return response
+
+    def save_model(self, request, obj, form, change):
+        changes = getattr(request, 'inquiry_changes', None)
+        if changes is None or not change:
+            return super().save_model(request, obj, form, change)
+        changes[obj.pk] = {name: form.cleaned_data[name] for name in form.changed_data}
+
 
 @admin.register(Testimonial)
 class TestimonialAdmin(admin.ModelAdmin):
@@ -148,4 +145,79 @@ class TestimonialAdmin(admin.ModelAdmin):
     list_editable = ['is_featured', 'is_active']
     search_fields = ['client_name', 'content']
     readonly_fields = ['created_at']
-    ordering = ['-created_at']
\ No newline at end of file
+    ordering = ['-created_at']
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'progress', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['kind', 'status']
+    readonly_fields = [
+        'kind', 'status', 'payload', 'input_file', 'result_file', 'result', 'progress',
+        'error', 'created_by', 'created_at', 'started_at', 'finished_at'
+    ]
+    ordering = ['-created_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path('<int:job_id>/status/', self.admin_site.admin_view(self.status_view), name='services_job_status'),
+            path('<int:job_id>/progress/', self.admin_site.admin_view(self.progress_view), name='services_job_progress'),
+            path('<int:job_id>/download/', self.admin_site.admin_view(self.download_view), name='services_job_download'),
+        ]
+        return custom_urls + urls
+
+    def job_state(self, job):
+        return {
+            'id': job.pk,
+            'kind': job.kind,
+            'status': job.status,
+            'progress': job.progress,
+            'result': job.result,
+            'error': job.error,
+            'download_url': reverse('admin:services_job_download', args=[job.pk]) if job.result_file else None,
+        }
+
+    def status_view(self, request, job_id):
+        job = get_object_or_404(Job, pk=job_id)
+        context = {
+            **self.admin_site.each_context(request),
+            'title': f'{job.get_kind_display()} #{job.pk}',
+            'job': job,
+            'progress_url': reverse('admin:services_job_progress', args=[job.pk]),
+            'changelist_url': reverse('admin:services_job_changelist'),
+        }
+        return render(request, 'admin/services/job_status.html', context)
+
+    def progress_view(self, request, job_id):
+        return JsonResponse(self.job_state(get_object_or_404(Job, pk=job_id)))
+
+    def download_view(self, request, job_id):
+        job = get_object_or_404(Job, pk=job_id)
+        # Exports may hold anything the creator could see; other staff need the view permission
+        if job.created_by_id != request.user.pk and not self.has_view_permission(request, job):
+            raise PermissionDenied
+        if not job.result_file:
+            raise Http404("Job has no result file")
+        return FileResponse(
+            job.result_file.open('rb'),
+            as_attachment=True,
+            filename=job.result_file.name.rsplit('/', 1)[-1]
+        )
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ['id', 'topic', 'status', 'attempts', 'created_at', 'available_at', 'sent_at']
+    list_filter = ['topic', 'status']
+    readonly_fields = [
+        'topic', 'payload', 'status', 'attempts', 'available_at', 'claimed_at', 'claim', 'sent_at', 'delivered_to',
+        'error', 'created_at'
+    ]
+    ordering = ['-created_at']
+
+    def has_add_permission(self, request):
+        return False
@@ -1,112 +1,163 @@
-import pandas as pd
-from django.http import HttpResponse
+"""
+Excel import and export for the admin.
+
+The admin only queues jobs from here; pandas and openpyxl are imported inside
+the functions that read or write a workbook, so web workers and management
+commands that never touch a spreadsheet do not pay for loading them.
+"""
 from django.contrib import messages
-from django.shortcuts import render, redirect
-from django.urls import path
-from django.core.exceptions import ValidationError
-from io import BytesIO
-import openpyxl
-from datetime import datetime
+from django.contrib.admin.views.main import ERROR_FLAG, PAGE_VAR
+from django.db.models import CharField, Max, TextField
+from django.db.models.functions import Cast, Length
+from django.shortcuts import redirect
+
+from .jobs import enqueue_job
+
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+EXPORT_CHUNK_SIZE = 2000
+MAX_COLUMN_WIDTH = 50
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def format_datetime(value):
+    return value.strftime(DATETIME_FORMAT) if value else ''
+
+
+def column_widths(queryset, columns):
+    """
+    Column widths for a write-only sheet, computed before any row is written.
+
+    Write-only worksheets emit column dimensions ahead of the rows, so the
+    longest value per column comes from a single Max(Length(...)) aggregate
+    instead of a second pass over every cell.
+    """
+    expressions = {
+        f'width_{index}': Max(length)
+        for index, (_, _, length) in enumerate(columns)
+        if not isinstance(length, int)
+    }
+    longest = queryset.order_by().aggregate(**expressions) if expressions else {}
+    widths = []
+    for index, (header, _, length) in enumerate(columns):
+        value_length = length if isinstance(length, int) else longest[f'width_{index}'] or 0
+        widths.append(min(max(len(header), value_length) + 2, MAX_COLUMN_WIDTH))
+    return widths
+
+
+def write_excel(queryset, sheet_name, columns, output, progress=None):
+    """
+    Write a queryset to an .xlsx file object with constant memory.
+
+    Rows are fetched in chunks and written to an openpyxl write-only sheet,
+    which spools them to disk until the workbook is saved into ``output``.
+    ``progress`` is called as ``progress(rows_done, rows_total)`` per chunk.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_name)
+    for index, width in enumerate(column_widths(queryset, columns), 1):
+        worksheet.column_dimensions[get_column_letter(index)].width = width
+
+    header_font = Font(bold=True)
+    header = []
+    for title, _, _ in columns:
+        cell = WriteOnlyCell(worksheet, value=title)
+        cell.font = header_font
+        header.append(cell)
+    worksheet.append(header)
+
+    total = queryset.count() if progress else None
+    getters = [getter for _, getter, _ in columns]
+    rows = 0
+    for obj in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        worksheet.append([getter(obj) for getter in getters])
+        rows += 1
+        if progress and rows % EXPORT_CHUNK_SIZE == 0:
+            progress(rows, total)
+
+    workbook.save(output)
+    return rows
+
+
+def text_length(field):
+    return Length(Cast(field, CharField()))
+
+
+SERVICE_CATEGORY_COLUMNS = [
+    ('ID', lambda category: category.id, text_length('id')),
+    ('Name', lambda category: category.name, Length('name')),
+    ('Description', lambda category: category.description, Length('description')),
+    ('Icon', lambda category: category.icon, Length('icon')),
+    ('Order', lambda category: category.order, text_length('order')),
+    ('Created At', lambda category: format_datetime(category.created_at), 19),
+]
+
+SERVICE_COLUMNS = [
+    ('ID', lambda service: service.id, text_length('id')),
+    ('Title', lambda service: service.title, Length('title')),
+    ('Slug', lambda service: service.slug, Length('slug')),
+    ('Category', lambda service: service.category.name if service.category else '', Length('category__name')),
+    ('Short Description', lambda service: service.short_description, Length('short_description')),
+    ('Full Description', lambda service: service.full_description, Length('full_description')),
+    # Features list as comma-separated string for Excel
+    ('Features', lambda service: ', '.join(service.features) if service.features else '',
+     Length(Cast('features', TextField()))),
+    ('Price', lambda service: str(service.price) if service.price else '', text_length('price')),
+    ('Price Unit', lambda service: service.price_unit, Length('price_unit')),
+    ('Duration', lambda service: service.duration, Length('duration')),
+    ('Icon', lambda service: service.icon, Length('icon')),
+    ('Status', lambda service: service.status, Length('status')),
+    ('Order', lambda service: service.order, text_length('order')),
+    ('Created By', lambda service: service.created_by.username if service.created_by else '',
+     Length('created_by__username')),
+    ('Created At', lambda service: format_datetime(service.created_at), 19),
+    ('Updated At', lambda service: format_datetime(service.updated_at), 19),
+]
+
+
+def write_service_categories_excel(queryset, output, progress=None):
+    return write_excel(queryset, 'Service Categories', SERVICE_CATEGORY_COLUMNS, output, progress)
+
+
+def write_services_excel(queryset, output, progress=None):
+    return write_excel(
+        queryset.select_related('category', 'created_by'), 'Services', SERVICE_COLUMNS, output, progress
+    )
+
+
+def export_payload(request, queryset):
+    """
+    The selected ids, at most one changelist page. "Select all" covers every
+    matching row, so the changelist query string is stored instead and the
+    job rebuilds the changelist from it (see jobs.export_queryset).
+    """
+    if request.POST.get('select_across') != '1':
+        return {'ids': list(queryset.values_list('pk', flat=True))}
+    params = request.GET.copy()
+    for key in (PAGE_VAR, ERROR_FLAG):
+        params.pop(key, None)
+    return {'query': params.urlencode()}
+
+
+def queue_export(modeladmin, request, queryset, kind):
+    job = enqueue_job(kind, request.user, payload=export_payload(request, queryset))
+    modeladmin.message_user(request, f"Export queued as job #{job.pk}", messages.INFO)
+    return redirect('admin:services_job_status', job.pk)
 
 
 def export_service_categories_excel(modeladmin, request, queryset):
-    """Export selected Service Categories to Excel"""
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = f'attachment; filename="service_categories_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx"'
-    
-    data = []
-    for category in queryset:
-        data.append({
-            'ID': category.id,
-            'Name': category.name,
-            'Description': category.description,
-            'Icon': category.icon,
-            'Order': category.order,
-            'Created At': category.created_at.strftime('%Y-%m-%d %H:%M:%S') if category.created_at else '',
-        })
-    
-    df = pd.DataFrame(data)
-    
-    with BytesIO() as buffer:
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Service Categories', index=False)
-            
-            workbook = writer.book
-            worksheet = writer.sheets['Service Categories']
-            
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
-        
-        buffer.seek(0)
-        response.write(buffer.getvalue())
-    
-    return response
+    """Queue an Excel export of the selected Service Categories"""
+    return queue_export(modeladmin, request, queryset, 'export_service_categories')
 
 
 def export_services_excel(modeladmin, request, queryset):
-    """Export selected Services to Excel"""
-    import json
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = f'attachment; filename="services_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx"'
-    
-    data = []
-    for service in queryset:
-        # Convert features list to comma-separated string for Excel
-        features_str = ', '.join(service.features) if service.features else ''
-        
-        data.append({
-            'ID': service.id,
-            'Title': service.title,
-            'Slug': service.slug,
-            'Category': service.category.name if service.category else '',
-            'Short Description': service.short_description,
-            'Full Description': service.full_description,
-            'Features': features_str,
-            'Price': str(service.price) if service.price else '',
-            'Price Unit': service.price_unit,
-            'Duration': service.duration,
-            'Icon': service.icon,
-            'Status': service.status,
-            'Order': service.order,
-            'Created By': service.created_by.username if service.created_by else '',
-            'Created At': service.created_at.strftime('%Y-%m-%d %H:%M:%S') if service.created_at else '',
-            'Updated At': service.updated_at.strftime('%Y-%m-%d %H:%M:%S') if service.updated_at else '',
-        })
-    
-    df = pd.DataFrame(data)
-    
-    with BytesIO() as buffer:
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Services', index=False)
-            
-            workbook = writer.book
-            worksheet = writer.sheets['Services']
-            
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
-        
-        buffer.seek(0)
-        response.write(buffer.getvalue())
-    
-    return response
+    """Queue an Excel export of the selected Services"""
+    return queue_export(modeladmin, request, queryset, 'export_services')
 
 
 export_service_categories_excel.short_description = "Export selected categories to Excel"
@@ -115,54 +166,14 @@ export_services_excel.short_description = "Export selected services to Excel"
 
 def import_service_categories_excel(file, user=None):
     """Import Service Categories from Excel file"""
-    from .models import ServiceCategory
-    
+    import pandas as pd
+
+    from .importers import import_service_categories
+
     try:
         df = pd.read_excel(file, sheet_name='Service Categories')
-        
-        created_count = 0
-        updated_count = 0
-        errors = []
-        
-        for index, row in df.iterrows():
-            try:
-                category_id = row.get('ID')
-                
-                if pd.notna(category_id):
-                    try:
-                        category = ServiceCategory.objects.get(id=int(category_id))
-                        updated_count += 1
-                    except ServiceCategory.DoesNotExist:
-                        category = ServiceCategory()
-                        created_count += 1
-                else:
-                    category = ServiceCategory()
-                    created_count += 1
-                
-                if pd.notna(row.get('Name')):
-                    category.name = str(row['Name'])
-                
-                if pd.notna(row.get('Description')):
-                    category.description = str(row['Description'])
-                
-                if pd.notna(row.get('Icon')):
-                    category.icon = str(row['Icon'])
-                
-                if pd.notna(row.get('Order')):
-                    category.order = int(row['Order'])
-                
-                category.full_clean()
-                category.save()
-                
-            except Exception as e:
-                errors.append(f"Row {index + 2}: {str(e)}")
-        
-        return {
-            'created': created_count,
-            'updated': updated_count,
-            'errors': errors
-        }
-        
+        return import_service_categories(df, user)
+
     except Exception as e:
         return {
             'created': 0,
@@ -173,117 +184,17 @@ def import_service_categories_excel(file, user=None):
 
 def import_services_excel(file, user=None):
     """Import Services from Excel file"""
-    from .models import Service, ServiceCategory
-    from django.utils.text import slugify
-    import json
-    
+    import pandas as pd
+
+    from .importers import import_services
+
     try:
         df = pd.read_excel(file, sheet_name='Services')
-        
-        created_count = 0
-        updated_count = 0
-        errors = []
-        
-        for index, row in df.iterrows():
-            try:
-                service_id = row.get('ID')
-                
-                if pd.notna(service_id):
-                    try:
-                        service = Service.objects.get(id=int(service_id))
-                        updated_count += 1
-                    except Service.DoesNotExist:
-                        service = Service()
-                        created_count += 1
-                else:
-                    service = Service()
-                    created_count += 1
-                
-                if pd.notna(row.get('Title')):
-                    service.title = str(row['Title'])
-                    if not service.slug:
-                        service.slug = slugify(service.title)
-                
-                if pd.notna(row.get('Slug')):
-                    service.slug = str(row['Slug'])
-                
-                if pd.notna(row.get('Category')):
-                    try:
-                        category = ServiceCategory.objects.get(name=str(row['Category']))
-                        service.category = category
-                    except ServiceCategory.DoesNotExist:
-                        errors.append(f"Row {index + 2}: Category '{row['Category']}' not found")
-                        continue
-                
-                if pd.notna(row.get('Short Description')):
-                    service.short_description = str(row['Short Description'])
-                
-                if pd.notna(row.get('Full Description')):
-                    service.full_description = str(row['Full Description'])
-                
-                # Handle Features field - convert comma-separated string to list
-                features_value = row.get('Features')
-                if pd.notna(features_value) and str(features_value).strip():
-                    features_str = str(features_value).strip()
-                    # Split by comma and strip whitespace from each feature
-                    service.features = [f.strip() for f in features_str.split(',') if f.strip()]
-                else:
-                    # Set default empty list if no features provided or if empty/blank
-                    service.features = []
-                
-                if pd.notna(row.get('Price')):
-                    try:
-                        service.price = float(row['Price'])
-                    except:
-                        pass
-                
-                if pd.notna(row.get('Price Unit')):
-                    service.price_unit = str(row['Price Unit'])
-                
-                if pd.notna(row.get('Duration')):
-                    service.duration = str(row['Duration'])
-                
-                if pd.notna(row.get('Icon')):
-                    service.icon = str(row['Icon'])
-                
-                if pd.notna(row.get('Status')):
-                    service.status = str(row['Status'])
-                
-                if pd.notna(row.get('Order')):
-                    service.order = int(row['Order'])
-                
-                if not service.created_by and user:
-                    service.created_by = user
-                
-                # Skip full_clean() to avoid features validation issue
-                # Validate essential fields manually
-                if not service.title:
-                    errors.append(f"Row {index + 2}: Title is required")
-                    continue
-                if not service.category:
-                    errors.append(f"Row {index + 2}: Category is required")  
-                    continue
-                if not service.short_description:
-                    errors.append(f"Row {index + 2}: Short description is required")
-                    continue
-                if not service.full_description:
-                    errors.append(f"Row {index + 2}: Full description is required")
-                    continue
-                
-                service.save()
-                
-            except Exception as e:
-                errors.append(f"Row {index + 2}: {str(e)}")
-        
-        return {
-            'created': created_count,
-            'updated': updated_count,
-            'errors': errors
-        }
-        
+        return import_services(df, user)
+
     except Exception as e:
         return {
             'created': 0,
             'updated': 0,
             'errors': [f"File processing error: {str(e)}"]
-        }
\ No newline at end of file
+        }
@@ -1,14 +1,15 @@
 from django.http import HttpResponse
 from django.contrib.admin.views.decorators import staff_member_required
-import pandas as pd
 from io import BytesIO
-import openpyxl
 
 
 @staff_member_required
 def download_template(request, model_type):
     """Download Excel template for importing data"""
-    
+    # Imported here so loading the URLconf does not load them
+    import openpyxl
+    import pandas as pd
+
     response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
     
     if model_type == 'category':
@@ -0,0 +1,261 @@
+"""
+Async variants of the read-only catalog routes, used under ASGI.
+
+With ``ASYNC_CATALOG_VIEWS`` on (``legal_backend/asgi.py`` turns it on),
+``services/urls.py`` wraps the category, service and testimonial routes so
+anonymous JSON GETs are answered on the event loop with the async ORM.
+Category and service routes carry the same ETag / Last-Modified validators
+as the DRF viewsets and answer conditional requests with 304. Everything
+else (writes, authenticated users, pagination, search, the browsable API,
+unsupported filters) goes to the unchanged DRF view in a thread, so
+responses match the sync path.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db.models import Prefetch
+from django.http import HttpResponse
+from django.urls import URLPattern
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.views.decorators.csrf import csrf_exempt
+from legal_backend.renderers import ORJSONRenderer
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .cache import catalog_cache_key, get_catalog_cache, get_catalog_version
+from .conditional import catalog_validators, set_validators
+from .fast_serializers import values_serializer_for
+from .models import Service, ServiceCategory, Testimonial
+from .serializers import (
+    ServiceCategorySerializer, ServiceDetailSerializer, ServiceListSerializer, TestimonialSerializer
+)
+
+
+PUBLIC_STATUSES = ['active', 'featured']
+JSON_MEDIA_TYPES = ('', '*/*', 'application/json', 'application/*')
+
+
+def serves_async(request, params):
+    """Anonymous JSON GET using only query ``params`` the async handler understands"""
+    if request.method not in ('GET', 'HEAD') or 'HTTP_AUTHORIZATION' in request.META:
+        return False
+    accept = [media.split(';')[0].strip() for media in request.META.get('HTTP_ACCEPT', '').split(',')]
+    if 'text/html' in accept or not any(media in JSON_MEDIA_TYPES for media in accept):
+        return False
+    return set(request.GET).issubset(params)
+
+
+def json_response(data, status=200):
+    response = HttpResponse(ORJSONRenderer().render(data), content_type='application/json', status=status)
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def not_found():
+    return json_response({'detail': 'Not found.'}, status=404)
+
+
+def serializer_context(request):
+    # Image URLs are made absolute from the request, as on the DRF path
+    return {'request': Request(request)}
+
+
+def accepted_media_type(request):
+    """The media type DRF's content negotiation picks; the ETag varies on it"""
+    renderers = [renderer_class() for renderer_class in api_settings.DEFAULT_RENDERER_CLASSES]
+    return DefaultContentNegotiation().select_renderer(Request(request), renderers)[1]
+
+
+async def fetch(queryset):
+    return [obj async for obj in queryset.aiterator()]
+
+
+async def fetch_serialized(serializer_class, queryset, context=None):
+    """List rows through the values() fast path, as the DRF list actions do"""
+    values_serializer = values_serializer_for(serializer_class)
+    rows = await fetch(queryset.values(*values_serializer.lookups))
+    return values_serializer.serialize(rows, context)
+
+
+async def cached(request, render):
+    """Serve from the catalog cache shared with ``cache_catalog_response``"""
+    cache = get_catalog_cache()
+    version = await sync_to_async(get_catalog_version)()
+    key = catalog_cache_key(request, version, media_type='application/json')
+    entry = await cache.aget(key)
+    if entry is not None:
+        content, content_type = entry
+        response = HttpResponse(content, content_type=content_type)
+        response['X-Catalog-Cache'] = 'HIT'
+    else:
+        response = await render()
+        if response is None or response.status_code != 200:
+            return response
+        await cache.aset(
+            key, (response.content, response['Content-Type']), getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300)
+        )
+        response['X-Catalog-Cache'] = 'MISS'
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+async def conditional(request, render):
+    """``conditional_get`` for a catalog route: 304 when the catalog validators match"""
+    etag, last_modified = await sync_to_async(catalog_validators)(
+        request, accepted_media_type(request), AnonymousUser()
+    )
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = await render()
+    else:
+        patch_vary_headers(response, ['Accept'])
+    return set_validators(response, etag, last_modified)
+
+
+async def category_list(request):
+    async def render():
+        categories = await fetch(ServiceCategory.objects.with_service_counts().order_by('order'))
+        return json_response(ServiceCategorySerializer(categories, many=True, context=serializer_context(request)).data)
+    return await conditional(request, lambda: cached(request, render))
+
+
+async def category_detail(request, pk):
+    if not pk.isdigit():
+        return None
+
+    async def render():
+        category = await ServiceCategory.objects.with_service_counts().filter(pk=pk).afirst()
+        if category is None:
+            return not_found()
+        return json_response(ServiceCategorySerializer(category, context=serializer_context(request)).data)
+    return await conditional(request, render)
+
+
+async def service_list(request):
+    filters = {'status__in': PUBLIC_STATUSES}
+    if 'category' in request.GET:
+        if not request.GET['category'].isdigit():
+            return None
+        filters['category_id'] = request.GET['category']
+    if 'status' in request.GET:
+        if request.GET['status'] not in dict(Service.STATUS_CHOICES):
+            return None
+        filters['status'] = request.GET['status']
+
+    async def render():
+        queryset = Service.objects.filter(**filters).order_by('order')
+        return json_response(await fetch_serialized(ServiceListSerializer, queryset, serializer_context(request)))
+    return await conditional(request, lambda: cached(request, render))
+
+
+async def service_featured(request):
+    async def render():
+        queryset = Service.objects.filter(status='featured')
+        return json_response(await fetch_serialized(ServiceListSerializer, queryset))
+    return await conditional(request, lambda: cached(request, render))
+
+
+async def service_by_category(request):
+    category_id = request.GET.get('category_id')
+    if category_id and not category_id.isdigit():
+        return None
+
+    async def render():
+        if not category_id:
+            return json_response({'error': 'category_id parameter is required'}, status=400)
+        queryset = Service.objects.filter(category_id=category_id, status__in=PUBLIC_STATUSES)
+        return json_response(await fetch_serialized(ServiceListSerializer, queryset))
+    return await conditional(request, lambda: cached(request, render))
+
+
+async def service_detail(request, slug):
+    queryset = Service.objects.filter(slug=slug, status__in=PUBLIC_STATUSES)
+
+    async def render():
+        service = await queryset.select_related('created_by').prefetch_related(
+            Prefetch('category', queryset=ServiceCategory.objects.with_service_counts())
+        ).with_top_testimonials().afirst()
+        if service is None:
+            return not_found()
+        return json_response(ServiceDetailSerializer(service, context=serializer_context(request)).data)
+    return await conditional(request, render)
+
+
+async def testimonial_list(request):
+    filters = {'is_active': True}
+    if 'service' in request.GET:
+        if not request.GET['service'].isdigit():
+            return None
+        filters['service_id'] = request.GET['service']
+    if 'is_featured' in request.GET:
+        if request.GET['is_featured'] not in ('true', 'false'):
+            return None
+        filters['is_featured'] = request.GET['is_featured'] == 'true'
+    queryset = Testimonial.objects.filter(**filters).order_by('-created_at')
+    return json_response(await fetch_serialized(TestimonialSerializer, queryset, serializer_context(request)))
+
+
+async def testimonial_featured(request):
+    queryset = Testimonial.objects.filter(is_active=True, is_featured=True)
+    return json_response(await fetch_serialized(TestimonialSerializer, queryset, serializer_context(request)))
+
+
+async def testimonial_detail(request, pk):
+    if not pk.isdigit():
+        return None
+    testimonial = await Testimonial.objects.select_related('service').filter(pk=pk, is_active=True).afirst()
+    if testimonial is None:
+        return not_found()
+    return json_response(TestimonialSerializer(testimonial, context=serializer_context(request)).data)
+
+
+# Router URL name -> (async handler, query parameters it understands)
+ASYNC_HANDLERS = {
+    'servicecategory-list': (category_list, ()),
+    'servicecategory-detail': (category_detail, ()),
+    'service-list': (service_list, ('category', 'status')),
+    'service-featured': (service_featured, ()),
+    'service-by-category': (service_by_category, ('category_id',)),
+    'service-detail': (service_detail, ()),
+    'testimonial-list': (testimonial_list, ('service', 'is_featured')),
+    'testimonial-featured': (testimonial_featured, ()),
+    'testimonial-detail': (testimonial_detail, ()),
+}
+
+
+def async_catalog_view(sync_view, handler, params):
+    """
+    Answer what ``handler`` supports on the event loop, the rest with ``sync_view``.
+
+    Handlers return None to hand a request they cannot reproduce exactly
+    (e.g. an invalid filter value DRF would reject) to the DRF view.
+    """
+    fallback = sync_to_async(sync_view)
+
+    # wraps() keeps the DRF view's cls/initkwargs for schema generation
+    @wraps(sync_view)
+    async def view(request, *args, **kwargs):
+        if serves_async(request, params):
+            response = await handler(request, *args, **kwargs)
+            if response is not None:
+                return response
+        return await fallback(request, *args, **kwargs)
+
+    return csrf_exempt(view)
+
+
+def async_catalog_urls(patterns):
+    """Wrap the catalog routes of ``router.urls``; format-suffix routes stay sync"""
+    wrapped = []
+    for pattern in patterns:
+        if pattern.name in ASYNC_HANDLERS and 'format' not in pattern.pattern.regex.groupindex:
+            handler, params = ASYNC_HANDLERS[pattern.name]
+            pattern = URLPattern(
+                pattern.pattern, async_catalog_view(pattern.callback, handler, params),
+                pattern.default_args, pattern.name,
+            )
+        wrapped.append(pattern)
+    return wrapped
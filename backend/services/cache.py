@@ -0,0 +1,96 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.http import HttpResponse
+from django.utils import timezone
+
+from .models import CatalogVersion
+
+
+# This process's copy of the CatalogVersion row: (read at, (version, changed_at))
+LOCAL_CATALOG_VERSION = {}
+
+
+def get_catalog_cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def get_catalog_state():
+    """
+    Return (version, unix time of the last change) from the CatalogVersion
+    row, re-read at most every CATALOG_VERSION_REFRESH_INTERVAL seconds.
+    """
+    now = time.monotonic()
+    local = LOCAL_CATALOG_VERSION.get('state')
+    if local and now - local[0] < getattr(settings, 'CATALOG_VERSION_REFRESH_INTERVAL', 1):
+        return local[1]
+    row, _ = CatalogVersion.objects.get_or_create(pk=1)
+    state = (row.version, row.changed_at.timestamp())
+    LOCAL_CATALOG_VERSION['state'] = (now, state)
+    return state
+
+
+def get_catalog_version():
+    return get_catalog_state()[0]
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog page, in every process, by moving to a new version"""
+    changed_at = timezone.now()
+    if not CatalogVersion.objects.filter(pk=1).update(version=F('version') + 1, changed_at=changed_at):
+        CatalogVersion.objects.get_or_create(pk=1, defaults={'changed_at': changed_at})
+    LOCAL_CATALOG_VERSION.clear()
+    return get_catalog_version()
+
+
+def catalog_cache_key(request, version, media_type=None):
+    # request.GET rather than query_params so the async views can share entries
+    params = sorted(
+        (key, value)
+        for key in request.GET
+        for value in request.GET.getlist(key)
+    )
+    digest = hashlib.md5(repr((request.path, params)).encode()).hexdigest()
+    return f'catalog:{version}:{media_type or request.accepted_media_type}:{digest}'
+
+
+def cache_catalog_response(view_method):
+    """
+    Serve a read-only catalog action from pre-rendered bytes.
+
+    Only JSON responses for non-staff users are cached; staff see inactive
+    records and the browsable API renders per-user forms.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if request.user.is_staff or request.accepted_renderer.format != 'json':
+            return view_method(self, request, *args, **kwargs)
+
+        cache = get_catalog_cache()
+        key = catalog_cache_key(request, get_catalog_version())
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response['X-Catalog-Cache'] = 'HIT'
+            return response
+
+        response = view_method(self, request, *args, **kwargs)
+        if response.status_code == 200:
+            response.accepted_renderer = request.accepted_renderer
+            response.accepted_media_type = request.accepted_media_type
+            response.renderer_context = self.get_renderer_context()
+            response.render()
+            cache.set(
+                key,
+                (response.content, response['Content-Type']),
+                getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300)
+            )
+            response['X-Catalog-Cache'] = 'MISS'
+        return response
+
+    return wrapper
@@ -0,0 +1,95 @@
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .cache import get_catalog_state
+
+
+class ConditionalGetMixin:
+    """
+    Compute ETag / Last-Modified validators for a viewset.
+
+    List routes use ``max(updated_at)`` and the row count of the filtered
+    queryset, detail routes use the ``updated_at`` of the looked-up row, both
+    from one aggregate query. Catalog viewsets use the catalog version
+    instead, which every catalog write bumps (nested category counts and
+    testimonials included) and every process reads from the same database
+    row, so a revalidation or cache hit costs no query.
+
+    Deleting a row does not move ``max(updated_at)``, so lists whose rows can
+    be deleted send only the ETag (which counts rows); the catalog version
+    dates deletes too.
+    """
+    conditional_uses_catalog_version = False
+
+    def get_validator_queryset(self):
+        queryset = self.get_queryset()
+        if self.action == 'list':
+            queryset = self.filter_queryset(queryset)
+        return queryset
+
+    def get_conditional_validators(self, request):
+        if self.conditional_uses_catalog_version:
+            return catalog_validators(request, request.accepted_media_type, request.user)
+        queryset = self.get_validator_queryset()
+        if self.detail:
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        state = queryset.order_by().aggregate(**VALIDATOR_AGGREGATES)
+        if self.detail and not state['count']:
+            return None, None
+        etag, last_modified = compute_validators(request, request.accepted_media_type, request.user, state)
+        if not self.detail and hasattr(self, 'destroy'):
+            last_modified = None
+        return etag, last_modified
+
+
+# One query gives both validators of a list or detail route
+VALIDATOR_AGGREGATES = {'last_modified': Max('updated_at'), 'count': Count('pk')}
+
+
+def request_parts(request, media_type, user):
+    return [request.path, request.META.get('QUERY_STRING', ''), media_type, user.pk, user.is_staff]
+
+
+def make_etag(parts):
+    return '"%s"' % hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def compute_validators(request, media_type, user, state):
+    """(ETag, Last-Modified) from an aggregate of VALIDATOR_AGGREGATES"""
+    last_modified = state['last_modified'].timestamp() if state['last_modified'] else None
+    etag = make_etag(request_parts(request, media_type, user) + [state['count'], last_modified])
+    return etag, int(last_modified) if last_modified else None
+
+
+def catalog_validators(request, media_type, user):
+    """(ETag, Last-Modified) of a catalog route; shared with services.async_views"""
+    version, changed_at = get_catalog_state()
+    etag = make_etag(request_parts(request, media_type, user) + [version])
+    return etag, int(changed_at) if changed_at else None
+
+
+def set_validators(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        if last_modified and not response.has_header('Last-Modified'):
+            response['Last-Modified'] = http_date(last_modified)
+        if etag:
+            response.headers.setdefault('ETag', etag)
+    return response
+
+
+def conditional_get(view_method):
+    """Answer If-None-Match / If-Modified-Since with 304 before the view serializes anything"""
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        etag, last_modified = self.get_conditional_validators(request)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = view_method(self, request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
+
+    return wrapper
@@ -0,0 +1,158 @@
+"""
+Read-only fast path for the hot list endpoints.
+
+``ValuesSerializer`` compiles a ``ModelSerializer`` once into a list of
+columns: the ``values()`` lookup each field reads and the function that
+turns the raw column into its representation. List actions then fetch
+plain dicts instead of model instances and skip DRF's per-field
+``get_attribute``/``to_representation`` dispatch, while producing the same
+JSON (a test compares both paths field by field).
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.functional import cached_property
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.response import Response
+
+from .images import srcset
+from .serializers import ImageSrcsetField
+
+
+SKIP = object()
+
+# DRF fields whose to_representation is the identity for the Python type the
+# database column already returns (str, int, bool)
+IDENTITY_FIELDS = (
+    serializers.CharField, serializers.IntegerField, serializers.BooleanField, serializers.ReadOnlyField,
+)
+
+
+class Column:
+    __slots__ = ('name', 'lookup', 'convert', 'relation', 'missing', 'url')
+
+    def __init__(self, name, lookup, convert=None, relation=None, missing=SKIP, url=None):
+        self.name = name
+        self.lookup = lookup
+        self.convert = convert
+        self.relation = relation
+        self.missing = missing
+        # Storage URL function for columns holding media file names
+        self.url = url
+
+
+class ValuesSerializer:
+    """Serialize ``queryset.values(*lookups)`` rows exactly as ``serializer_class`` serializes instances"""
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+
+    @cached_property
+    def columns(self):
+        serializer = self.serializer_class()
+        model = serializer.Meta.model
+        return [
+            self.compile_field(model, name, field)
+            for name, field in serializer.fields.items()
+            if not field.write_only
+        ]
+
+    @cached_property
+    def lookups(self):
+        lookups = []
+        for column in self.columns:
+            for lookup in (column.lookup, column.relation):
+                if lookup and lookup not in lookups:
+                    lookups.append(lookup)
+        return lookups
+
+    def compile_field(self, model, name, field):
+        if isinstance(field, (serializers.SerializerMethodField, serializers.BaseSerializer,
+                              serializers.ManyRelatedField)) or field.source == '*':
+            raise ImproperlyConfigured(f'{self.serializer_class.__name__}.{name} cannot be read from values()')
+
+        attrs = field.source_attrs
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+            # values('service') yields the primary key DRF renders
+            return Column(name, attrs[0])
+        if isinstance(field, serializers.FileField):
+            return Column(name, attrs[0], url=model._meta.get_field(attrs[0]).storage.url)
+        if isinstance(field, ImageSrcsetField):
+            return Column(name, attrs[0], srcset, url=model._meta.get_field(field.image_field).storage.url)
+
+        convert = None if isinstance(field, IDENTITY_FIELDS) else field.to_representation
+        if len(attrs) == 1:
+            return Column(name, attrs[0], convert)
+
+        # A dotted source ('service.title') through a nullable relation: DRF
+        # falls back to the default, None or omitting the key
+        if field.default is not empty:
+            missing = field.get_default()
+        elif field.allow_null:
+            missing = None
+        elif not field.required:
+            missing = SKIP
+        else:
+            raise ImproperlyConfigured(f'{self.serializer_class.__name__}.{name} has no value for missing relations')
+        relation = attrs[0] if model._meta.get_field(attrs[0]).null else None
+        return Column(name, '__'.join(attrs), convert, relation, missing)
+
+    def serialize(self, rows, context=None):
+        request = (context or {}).get('request')
+        columns = [
+            (column.name, column.lookup, self.converter(column, request), column.relation, column.missing)
+            for column in self.columns
+        ]
+        data = []
+        for row in rows:
+            item = {}
+            for name, lookup, convert, relation, missing in columns:
+                if relation is not None and row[relation] is None:
+                    if missing is SKIP:
+                        continue
+                    value = missing
+                else:
+                    value = row[lookup]
+                item[name] = value if value is None or convert is None else convert(value)
+            data.append(item)
+        return data
+
+    def converter(self, column, request):
+        if column.url is None:
+            return column.convert
+        url = column.url if request is None else lambda name: request.build_absolute_uri(column.url(name))
+        if column.convert is None:
+            # FileField.to_representation on a bare file name
+            return lambda name: url(name) if name else None
+        return lambda value: column.convert(value, url)
+
+
+VALUES_SERIALIZERS = {}
+
+
+def values_serializer_for(serializer_class):
+    if serializer_class not in VALUES_SERIALIZERS:
+        VALUES_SERIALIZERS[serializer_class] = ValuesSerializer(serializer_class)
+    return VALUES_SERIALIZERS[serializer_class]
+
+
+class ValuesListMixin:
+    """
+    List through ``values()`` and a compiled serializer for the serializer
+    classes in ``values_serializer_classes``. Search results, which carry
+    rank annotations, use the regular serializer.
+    """
+    values_serializer_classes = ()
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        queryset = self.filter_queryset(self.get_queryset())
+        if serializer_class not in self.values_serializer_classes or queryset.query.annotations:
+            return super().list(request, *args, **kwargs)
+
+        values_serializer = values_serializer_for(serializer_class)
+        queryset = queryset.values(*values_serializer.lookups)
+        context = self.get_serializer_context()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(values_serializer.serialize(page, context))
+        return Response(values_serializer.serialize(queryset, context))
@@ -0,0 +1,150 @@
+"""
+Responsive derivatives of uploaded catalog images.
+
+Saving a service or testimonial with a new image enqueues an
+``image_derivatives`` job; ``manage.py run_jobs`` resizes the original to
+``IMAGE_DERIVATIVE_WIDTHS`` in each of ``IMAGE_DERIVATIVE_FORMATS`` and
+stores the files next to it (``services/photo.640w.webp``). The names are
+recorded on the row as ``{'source': <original>, <format>: {<width>: <name>}}``
+and the serializers expose them as ``srcset`` strings. Replacing or
+clearing the image resets the map, and deletes the old files once the
+change commits, until the job has run again.
+"""
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from .models import Service, Testimonial
+
+
+# model -> (image field, derivatives field)
+IMAGE_FIELDS = {
+    Service: ('image', 'image_derivatives'),
+    Testimonial: ('client_image', 'client_image_derivatives'),
+}
+
+FORMATS = {
+    # format: (Pillow format, extension, save options)
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def derivative_formats():
+    formats = getattr(settings, 'IMAGE_DERIVATIVE_FORMATS', ['webp', 'jpeg'])
+    return [name for name in formats if name != 'webp' or features.check('webp')]
+
+
+def derivative_widths(width):
+    """The configured widths, capped at the original's so images are never upscaled"""
+    return sorted({min(target, width) for target in getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', [320, 640, 1280])})
+
+
+def reset_stale_derivatives(instance):
+    """Drop the derivatives of a replaced or cleared image; called before every save"""
+    image_field, derivatives_field = IMAGE_FIELDS[type(instance)]
+    derivatives = getattr(instance, derivatives_field)
+    if derivatives and derivatives.get('source') != getattr(instance, image_field).name:
+        setattr(instance, derivatives_field, {})
+        storage = getattr(instance, image_field).storage
+        # A rolled-back save keeps the old image, and with it these files
+        transaction.on_commit(lambda: delete_derivatives(storage, derivatives))
+
+
+def delete_derivatives(storage, derivatives):
+    for format_name in FORMATS:
+        for name in derivatives.get(format_name, {}).values():
+            storage.delete(name)
+
+
+def needs_derivatives(instance):
+    image_field, derivatives_field = IMAGE_FIELDS[type(instance)]
+    return bool(getattr(instance, image_field)) and not getattr(instance, derivatives_field)
+
+
+def render_derivative(image, width, format_name):
+    pillow_format, _, options = FORMATS[format_name]
+    if image.width != width:
+        image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+    if pillow_format == 'JPEG' and image.mode != 'RGB':
+        # JPEG has no alpha channel; flatten transparent images onto white
+        background = Image.new('RGB', image.size, 'white')
+        rgba = image.convert('RGBA')
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        image = background
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+    output = BytesIO()
+    image.save(output, pillow_format, **options)
+    return output.getvalue()
+
+
+def generate_derivatives(field_file):
+    """Write every derivative of ``field_file`` next to it and return the derivatives map"""
+    storage = field_file.storage
+    with field_file.open('rb') as file:
+        image = Image.open(file)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+
+    base = posixpath.splitext(field_file.name)[0]
+    derivatives = {'source': field_file.name}
+    for format_name in derivative_formats():
+        extension = FORMATS[format_name][1]
+        derivatives[format_name] = {}
+        for width in derivative_widths(image.width):
+            name = f'{base}.{width}w.{extension}'
+            # Regenerating replaces the file rather than saving under a new suffix
+            if storage.exists(name):
+                storage.delete(name)
+            derivatives[format_name][str(width)] = storage.save(
+                name, ContentFile(render_derivative(image, width, format_name))
+            )
+    return derivatives
+
+
+def update_derivatives(instance, invalidate=True):
+    """
+    Generate and record the derivatives of ``instance``'s current image.
+
+    The map is written with ``QuerySet.update``, which sends no save
+    signals; with ``invalidate`` the catalog cache and snapshot are
+    refreshed here, otherwise the caller does it once with
+    ``snapshot.invalidate_catalog`` after a batch.
+    """
+    model = type(instance)
+    image_field, derivatives_field = IMAGE_FIELDS[model]
+    field_file = getattr(instance, image_field)
+    if not field_file:
+        return None
+    derivatives = generate_derivatives(field_file)
+    changes = {derivatives_field: derivatives}
+    if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+        changes['updated_at'] = timezone.now()
+    if not model.objects.filter(pk=instance.pk, **{image_field: field_file.name}).update(**changes):
+        # Replaced or deleted meanwhile; the save that replaced it queued a new job
+        delete_derivatives(field_file.storage, derivatives)
+        return None
+    for name, value in changes.items():
+        setattr(instance, name, value)
+    if invalidate:
+        # The snapshot renders through the serializers, which import this module
+        from .snapshot import invalidate_catalog
+        invalidate_catalog([model])
+    return derivatives
+
+
+def srcset(derivatives, url):
+    """``{format: 'url 320w, url 640w'}`` from a derivatives map and a name -> URL function"""
+    return {
+        format_name: ', '.join(
+            f'{url(derivatives[format_name][width])} {width}w'
+            for width in sorted(derivatives[format_name], key=int)
+        )
+        for format_name in FORMATS if derivatives.get(format_name)
+    }
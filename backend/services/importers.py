@@ -0,0 +1,305 @@
+"""
+Set-based import engine for the admin Excel importers.
+
+Each import resolves every referenced ID, category name and slug with one
+query per kind, cleans whole columns with pandas, then writes the result
+with chunked bulk inserts and updates inside a single transaction.
+"""
+from decimal import Decimal
+
+import pandas as pd
+from django.db import connections, router, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .models import ServiceCategory, Service
+from .snapshot import invalidate_catalog
+
+
+IMPORT_CHUNK_SIZE = 500
+
+# Values an IntegerField / BigAutoField column can hold on every supported database
+INTEGER_RANGE = (-2 ** 31, 2 ** 31 - 1)
+BIG_INTEGER_RANGE = (-2 ** 63, 2 ** 63 - 1)
+
+
+class RowErrors:
+    """Collect per-row error messages keyed by DataFrame index"""
+
+    def __init__(self):
+        self.messages = {}
+
+    def add(self, index, message):
+        self.messages.setdefault(index, []).append(message)
+
+    def add_mask(self, mask, message):
+        for index in mask[mask].index:
+            self.add(index, message)
+
+    def __contains__(self, index):
+        return index in self.messages
+
+    def as_list(self):
+        return [
+            f"Row {index + 2}: {message}"
+            for index in sorted(self.messages)
+            for message in self.messages[index]
+        ]
+
+
+def empty_column(df):
+    return pd.Series([None] * len(df), index=df.index, dtype=object)
+
+
+def text_column(df, column, errors=None, max_length=None):
+    """String values for a column, with None where the cell is empty"""
+    values = empty_column(df)
+    if column in df:
+        present = df[column].notna()
+        values[present] = df.loc[present, column].astype(str)
+        if errors is not None and max_length:
+            too_long = values[present].str.len() > max_length
+            errors.add_mask(too_long, f"{column} must be at most {max_length} characters")
+    return values
+
+
+def integer_column(df, column, errors, value_range=INTEGER_RANGE):
+    """Integer values for a column, with None where the cell is empty, invalid or out of range"""
+    values = empty_column(df)
+    if column in df:
+        present = df[column].notna()
+        numbers = pd.to_numeric(df[column], errors='coerce')
+        errors.add_mask(present & numbers.isna(), f"{column} must be a number")
+        # astype('int64') would silently truncate 2.7 to 2
+        fractional = numbers.notna() & (numbers % 1 != 0)
+        errors.add_mask(fractional, f"{column} must be a whole number")
+        # One out-of-range value would abort the whole bulk write; compare with
+        # high + 1, which float64 holds exactly, where high itself may round up
+        low, high = value_range
+        out_of_range = numbers.notna() & ~fractional & ((numbers < low) | (numbers >= high + 1))
+        errors.add_mask(out_of_range, f"{column} must be between {low} and {high}")
+        valid = present & numbers.notna() & ~fractional & ~out_of_range
+        values[valid] = numbers[valid].astype('int64').astype(object)
+    return values
+
+
+def decimal_column(df, column, errors, max_digits, decimal_places):
+    """
+    Decimal values for a column, rounded to ``decimal_places``; unparseable
+    cells are ignored like empty ones, values too large for ``max_digits``
+    are row errors.
+    """
+    values = empty_column(df)
+    if column in df:
+        numbers = pd.to_numeric(df[column], errors='coerce').round(decimal_places)
+        too_large = numbers.abs() >= 10 ** (max_digits - decimal_places)
+        errors.add_mask(
+            too_large, f"{column} must have at most {max_digits - decimal_places} digits before the decimal point"
+        )
+        valid = numbers.notna() & ~too_large
+        values[valid] = numbers[valid].map(lambda number: Decimal(str(number)))
+    return values
+
+
+def features_column(df, column):
+    """Comma-separated features as lists; blank cells become an empty list"""
+    if column not in df:
+        return pd.Series([[] for _ in df.index], index=df.index, dtype=object)
+    text = df[column].where(df[column].notna(), '').astype(str).str.split(',')
+    return text.map(lambda items: [item.strip() for item in items if item.strip()])
+
+
+def bulk_update_rows(model, objs, field_names, chunk_size):
+    """
+    UPDATE rows by primary key with one executemany() per chunk.
+
+    QuerySet.bulk_update() builds a CASE expression per field and row, which
+    dominates import time on large sheets; a parameterised UPDATE does not.
+    """
+    connection = connections[router.db_for_write(model)]
+    fields = [model._meta.get_field(name) for name in field_names]
+    sql = 'UPDATE %s SET %s WHERE %s = %%s' % (
+        connection.ops.quote_name(model._meta.db_table),
+        ', '.join('%s = %%s' % connection.ops.quote_name(field.column) for field in fields),
+        connection.ops.quote_name(model._meta.pk.column),
+    )
+    with connection.cursor() as cursor:
+        for start in range(0, len(objs), chunk_size):
+            cursor.executemany(sql, [
+                [field.get_db_prep_save(getattr(obj, field.attname), connection) for field in fields] + [obj.pk]
+                for obj in objs[start:start + chunk_size]
+            ])
+
+
+def write_in_bulk(model, to_create, to_update, update_fields, chunk_size):
+    now = timezone.now()
+    for obj in to_update:
+        obj.updated_at = now
+    with transaction.atomic():
+        model.objects.bulk_create(to_create, batch_size=chunk_size)
+        bulk_update_rows(model, to_update, update_fields + ['updated_at'], chunk_size)
+        # Bulk writes skip post_save, so invalidate the catalog cache explicitly
+        invalidate_catalog([model])
+
+
+def import_service_categories(df, user=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """Create or update ServiceCategory rows from a 'Service Categories' sheet"""
+    errors = RowErrors()
+    ids = integer_column(df, 'ID', errors, BIG_INTEGER_RANGE)
+    names = text_column(df, 'Name', errors, max_length=100)
+    descriptions = text_column(df, 'Description')
+    icons = text_column(df, 'Icon', errors, max_length=50)
+    orders = integer_column(df, 'Order', errors)
+
+    existing = ServiceCategory.objects.in_bulk(ids.dropna().unique().tolist())
+    name_owners = dict(
+        ServiceCategory.objects.filter(name__in=names.dropna().unique().tolist()).values_list('name', 'id')
+    )
+
+    to_create, to_update = [], {}
+    claimed_names = {}
+    for index, category_id, name, description, icon, order in zip(
+        df.index, ids, names, descriptions, icons, orders
+    ):
+        if index in errors:
+            continue
+
+        category = existing.get(category_id) or ServiceCategory()
+        if name is not None:
+            category.name = name
+        if description is not None:
+            category.description = description
+        if icon is not None:
+            category.icon = icon
+        if order is not None:
+            category.order = order
+
+        if not category.name:
+            errors.add(index, "Name is required")
+            continue
+        owner = claimed_names.get(category.name, name_owners.get(category.name))
+        if owner is not None and owner is not category and owner != category.pk:
+            errors.add(index, f"Service category with name '{category.name}' already exists")
+            continue
+        claimed_names[category.name] = category.pk or category
+
+        if category.pk:
+            to_update[category.pk] = category
+        else:
+            to_create.append(category)
+
+    write_in_bulk(
+        ServiceCategory, to_create, list(to_update.values()),
+        ['name', 'description', 'icon', 'order'], chunk_size
+    )
+    return {
+        'created': len(to_create),
+        'updated': len(to_update),
+        'errors': errors.as_list(),
+    }
+
+
+def import_services(df, user=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """Create or update Service rows from a 'Services' sheet"""
+    errors = RowErrors()
+    ids = integer_column(df, 'ID', errors, BIG_INTEGER_RANGE)
+    titles = text_column(df, 'Title', errors, max_length=200)
+    slugs = text_column(df, 'Slug', errors, max_length=50)
+    category_names = text_column(df, 'Category')
+    short_descriptions = text_column(df, 'Short Description', errors, max_length=500)
+    full_descriptions = text_column(df, 'Full Description')
+    features = features_column(df, 'Features')
+    prices = decimal_column(df, 'Price', errors, max_digits=10, decimal_places=2)
+    price_units = text_column(df, 'Price Unit', errors, max_length=50)
+    durations = text_column(df, 'Duration', errors, max_length=100)
+    icons = text_column(df, 'Icon', errors, max_length=50)
+    statuses = text_column(df, 'Status', errors, max_length=20)
+    orders = integer_column(df, 'Order', errors)
+
+    existing = Service.objects.in_bulk(ids.dropna().unique().tolist())
+    categories = dict(
+        ServiceCategory.objects.filter(name__in=category_names.dropna().unique().tolist()).values_list('name', 'id')
+    )
+    candidate_slugs = set(slugs.dropna()) | {slugify(title) for title in titles.dropna()}
+    slug_owners = dict(Service.objects.filter(slug__in=candidate_slugs).values_list('slug', 'id'))
+
+    to_create, to_update = [], {}
+    claimed_slugs = {}
+    for row in zip(
+        df.index, ids, titles, slugs, category_names, short_descriptions, full_descriptions,
+        features, prices, price_units, durations, icons, statuses, orders
+    ):
+        (index, service_id, title, slug, category_name, short_description, full_description,
+         service_features, price, price_unit, duration, icon, status, order) = row
+        if index in errors:
+            continue
+
+        service = existing.get(service_id) or Service()
+        if title is not None:
+            service.title = title
+            if not service.slug and slug is None:
+                service.slug = slugify(title)
+                if len(service.slug) > 50:
+                    errors.add(index, "Slug derived from Title must be at most 50 characters; fill in Slug")
+                    continue
+        if slug is not None:
+            service.slug = slug
+        if category_name is not None:
+            if category_name not in categories:
+                errors.add(index, f"Category '{category_name}' not found")
+                continue
+            service.category_id = categories[category_name]
+        if short_description is not None:
+            service.short_description = short_description
+        if full_description is not None:
+            service.full_description = full_description
+        service.features = service_features
+        if price is not None:
+            service.price = price
+        if price_unit is not None:
+            service.price_unit = price_unit
+        if duration is not None:
+            service.duration = duration
+        if icon is not None:
+            service.icon = icon
+        if status is not None:
+            service.status = status
+        if order is not None:
+            service.order = order
+        if not service.created_by_id and user:
+            service.created_by = user
+
+        if not service.title:
+            errors.add(index, "Title is required")
+            continue
+        if not service.category_id:
+            errors.add(index, "Category is required")
+            continue
+        if not service.short_description:
+            errors.add(index, "Short description is required")
+            continue
+        if not service.full_description:
+            errors.add(index, "Full description is required")
+            continue
+        owner = claimed_slugs.get(service.slug, slug_owners.get(service.slug))
+        if owner is not None and owner is not service and owner != service.pk:
+            errors.add(index, f"Service with slug '{service.slug}' already exists")
+            continue
+        claimed_slugs[service.slug] = service.pk or service
+
+        if service.pk:
+            to_update[service.pk] = service
+        else:
+            to_create.append(service)
+
+    write_in_bulk(
+        Service, to_create, list(to_update.values()),
+        ['title', 'slug', 'category', 'short_description', 'full_description', 'features',
+         'price', 'price_unit', 'duration', 'icon', 'status', 'order', 'created_by'],
+        chunk_size
+    )
+    return {
+        'created': len(to_create),
+        'updated': len(to_update),
+        'errors': errors.as_list(),
+    }
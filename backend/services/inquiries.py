@@ -0,0 +1,32 @@
+"""
+Set-based triage of service inquiries.
+
+Both the ``/api/inquiries/bulk_update/`` endpoint and the admin changelist's
+``list_editable`` save apply status/notes/assignee changes with one
+``UPDATE ... WHERE id IN (...)`` per distinct set of values, instead of
+loading and saving every row.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ServiceInquiry
+
+
+def bulk_update_inquiries(queryset, **changes):
+    """Apply ``changes`` to every inquiry in ``queryset`` with one UPDATE and return the row count"""
+    # update() bypasses auto_now; the ETag validators read updated_at
+    return queryset.order_by().update(updated_at=timezone.now(), **changes)
+
+
+def apply_inquiry_changes(changes):
+    """Apply per-row ``{pk: {field: value}}`` changes, one UPDATE per distinct set of values"""
+    groups = defaultdict(list)
+    for pk, fields in changes.items():
+        groups[tuple(sorted(fields.items()))].append(pk)
+    with transaction.atomic():
+        return sum(
+            bulk_update_inquiries(ServiceInquiry.objects.filter(pk__in=pks), **dict(fields))
+            for fields, pks in groups.items()
+        )
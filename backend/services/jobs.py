@@ -0,0 +1,181 @@
+"""
+Database-backed background jobs for the admin Excel imports and exports,
+for resizing uploaded images and for rebuilding the catalog snapshot.
+
+The admin enqueues a Job row and returns immediately; ``manage.py run_jobs``
+claims pending rows and runs them in a process pool, recording progress,
+a summary and an optional result file on the row.
+"""
+import logging
+import traceback
+from datetime import datetime, timedelta
+from tempfile import SpooledTemporaryFile
+
+from django.apps import apps
+from django.core.files import File
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+
+from .models import Job, Service, ServiceCategory
+
+
+logger = logging.getLogger(__name__)
+
+JOB_HANDLERS = {}
+RESULT_SPOOL_SIZE = 10 * 1024 * 1024
+
+
+def job_handler(kind):
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
+
+
+def enqueue_job(kind, user=None, payload=None, input_file=None):
+    """Create a pending job; the uploaded file, if any, is stored with it"""
+    job = Job(kind=kind, created_by=user, payload=payload or {})
+    if input_file is not None:
+        job.input_file.save(input_file.name, input_file, save=False)
+    job.save()
+    return job
+
+
+def set_progress(job, percent):
+    job.progress = max(0, min(100, int(percent)))
+    Job.objects.filter(pk=job.pk).update(progress=job.progress)
+
+
+def row_progress(job):
+    """Progress callback for writers that report (rows_done, rows_total)"""
+    def progress(done, total):
+        if total:
+            set_progress(job, done * 100 / total)
+    return progress
+
+
+def claim_pending_jobs(limit):
+    """Atomically move up to ``limit`` pending jobs to running and return their ids"""
+    claimed = []
+    for job_id in Job.objects.filter(status='pending').order_by('created_at').values_list('pk', flat=True)[:limit]:
+        if Job.objects.filter(pk=job_id, status='pending').update(status='running', started_at=timezone.now()):
+            claimed.append(job_id)
+    return claimed
+
+
+def requeue_stale_jobs(stale_after):
+    """Return jobs a dead worker left 'running' for longer than ``stale_after`` seconds to pending"""
+    return Job.objects.filter(
+        status='running', started_at__lt=timezone.now() - timedelta(seconds=stale_after)
+    ).update(status='pending', started_at=None, progress=0)
+
+
+def fail_job(job_id, error):
+    """Mark a running job failed from outside the worker that ran it"""
+    Job.objects.filter(pk=job_id, status='running').update(
+        status='failed', error=error, finished_at=timezone.now()
+    )
+
+
+def run_job(job_id):
+    """Run one job to completion; called inside run_jobs worker processes"""
+    job = Job.objects.get(pk=job_id)
+    if job.status == 'pending':
+        job.status = 'running'
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at'])
+
+    try:
+        job.result = JOB_HANDLERS[job.kind](job) or {}
+        job.status = 'completed'
+        job.progress = 100
+    except Exception:
+        logger.exception("Job %s failed", job.pk)
+        job.status = 'failed'
+        job.error = traceback.format_exc()
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'progress', 'result', 'result_file', 'error', 'finished_at'])
+    return job.status
+
+
+def import_job(job, importer):
+    with job.input_file.open('rb') as file:
+        result = importer(file, job.created_by)
+    if result['errors'] and not (result['created'] or result['updated']):
+        job.error = '\n'.join(result['errors'])
+    return result
+
+
+def export_queryset(job, model):
+    """
+    The rows an export job covers: the selected ids, or every row of the
+    changelist it was queued from. The ModelAdmin rebuilds that changelist
+    for the user who queued the job, so filters, search, ordering and lookup
+    checks are exactly the admin's.
+    """
+    if 'query' not in job.payload:
+        return model.objects.filter(pk__in=job.payload.get('ids', []))
+    from django.contrib import admin
+
+    if job.created_by is None:
+        raise ValueError("The user who queued this export no longer exists")
+    request = HttpRequest()
+    request.method = 'GET'
+    request.GET = QueryDict(job.payload['query'])
+    request.user = job.created_by
+    return admin.site.get_model_admin(model).get_changelist_instance(request).get_queryset(request)
+
+
+def export_job(job, writer, queryset, filename):
+    with SpooledTemporaryFile(max_size=RESULT_SPOOL_SIZE) as output:
+        rows = writer(queryset, output, progress=row_progress(job))
+        output.seek(0)
+        job.result_file.save(
+            f'{filename}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx', File(output), save=False
+        )
+    return {'rows': rows}
+
+
+@job_handler('import_service_categories')
+def import_service_categories_job(job):
+    from .admin_excel import import_service_categories_excel
+    return import_job(job, import_service_categories_excel)
+
+
+@job_handler('import_services')
+def import_services_job(job):
+    from .admin_excel import import_services_excel
+    return import_job(job, import_services_excel)
+
+
+@job_handler('export_service_categories')
+def export_service_categories_job(job):
+    from .admin_excel import write_service_categories_excel
+    queryset = export_queryset(job, ServiceCategory)
+    return export_job(job, write_service_categories_excel, queryset, 'service_categories')
+
+
+@job_handler('export_services')
+def export_services_job(job):
+    from .admin_excel import write_services_excel
+    queryset = export_queryset(job, Service)
+    return export_job(job, write_services_excel, queryset, 'services')
+
+
+@job_handler('image_derivatives')
+def image_derivatives_job(job):
+    from .images import FORMATS, update_derivatives
+    instance = apps.get_model(job.payload['model']).objects.filter(pk=job.payload['pk']).first()
+    derivatives = update_derivatives(instance) if instance is not None else None
+    if derivatives is None:
+        return {'skipped': 'image removed or replaced'}
+    return {
+        'source': derivatives['source'],
+        'files': sum(len(derivatives[name]) for name in FORMATS if name in derivatives),
+    }
+
+
+@job_handler('catalog_snapshot')
+def catalog_snapshot_job(job):
+    from .snapshot import SECTIONS, build_catalog_snapshot
+    return build_catalog_snapshot(job.payload.get('sections', SECTIONS))
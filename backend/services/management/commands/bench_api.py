@@ -0,0 +1,297 @@
+import json
+import math
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from services.models import Service, ServiceCategory, ServiceInquiry, Testimonial
+
+
+BENCH_PASSWORD = 'bench-password-123'
+
+# (role, method, path template, body) for every route in services/urls.py and
+# authentication/urls.py. Templates are filled from fixtures() and name the
+# route in the report, so reports from different catalogs stay comparable.
+ROUTES = [
+    ('anonymous', 'GET', '/api/categories/', None),
+    ('anonymous', 'GET', '/api/categories/{category_id}/', None),
+    ('anonymous', 'GET', '/api/services/', None),
+    ('anonymous', 'GET', '/api/services/?page_size=20', None),
+    ('anonymous', 'GET', '/api/services/?search=law', None),
+    ('anonymous', 'GET', '/api/services/{service_slug}/', None),
+    ('anonymous', 'GET', '/api/services/featured/', None),
+    ('anonymous', 'GET', '/api/services/by_category/?category_id={category_id}', None),
+    ('anonymous', 'GET', '/api/testimonials/', None),
+    ('anonymous', 'GET', '/api/testimonials/{testimonial_id}/', None),
+    ('anonymous', 'GET', '/api/testimonials/featured/', None),
+    ('client', 'GET', '/api/inquiries/', None),
+    ('client', 'GET', '/api/auth/profile/', None),
+    ('staff', 'GET', '/api/inquiries/?page_size=20', None),
+    ('staff', 'GET', '/api/inquiries/{inquiry_id}/', None),
+    ('anonymous', 'POST', '/api/inquiries/', lambda f, i: {
+        'service': f['service_id'], 'name': 'Bench Client', 'email': 'bench@example.com',
+        'phone': '+8801700000000', 'message': 'Benchmark inquiry',
+    }),
+    ('staff', 'PATCH', '/api/inquiries/{inquiry_id}/update_status/', lambda f, i: {'status': 'contacted'}),
+    ('staff', 'PATCH', '/api/services/{service_slug}/', lambda f, i: {'order': i}),
+    ('staff', 'POST', '/api/testimonials/', lambda f, i: {
+        'service': f['service_id'], 'client_name': 'Bench Client', 'content': 'Benchmark testimonial',
+    }),
+    ('anonymous', 'POST', '/api/auth/register/', lambda f, i: {
+        'username': f'bench-{uuid.uuid4().hex[:12]}', 'email': 'bench@example.com',
+        'password': BENCH_PASSWORD, 'password_confirm': BENCH_PASSWORD,
+    }),
+    ('anonymous', 'POST', '/api/auth/login/', lambda f, i: {
+        'username': f['client'].username, 'password': BENCH_PASSWORD,
+    }),
+    ('anonymous', 'POST', '/api/auth/refresh/', lambda f, i: {'refresh': str(RefreshToken.for_user(f['client']))}),
+    # Logging out revokes the token, so every request logs in a new session
+    ('session', 'POST', '/api/auth/logout/', lambda f, i: {'refresh': str(RefreshToken.for_user(f['client']))}),
+    ('client', 'PATCH', '/api/auth/profile/', lambda f, i: {'first_name': f'Bench {i}'}),
+    ('client', 'PUT', '/api/auth/change-password/', lambda f, i: {
+        'old_password': BENCH_PASSWORD, 'new_password': BENCH_PASSWORD, 'confirm_password': BENCH_PASSWORD,
+    }),
+]
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1))]
+
+
+@contextmanager
+def serve(app, workers, extra_args=(), env=None):
+    """Run gunicorn on a free local port for the duration of the block; yields the base URL"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    base_url = f'http://127.0.0.1:{port}'
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', app, '--bind', f'127.0.0.1:{port}',
+         '--workers', str(workers), '--log-level', 'warning', *extra_args],
+        cwd=settings.BASE_DIR, env={**os.environ, **(env or {})},
+    )
+    try:
+        wait_for(f'{base_url}/api/health/', process)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def wait_for(url, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError('gunicorn exited during startup')
+        try:
+            urlopen(url, timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f'gunicorn did not answer {url} within {timeout}s')
+
+
+def fetch(request):
+    try:
+        with urlopen(request, timeout=30) as response:
+            return response.status, len(response.read())
+    except HTTPError as e:
+        return e.code, len(e.read())
+
+
+def summarize(method, path, timings, statuses, sizes, queries=None):
+    milliseconds = [timing * 1000 for timing in timings]
+    return {
+        'method': method,
+        'path': path,
+        'status': sorted(set(statuses)),
+        'p50_ms': round(percentile(milliseconds, 50), 3),
+        'p95_ms': round(percentile(milliseconds, 95), 3),
+        'p99_ms': round(percentile(milliseconds, 99), 3),
+        'mean_ms': round(statistics.fmean(milliseconds), 3),
+        'bytes': int(statistics.median(sizes)),
+        'queries': int(statistics.median(queries)) if queries else None,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark every API route through the Django test client (writes are rolled back) '
+        'and optionally the read routes through a local gunicorn; writes a JSON report'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Timed requests per route')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per route')
+        parser.add_argument('--cold-cache', action='store_true', help='Clear the cache before every request')
+        parser.add_argument('--gunicorn', action='store_true', help='Also benchmark GET routes through gunicorn')
+        parser.add_argument('--gunicorn-workers', type=int, default=2)
+        parser.add_argument('--route', action='append', default=[], help='Only routes containing this text')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+        parser.add_argument('--baseline', help='Compare against a previous JSON report')
+
+    def handle(self, *args, **options):
+        if not Service.objects.filter(status='active').exists() or not Testimonial.objects.exists():
+            raise CommandError('The catalog is empty; run `manage.py seed_catalog` first')
+
+        self.options = options
+        fixtures = self.fixtures()
+        routes = [
+            route for route in ROUTES
+            if not options['route'] or any(text in f'{route[1]} {route[2]}' for text in options['route'])
+        ]
+
+        report = {'meta': self.meta(options), 'test_client': self.run_test_client(routes, fixtures)}
+        if options['gunicorn']:
+            report['gunicorn'] = self.run_gunicorn([route for route in routes if route[1] == 'GET'], fixtures)
+
+        self.print_report(report)
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                self.print_comparison(json.load(file), report)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2, sort_keys=True)
+                file.write('\n')
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def fixtures(self):
+        # The bench users are committed so a separate gunicorn process can authenticate them
+        staff, _ = User.objects.update_or_create(username='bench-staff', defaults={'is_staff': True})
+        client, _ = User.objects.update_or_create(
+            username='bench-client', defaults={'email': 'client1@example.com'}
+        )
+        for user in (staff, client):
+            user.set_password(BENCH_PASSWORD)
+            user.save(update_fields=['password'])
+
+        service = Service.objects.filter(status='active', testimonials__is_active=True).first()
+        return {
+            'staff': staff,
+            'client': client,
+            'service_id': service.pk,
+            'service_slug': service.slug,
+            'category_id': service.category_id,
+            'testimonial_id': Testimonial.objects.filter(is_active=True).values_list('pk', flat=True).first(),
+            'inquiry_id': ServiceInquiry.objects.values_list('pk', flat=True).first(),
+            'tokens': {
+                'staff': str(RefreshToken.for_user(staff).access_token),
+                'client': str(RefreshToken.for_user(client).access_token),
+                'session': lambda: str(RefreshToken.for_user(client).access_token),
+            },
+        }
+
+    def meta(self, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=10
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            commit = None
+        return {
+            'commit': commit,
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'database': connection.vendor,
+            'requests_per_route': options['requests'],
+            'cold_cache': options['cold_cache'],
+            'catalog': {
+                'categories': ServiceCategory.objects.count(),
+                'services': Service.objects.count(),
+                'testimonials': Testimonial.objects.count(),
+                'inquiries': ServiceInquiry.objects.count(),
+            },
+        }
+
+    def run_test_client(self, routes, fixtures):
+        results = {}
+        # Repeated registrations and inquiries would otherwise be measured as 429s
+        with transaction.atomic(), override_settings(THROTTLE_ENABLED=False):
+            for role, method, template, body in routes:
+                api = APIClient()
+                path = template.format(**fixtures)
+                call = getattr(api, method.lower())
+
+                timings, statuses, sizes, queries = [], [], [], []
+                for i in range(self.options['warmup'] + self.options['requests']):
+                    data = body(fixtures, i) if body else None
+                    if role != 'anonymous':
+                        token = fixtures['tokens'][role]
+                        api.credentials(HTTP_AUTHORIZATION=f"Bearer {token() if callable(token) else token}")
+                    if self.options['cold_cache']:
+                        cache.clear()
+                    with CaptureQueriesContext(connection) as context:
+                        start = time.perf_counter()
+                        response = call(path, data, format='json') if data is not None else call(path)
+                        elapsed = time.perf_counter() - start
+                    if i < self.options['warmup']:
+                        continue
+                    timings.append(elapsed)
+                    statuses.append(response.status_code)
+                    sizes.append(len(response.content))
+                    queries.append(len(context.captured_queries))
+                results[f'{role} {method} {template}'] = summarize(method, path, timings, statuses, sizes, queries)
+            transaction.set_rollback(True)
+        return results
+
+    def run_gunicorn(self, routes, fixtures):
+        with serve('legal_backend.wsgi:application', self.options['gunicorn_workers']) as base_url:
+            results = {}
+            for role, method, template, body in routes:
+                path = template.format(**fixtures)
+                headers = {} if role == 'anonymous' else {'Authorization': f"Bearer {fixtures['tokens'][role]}"}
+                timings, statuses, sizes = [], [], []
+                for i in range(self.options['warmup'] + self.options['requests']):
+                    start = time.perf_counter()
+                    status, size = fetch(Request(base_url + path, headers=headers))
+                    elapsed = time.perf_counter() - start
+                    if i >= self.options['warmup']:
+                        timings.append(elapsed)
+                        statuses.append(status)
+                        sizes.append(size)
+                results[f'{role} {method} {template}'] = summarize(method, path, timings, statuses, sizes)
+            return results
+
+    def print_report(self, report):
+        for mode in ('test_client', 'gunicorn'):
+            if mode not in report:
+                continue
+            self.stdout.write(f"\n{mode}")
+            self.stdout.write(f"{'route':<72} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>7} {'bytes':>8}")
+            for name, stats in report[mode].items():
+                queries = '-' if stats['queries'] is None else stats['queries']
+                self.stdout.write(
+                    f"{name:<72} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} "
+                    f"{queries:>7} {stats['bytes']:>8}"
+                )
+
+    def print_comparison(self, baseline, report):
+        self.stdout.write(f"\nChange against {baseline['meta'].get('commit') or 'baseline'} (p95, queries)")
+        for mode in ('test_client', 'gunicorn'):
+            for name, stats in report.get(mode, {}).items():
+                before = baseline.get(mode, {}).get(name)
+                if before is None:
+                    continue
+                change = (stats['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0
+                queries = ''
+                if stats['queries'] is not None and before.get('queries') is not None:
+                    queries = f"{before['queries']} -> {stats['queries']}"
+                self.stdout.write(f"{mode:<12} {name:<72} {change:+7.1f}%  {queries}")
@@ -0,0 +1,177 @@
+import asyncio
+import importlib.util
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from services.models import Service, Testimonial
+
+from .bench_api import ROUTES, percentile, serve
+
+
+SERVERS = {
+    'wsgi': ('legal_backend.wsgi:application', []),
+    'asgi': ('legal_backend.asgi:application', ['-k', 'uvicorn.workers.UvicornWorker']),
+}
+
+# Anonymous catalog reads the async views answer themselves
+CATALOG_ROUTES = [
+    template for role, method, template, body in ROUTES
+    if role == 'anonymous' and method == 'GET'
+    and template.startswith(('/api/categories/', '/api/services/', '/api/testimonials/'))
+    and 'page_size' not in template and 'search' not in template
+]
+
+
+async def get(host, port, path, timeout):
+    """One GET on a fresh connection (gunicorn's sync workers do not keep connections alive)"""
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n'.encode())
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+        return int(response.split(b' ', 2)[1])
+    finally:
+        writer.close()
+
+
+async def slow_client(host, port, stop):
+    """Hold a connection open by trickling request headers, like a slow mobile client"""
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        return
+    try:
+        writer.write(f'GET /api/health/ HTTP/1.1\r\nHost: {host}\r\n'.encode())
+        while not stop.is_set():
+            writer.write(b'X-Slow: 1\r\n')
+            await writer.drain()
+            try:
+                await asyncio.wait_for(stop.wait(), 1)
+            except asyncio.TimeoutError:
+                pass
+    except OSError:
+        pass
+    finally:
+        writer.close()
+
+
+async def run_level(base_url, paths, concurrency, duration, slow_clients, timeout):
+    url = urlsplit(base_url)
+    stop = asyncio.Event()
+    slow = [asyncio.create_task(slow_client(url.hostname, url.port, stop)) for _ in range(slow_clients)]
+    await asyncio.sleep(0.5 if slow_clients else 0)
+
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+
+    async def user(offset):
+        nonlocal errors
+        i = offset
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                status = await get(url.hostname, url.port, paths[i % len(paths)], timeout)
+            except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                status = None
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+            i += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(user(i) for i in range(concurrency)))
+    elapsed = time.monotonic() - started
+    stop.set()
+    await asyncio.gather(*slow)
+
+    milliseconds = [latency * 1000 for latency in latencies] or [timeout * 1000]
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(milliseconds, 50), 3),
+        'p95_ms': round(percentile(milliseconds, 95), 3),
+        'p99_ms': round(percentile(milliseconds, 99), 3),
+        'mean_ms': round(statistics.fmean(milliseconds), 3),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the WSGI (sync gunicorn) and ASGI (gunicorn + uvicorn workers) deployments: '
+        'ramp concurrent clients over the anonymous catalog reads and report the highest '
+        'concurrency each serves within a p95 latency target'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', default='1,4,16,64', help='Comma-separated client counts')
+        parser.add_argument('--duration', type=float, default=5, help='Seconds per concurrency level')
+        parser.add_argument('--target-ms', type=float, default=100, help='p95 latency target')
+        parser.add_argument('--workers', type=int, default=3, help='gunicorn workers for both servers')
+        parser.add_argument('--slow-clients', type=int, default=0, help='Connections held open by slow clients')
+        parser.add_argument('--timeout', type=float, default=10, help='Per-request timeout in seconds')
+        parser.add_argument('--server', choices=SERVERS, action='append', help='Only this server (repeatable)')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        if not Service.objects.filter(status='active').exists() or not Testimonial.objects.exists():
+            raise CommandError('The catalog is empty; run `manage.py seed_catalog` first')
+        servers = options['server'] or list(SERVERS)
+        if 'asgi' in servers and importlib.util.find_spec('uvicorn') is None:
+            raise CommandError('The ASGI server needs uvicorn; pip install -r requirements.txt')
+
+        paths = self.paths()
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        report = {
+            'meta': {key: options[key] for key in ('duration', 'target_ms', 'workers', 'slow_clients')},
+            'paths': paths,
+        }
+        for name in servers:
+            app, extra_args = SERVERS[name]
+            with serve(app, options['workers'], extra_args) as base_url:
+                # Warm every worker's caches and connections before measuring
+                asyncio.run(run_level(base_url, paths, options['workers'] * 2, 1, 0, options['timeout']))
+                report[name] = [
+                    asyncio.run(run_level(
+                        base_url, paths, level, options['duration'], options['slow_clients'], options['timeout']
+                    ))
+                    for level in levels
+                ]
+
+        self.print_report(report, servers, options['target_ms'])
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2, sort_keys=True)
+                file.write('\n')
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def paths(self):
+        service = Service.objects.filter(status='active', testimonials__is_active=True).first()
+        fixtures = {
+            'service_slug': service.slug,
+            'category_id': service.category_id,
+            'testimonial_id': Testimonial.objects.filter(is_active=True).values_list('pk', flat=True).first(),
+        }
+        return [template.format(**fixtures) for template in CATALOG_ROUTES]
+
+    def print_report(self, report, servers, target_ms):
+        self.stdout.write(f"{'server':<6} {'clients':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>6}")
+        for name in servers:
+            for level in report[name]:
+                self.stdout.write(
+                    f"{name:<6} {level['concurrency']:>7} {level['throughput_rps']:>8.1f} {level['p50_ms']:>8.2f} "
+                    f"{level['p95_ms']:>8.2f} {level['p99_ms']:>8.2f} {level['errors']:>6}"
+                )
+        for name in servers:
+            within = [
+                level['concurrency'] for level in report[name]
+                if level['p95_ms'] <= target_ms and not level['errors']
+            ]
+            best = max(within) if within else 'none'
+            self.stdout.write(f"{name}: highest concurrency within p95 <= {target_ms:g} ms: {best}")
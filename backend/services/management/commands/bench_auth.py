@@ -0,0 +1,73 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from authentication.authentication import CachedJWTAuthentication
+from authentication.models import RevokedToken
+from authentication.revocation import DENYLIST
+
+
+class Command(BaseCommand):
+    help = (
+        'Time JWT authentication per request: plain simplejwt, simplejwt with a per-request '
+        'denylist query, and the cached user with the Bloom-filter denylist (changes are rolled back)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--revoked', type=int, default=10000, help='Unexpired revoked tokens in the denylist')
+
+    def handle(self, *args, **options):
+        requests = options['requests']
+        with transaction.atomic():
+            user = User.objects.create_user(f'benchauth-{uuid.uuid4().hex[:8]}')
+            RevokedToken.objects.bulk_create([
+                RevokedToken(jti=uuid.uuid4().hex, expires_at=timezone.now() + timedelta(hours=1))
+                for _ in range(options['revoked'])
+            ], batch_size=1000)
+            DENYLIST.clear()
+            request = RequestFactory().get(
+                '/api/', HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}'
+            )
+
+            plain = JWTAuthentication()
+
+            def plain_with_denylist():
+                user, token = plain.authenticate(request)
+                RevokedToken.objects.filter(jti=token['jti']).exists()
+
+            cases = [
+                ('simplejwt', lambda: plain.authenticate(request)),
+                ('simplejwt + denylist query', plain_with_denylist),
+                ('cached user + Bloom denylist', lambda: CachedJWTAuthentication().authenticate(request)),
+            ]
+            self.stdout.write(f"{'authentication':<30} {'us/request':>11} {'queries':>8}")
+            for name, authenticate in cases:
+                authenticate()
+                queries = []
+                with connection.execute_wrapper(lambda execute, *args: queries.append(1) or execute(*args)):
+                    start = time.perf_counter()
+                    for _ in range(requests):
+                        authenticate()
+                    elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f"{name:<30} {elapsed / requests * 1e6:>11.1f} {len(queries) / requests:>8.2f}"
+                )
+
+            bloom = DENYLIST.filter
+            probes = 100000
+            false_positives = sum(uuid.uuid4().hex in bloom for _ in range(probes))
+            self.stdout.write(
+                f"Bloom filter: {options['revoked']} revoked tokens in {len(bloom.bits) / 1024:.1f} KiB, "
+                f"{bloom.hashes} hashes, {false_positives / probes:.3%} false positives"
+            )
+            transaction.set_rollback(True)
+        DENYLIST.clear()
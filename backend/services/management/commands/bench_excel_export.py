@@ -0,0 +1,47 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from services.admin_excel import export_services_excel
+from services.models import ServiceCategory, Service
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the services Excel export on synthetic rows (changes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000, help='Number of services to export')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        with transaction.atomic():
+            category = ServiceCategory.objects.create(name='Export Benchmark')
+            Service.objects.bulk_create([
+                Service(
+                    title=f'Export Service {i}',
+                    slug=f'export-service-{i}',
+                    category=category,
+                    short_description='Short description',
+                    full_description=f'Full description of export benchmark service {i}',
+                    features=['Consultation', 'Drafting', 'Filing'],
+                    price=5000 + i,
+                )
+                for i in range(rows)
+            ], batch_size=2000)
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            response = export_services_excel(None, None, Service.objects.filter(category=category))
+            size = sum(len(chunk) for chunk in response.streaming_content)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"{rows} rows  {elapsed:.2f}s  {rows / elapsed:.0f} rows/s  "
+            f"{size / 1024:.0f} KiB file  peak Python memory {peak / 1024 / 1024:.1f} MiB"
+        )
@@ -0,0 +1,74 @@
+import time
+from io import BytesIO
+
+import pandas as pd
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from services.admin_excel import import_service_categories_excel, import_services_excel
+from services.models import Service
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the Excel importers on a synthetic sheet (changes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Number of service rows')
+        parser.add_argument('--categories', type=int, default=20, help='Number of category rows')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        category_names = [f'Bench Category {i}' for i in range(options['categories'])]
+
+        categories_sheet = self.workbook('Service Categories', pd.DataFrame({
+            'ID': [None] * len(category_names),
+            'Name': category_names,
+            'Description': ['Benchmark category'] * len(category_names),
+            'Icon': ['fa-gavel'] * len(category_names),
+            'Order': range(len(category_names)),
+        }))
+        services = pd.DataFrame({
+            'ID': [None] * rows,
+            'Title': [f'Bench Service {i}' for i in range(rows)],
+            'Slug': [f'bench-service-{i}' for i in range(rows)],
+            'Category': [category_names[i % len(category_names)] for i in range(rows)],
+            'Short Description': ['Short description'] * rows,
+            'Full Description': ['Full description of the benchmark service'] * rows,
+            'Features': ['Consultation, Drafting, Filing'] * rows,
+            'Price': [5000 + i for i in range(rows)],
+            'Price Unit': ['per case'] * rows,
+            'Duration': ['1-2 weeks'] * rows,
+            'Icon': ['fa-file'] * rows,
+            'Status': ['active'] * rows,
+            'Order': range(rows),
+        })
+
+        with transaction.atomic():
+            user = User.objects.filter(is_staff=True).first()
+            self.run('categories (create)', import_service_categories_excel, categories_sheet, len(category_names), user)
+            self.run('services (create)', import_services_excel, self.workbook('Services', services), rows, user)
+
+            slugs = services['Slug'].tolist()
+            ids = dict(Service.objects.filter(slug__in=slugs).values_list('slug', 'id'))
+            services['ID'] = [ids.get(slug) for slug in slugs]
+            services['Title'] = services['Title'] + ' (updated)'
+            self.run('services (update)', import_services_excel, self.workbook('Services', services), rows, user)
+
+            transaction.set_rollback(True)
+
+    def workbook(self, sheet_name, df):
+        buffer = BytesIO()
+        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+        buffer.seek(0)
+        return buffer
+
+    def run(self, label, importer, workbook, rows, user):
+        start = time.perf_counter()
+        result = importer(workbook, user)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{label:<22} {rows:>7} rows  {elapsed:8.2f}s  {rows / elapsed:10.0f} rows/s  "
+            f"created={result['created']} updated={result['updated']} errors={len(result['errors'])}"
+        )
@@ -0,0 +1,116 @@
+import json
+import os
+import tempfile
+import time
+from urllib.request import Request
+
+from django.core.management.base import BaseCommand, CommandError
+
+from legal_backend.warmup import process_memory
+from services.models import Service, Testimonial
+
+from .bench_api import fetch, percentile, serve
+from .bench_asgi import CATALOG_ROUTES
+
+
+PROFILES = {
+    # The command the containers ran before legal_backend/gunicorn_conf.py
+    'plain': [],
+    'preloaded': ['-c', 'python:legal_backend.gunicorn_conf'],
+}
+
+
+def worker_pids(master_pid):
+    pids = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as file:
+                # The command name is parenthesised and may contain spaces
+                parent = int(file.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if parent == master_pid:
+            pids.append(int(entry))
+    return sorted(pids)
+
+
+def timed_get(base_url, path):
+    start = time.perf_counter()
+    status, _ = fetch(Request(base_url + path))
+    return status, (time.perf_counter() - start) * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare first-request latency and per-worker shared/private memory of plain gunicorn '
+        'and the preloaded, warmed profile in legal_backend/gunicorn_conf.py (Linux only)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=3, help='gunicorn workers')
+        parser.add_argument('--requests', type=int, default=20, help='Warm requests per route after the cold round')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        if not os.path.exists('/proc/self/smaps_rollup'):
+            raise CommandError('Per-process memory needs /proc/<pid>/smaps_rollup (Linux 4.14+)')
+        service = Service.objects.filter(status='active', testimonials__is_active=True).first()
+        if service is None:
+            raise CommandError('The catalog is empty; run `manage.py seed_catalog` first')
+        fixtures = {
+            'service_slug': service.slug,
+            'category_id': service.category_id,
+            'testimonial_id': Testimonial.objects.filter(is_active=True).values_list('pk', flat=True).first(),
+        }
+        paths = [template.format(**fixtures) for template in CATALOG_ROUTES] + ['/api/schema/']
+
+        report = {'meta': {'workers': options['workers'], 'requests': options['requests']}}
+        for name, extra_args in PROFILES.items():
+            with tempfile.TemporaryDirectory() as directory:
+                pidfile = os.path.join(directory, 'gunicorn.pid')
+                with serve('legal_backend.wsgi:application', options['workers'],
+                           [*extra_args, '--pid', pidfile]) as base_url:
+                    # One round per worker, so each is likely to serve every route once while cold
+                    cold = [timed_get(base_url, path) for _ in range(options['workers']) for path in paths]
+                    warm = [
+                        timed_get(base_url, path) for _ in range(options['requests']) for path in paths
+                    ]
+                    with open(pidfile) as file:
+                        workers = {pid: process_memory(pid) for pid in worker_pids(int(file.read()))}
+
+            if any(status != 200 for status, _ in cold + warm):
+                raise CommandError(f'{name}: some requests failed')
+            cold_ms = [ms for _, ms in cold]
+            warm_ms = [ms for _, ms in warm]
+            report[name] = {
+                'cold_p50_ms': round(percentile(cold_ms, 50), 3),
+                'cold_max_ms': round(max(cold_ms), 3),
+                'warm_p50_ms': round(percentile(warm_ms, 50), 3),
+                'workers': {str(pid): memory for pid, memory in workers.items()},
+                'total_pss_kb': sum(memory['pss'] for memory in workers.values()),
+            }
+
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2, sort_keys=True)
+                file.write('\n')
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"{'profile':<10} {'cold p50':>9} {'cold max':>9} {'warm p50':>9}   worker memory (KiB)"
+        )
+        for name in PROFILES:
+            stats = report[name]
+            self.stdout.write(
+                f"{name:<10} {stats['cold_p50_ms']:>7.1f}ms {stats['cold_max_ms']:>7.1f}ms "
+                f"{stats['warm_p50_ms']:>7.1f}ms   total PSS {stats['total_pss_kb']}"
+            )
+            for pid, memory in stats['workers'].items():
+                self.stdout.write(
+                    f"{'':<42}pid {pid}: {memory['rss']} RSS = {memory['shared']} shared + "
+                    f"{memory['private']} private"
+                )
@@ -0,0 +1,70 @@
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Prefetch
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from legal_backend import renderers
+from legal_backend.renderers import ORJSONParser, ORJSONRenderer
+from services.models import Service, ServiceCategory
+from services.seeding import seed_catalog
+from services.serializers import ServiceDetailSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Microbenchmark the stdlib and orjson JSON renderers/parsers on ServiceDetailSerializer '
+        'output of a synthetic catalog (changes are rolled back)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--services', type=int, default=100, help='Services per rendered payload')
+        parser.add_argument('--iterations', type=int, default=200, help='Timed renders/parses per implementation')
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            raise CommandError('orjson is not installed; ORJSONRenderer would use the stdlib renderer')
+
+        with transaction.atomic():
+            seed_catalog(
+                categories=10, services=options['services'], testimonials=options['services'] * 3,
+                inquiries=0, prefix='benchjson',
+            )
+            services = Service.objects.filter(slug__startswith='benchjson-').select_related('created_by').prefetch_related(
+                Prefetch('category', queryset=ServiceCategory.objects.with_service_counts())
+            ).with_top_testimonials()
+            payloads = {
+                'detail': ServiceDetailSerializer(services[0]).data,
+                'detail list': ServiceDetailSerializer(services, many=True).data,
+            }
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{'payload':<12} {'op':<7} {'bytes':>9} {'stdlib':>12} {'orjson':>12} {'speedup':>8}")
+        for name, data in payloads.items():
+            expected = JSONRenderer().render(data)
+            if ORJSONRenderer().render(data) != expected:
+                raise CommandError(f'{name}: orjson output differs from JSONRenderer')
+            if ORJSONParser().parse(BytesIO(expected)) != JSONParser().parse(BytesIO(expected)):
+                raise CommandError(f'{name}: orjson parse differs from JSONParser')
+
+            for op, baseline, candidate in (
+                ('render', lambda: JSONRenderer().render(data), lambda: ORJSONRenderer().render(data)),
+                ('parse', lambda: JSONParser().parse(BytesIO(expected)),
+                 lambda: ORJSONParser().parse(BytesIO(expected))),
+            ):
+                before = self.time_per_call(baseline, options['iterations'])
+                after = self.time_per_call(candidate, options['iterations'])
+                self.stdout.write(
+                    f"{name:<12} {op:<7} {len(expected):>9} {before * 1e6:>10.1f}us {after * 1e6:>10.1f}us "
+                    f"{before / after:>7.1f}x"
+                )
+
+    def time_per_call(self, func, iterations):
+        func()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - start) / iterations
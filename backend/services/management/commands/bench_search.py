@@ -0,0 +1,94 @@
+import random
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from rest_framework.test import APIClient
+
+from services.models import Service, ServiceCategory
+from services.search import get_search_backend
+
+
+SYLLABLES = 'ba be di do fa ke lo mi nu pa re sa ti vo za ku'.split()
+LEGAL_WORDS = (
+    'company registration trademark patent copyright contract dispute litigation arbitration '
+    'employment immigration visa property lease tenancy divorce custody probate estate will '
+    'trust tax audit compliance licensing merger acquisition shareholder agreement insolvency '
+    'bankruptcy debt recovery notary affidavit consultation drafting review filing appeal'
+).split()
+# Legal terms are rare among the filler words, so queries select a small share of the catalog
+LEGAL_WORD_RATE = 0.002
+QUERIES = ['trademark', 'regist', 'property lease', 'divorce', 'arbitr', 'notary']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark service search on a synthetic catalog (changes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--services', type=int, default=100000, help='Number of synthetic services')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query; the median is reported')
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        filler = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+
+        def words(count):
+            return ' '.join(
+                rng.choice(LEGAL_WORDS) if rng.random() < LEGAL_WORD_RATE else rng.choice(filler)
+                for _ in range(count)
+            )
+
+        with transaction.atomic():
+            start = time.perf_counter()
+            category = ServiceCategory.objects.create(name='Bench Search Category')
+            Service.objects.bulk_create((
+                Service(
+                    title=words(3).title(),
+                    slug=f'bench-search-{i}',
+                    category=category,
+                    short_description=words(12),
+                    full_description=words(80),
+                )
+                for i in range(options['services'])
+            ), batch_size=2000)
+            self.stdout.write(f"Seeded {options['services']} services in {time.perf_counter() - start:.1f}s")
+
+            client = APIClient()
+            self.stdout.write(f"{'query':<18} {'hits':>6} {'full-text':>12} {'icontains':>12} {'API':>12}")
+            for query in QUERIES:
+                backend = get_search_backend(Service.objects.db, query)
+                hits, indexed = self.measure(lambda: list(backend.search(Service.objects.all())), options['repeat'])
+                _, scan = self.measure(lambda: list(self.icontains(query)), options['repeat'])
+                _, api = self.measure(lambda: self.request(client, query), options['repeat'])
+                self.stdout.write(
+                    f"{query:<18} {len(hits):>6} {indexed * 1000:>9.1f} ms {scan * 1000:>9.1f} ms {api * 1000:>9.1f} ms"
+                )
+
+            transaction.set_rollback(True)
+
+    def icontains(self, query):
+        """What DRF's SearchFilter ran before: per word, an OR of icontains over the three fields"""
+        queryset = Service.objects.all()
+        for word in query.split():
+            queryset = queryset.filter(
+                Q(title__icontains=word) | Q(short_description__icontains=word) | Q(full_description__icontains=word)
+            )
+        return queryset
+
+    def request(self, client, query):
+        # Bypass the catalog cache so every run hits the database
+        cache.clear()
+        response = client.get('/api/services/', {'search': query})
+        if response.status_code != 200:
+            raise RuntimeError(f"Search request failed with status {response.status_code}")
+        return response
+
+    def measure(self, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = run()
+            timings.append(time.perf_counter() - start)
+        return result, sorted(timings)[len(timings) // 2]
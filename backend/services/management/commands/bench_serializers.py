@@ -0,0 +1,77 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from services.fast_serializers import ValuesSerializer
+from services.models import Service, ServiceInquiry, Testimonial
+from services.seeding import seed_catalog
+from services.serializers import (
+    ServiceInquiryAdminSerializer, ServiceInquirySerializer, ServiceListSerializer, TestimonialSerializer
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the list serializers against their values() fast path per 1,000 rows '
+        'on a synthetic catalog (changes are rolled back)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per path; the best is reported')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        context = {'request': Request(APIRequestFactory().get('/api/'))}
+        with transaction.atomic():
+            seed_catalog(categories=10, services=rows, testimonials=rows, inquiries=rows, prefix='benchser')
+            cases = [
+                (ServiceListSerializer, Service.objects.filter(slug__startswith='benchser-'), 'category'),
+                (TestimonialSerializer, Testimonial.objects.filter(service__slug__startswith='benchser-'), 'service'),
+                (ServiceInquirySerializer, ServiceInquiry.objects.filter(service__slug__startswith='benchser-'),
+                 'service'),
+                (ServiceInquiryAdminSerializer, ServiceInquiry.objects.filter(service__slug__startswith='benchser-'),
+                 'service', 'assigned_to'),
+            ]
+
+            self.stdout.write(
+                f"{'serializer':<30} {'serialize':>10} {'fast':>8} {'speedup':>8} {'query+ser':>10} {'fast':>8}"
+            )
+            for serializer_class, queryset, *related in cases:
+                queryset = queryset[:rows]
+                values_serializer = ValuesSerializer(serializer_class)
+                values_queryset = queryset.values(*values_serializer.lookups)
+                instances = list(queryset.select_related(*related))
+                dicts = list(values_queryset)
+
+                expected = JSONRenderer().render(serializer_class(instances, many=True, context=context).data)
+                if JSONRenderer().render(values_serializer.serialize(dicts, context)) != expected:
+                    raise CommandError(f'{serializer_class.__name__}: values() output differs')
+
+                serialize = self.best(options['repeat'], lambda: serializer_class(
+                    instances, many=True, context=context).data)
+                fast = self.best(options['repeat'], lambda: values_serializer.serialize(dicts, context))
+                total = self.best(options['repeat'], lambda: serializer_class(
+                    list(queryset.select_related(*related)), many=True, context=context).data)
+                fast_total = self.best(options['repeat'], lambda: values_serializer.serialize(
+                    list(values_queryset.all()), context))
+
+                per_thousand = 1000 * 1000 / len(instances)
+                self.stdout.write(
+                    f"{serializer_class.__name__:<30} {serialize * per_thousand:>8.1f}ms {fast * per_thousand:>6.1f}ms "
+                    f"{serialize / fast:>7.1f}x {total * per_thousand:>8.1f}ms {fast_total * per_thousand:>6.1f}ms"
+                )
+            transaction.set_rollback(True)
+        self.stdout.write('Times are per 1,000 rows')
+
+    def best(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,126 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Libraries only the admin Excel import/export and template download need
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl')
+
+# What a gunicorn worker imports before and while serving its first request;
+# {extra} adds imports for the comparison scenario
+WORKER_SCRIPT = '''
+import json, os, resource, sys
+
+def rss_kb():
+    # ru_maxrss would report the parent's peak: Linux carries it across fork/exec
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'legal_backend.settings')
+from legal_backend.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+{extra}
+print(json.dumps({{
+    'rss_kb': rss_kb(),
+    'modules': len(sys.modules),
+    'heavy_modules': [name for name in {heavy!r} if name in sys.modules],
+}}))
+'''
+
+SCENARIOS = {
+    'worker': '',
+    # What every worker paid while the admin imported pandas and openpyxl eagerly
+    'worker + excel libraries': 'import openpyxl, pandas',
+}
+
+
+def parse_importtime(stderr):
+    """``-X importtime`` output -> [(module, depth, self_us, cumulative_us)]"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return modules
+
+
+def measure(extra):
+    script = WORKER_SCRIPT.format(extra=extra, heavy=HEAVY_MODULES)
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', script],
+        cwd=settings.BASE_DIR, env=os.environ.copy(), capture_output=True, text=True, timeout=120,
+    )
+    elapsed = time.perf_counter() - start
+    if process.returncode:
+        raise CommandError(f'Worker startup failed:\n{process.stderr[-2000:]}')
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    imports = parse_importtime(process.stderr)
+    return {
+        'startup_ms': elapsed * 1000,
+        'import_ms': sum(self_us for _, _, self_us, _ in imports) / 1000,
+        'rss_mb': result['rss_kb'] / 1024,
+        'modules': result['modules'],
+        'heavy_modules': result['heavy_modules'],
+        'slowest_imports': [
+            (name, cumulative_us / 1000)
+            for name, _, _, cumulative_us in sorted(
+                (entry for entry in imports if entry[1] == 0), key=lambda entry: -entry[3]
+            )[:10]
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure gunicorn worker startup (python -X importtime on the WSGI app and URLconf) '
+        'and RSS, with and without the Excel libraries loaded'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help='Fresh interpreters per scenario; medians are reported')
+        parser.add_argument('--top', type=int, default=5, help='Slowest top-level imports to list')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        report = {}
+        for name, extra in SCENARIOS.items():
+            runs = [measure(extra) for _ in range(options['repeat'])]
+            report[name] = {
+                key: round(statistics.median(run[key] for run in runs), 1)
+                for key in ('startup_ms', 'import_ms', 'rss_mb', 'modules')
+            }
+            report[name]['heavy_modules'] = runs[-1]['heavy_modules']
+            report[name]['slowest_imports'] = [
+                [module, round(ms, 1)] for module, ms in runs[-1]['slowest_imports'][:options['top']]
+            ]
+
+        self.stdout.write(f"{'scenario':<26} {'startup':>9} {'imports':>9} {'rss':>8} {'modules':>8}  heavy")
+        for name, stats in report.items():
+            self.stdout.write(
+                f"{name:<26} {stats['startup_ms']:>7.1f}ms {stats['import_ms']:>7.1f}ms {stats['rss_mb']:>6.1f}MB "
+                f"{stats['modules']:>8.0f}  {', '.join(stats['heavy_modules']) or '-'}"
+            )
+            for module, ms in stats['slowest_imports']:
+                self.stdout.write(f"    {module:<30} {ms:>8.1f}ms")
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2, sort_keys=True)
+                file.write('\n')
+            self.stdout.write(f"Report written to {options['output']}")
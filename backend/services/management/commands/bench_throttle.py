@@ -0,0 +1,160 @@
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from services.models import Service, ServiceInquiry, Testimonial
+
+from .bench_api import percentile, serve
+from .bench_asgi import CATALOG_ROUTES
+
+
+FLOOD_EMAIL_DOMAIN = 'flood.invalid'
+
+# gunicorn trusts one proxy hop, so every flood request can claim its own
+# client address through X-Forwarded-For, like a botnet would
+SERVERS = {
+    'unthrottled': {'THROTTLE_ENABLED': 'False', 'NUM_PROXIES': '1'},
+    'throttled': {'THROTTLE_ENABLED': 'True', 'NUM_PROXIES': '1'},
+}
+
+
+async def send(host, port, method, path, body=None, headers=None, timeout=10):
+    """One request on a fresh connection; returns the status code"""
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        payload = json.dumps(body).encode() if body is not None else b''
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {host}', 'Connection: close', f'Content-Length: {len(payload)}']
+        if body is not None:
+            lines.append('Content-Type: application/json')
+        lines += [f'{name}: {value}' for name, value in (headers or {}).items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + payload)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+        return int(response.split(b' ', 2)[1])
+    finally:
+        writer.close()
+
+
+async def run_phase(base_url, paths, service_id, readers, flooders, duration, timeout):
+    url = urlsplit(base_url)
+    deadline = time.monotonic() + duration
+    latencies, read_errors, flood_statuses = [], 0, Counter()
+
+    async def reader(offset):
+        nonlocal read_errors
+        i = offset
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                status = await send(url.hostname, url.port, 'GET', paths[i % len(paths)], timeout=timeout)
+            except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                status = None
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                read_errors += 1
+            i += 1
+
+    async def flooder():
+        while time.monotonic() < deadline:
+            body = {
+                'service': service_id, 'name': 'Flood', 'phone': '1', 'message': 'Flood inquiry',
+                'email': f'{random.getrandbits(48):x}@{FLOOD_EMAIL_DOMAIN}',
+            }
+            address = f'10.{random.randrange(256)}.{random.randrange(256)}.{random.randrange(1, 255)}'
+            try:
+                status = await send(
+                    url.hostname, url.port, 'POST', '/api/inquiries/', body, {'X-Forwarded-For': address}, timeout
+                )
+            except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                status = 'error'
+            flood_statuses[status] += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(reader(i) for i in range(readers)), *(flooder() for _ in range(flooders)))
+    elapsed = time.monotonic() - started
+
+    milliseconds = [latency * 1000 for latency in latencies] or [timeout * 1000]
+    return {
+        'catalog_requests': len(latencies),
+        'catalog_errors': read_errors,
+        'catalog_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(milliseconds, 50), 3),
+        'p95_ms': round(percentile(milliseconds, 95), 3),
+        'p99_ms': round(percentile(milliseconds, 99), 3),
+        'mean_ms': round(statistics.fmean(milliseconds), 3),
+        'flood': {str(status): count for status, count in sorted(flood_statuses.items(), key=str)},
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Flood POST /api/inquiries/ from many spoofed client addresses while measuring anonymous '
+        'catalog read latency, with throttling off and on; flood inquiries are deleted afterwards'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4, help='Concurrent catalog readers')
+        parser.add_argument('--flooders', type=int, default=16, help='Concurrent inquiry submitters')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per phase')
+        parser.add_argument('--workers', type=int, default=3, help='gunicorn workers')
+        parser.add_argument('--timeout', type=float, default=10, help='Per-request timeout in seconds')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        service = Service.objects.filter(status='active', testimonials__is_active=True).first()
+        if service is None:
+            raise CommandError('The catalog is empty; run `manage.py seed_catalog` first')
+        fixtures = {
+            'service_slug': service.slug,
+            'category_id': service.category_id,
+            'testimonial_id': Testimonial.objects.filter(is_active=True).values_list('pk', flat=True).first(),
+        }
+        paths = [template.format(**fixtures) for template in CATALOG_ROUTES]
+
+        report = {'meta': {key: options[key] for key in ('readers', 'flooders', 'duration', 'workers')}}
+        try:
+            for name, env in SERVERS.items():
+                with serve('legal_backend.wsgi:application', options['workers'], env=env) as base_url:
+                    # Warm every worker's caches before measuring
+                    asyncio.run(run_phase(base_url, paths, service.pk, options['workers'] * 2, 0, 1, options['timeout']))
+                    report[name] = {
+                        phase: asyncio.run(run_phase(
+                            base_url, paths, service.pk, options['readers'], flooders,
+                            options['duration'], options['timeout'],
+                        ))
+                        for phase, flooders in (('baseline', 0), ('flood', options['flooders']))
+                    }
+                    report[name]['inserted'] = ServiceInquiry.objects.filter(
+                        email__endswith=f'@{FLOOD_EMAIL_DOMAIN}'
+                    ).count()
+                ServiceInquiry.objects.filter(email__endswith=f'@{FLOOD_EMAIL_DOMAIN}').delete()
+        finally:
+            ServiceInquiry.objects.filter(email__endswith=f'@{FLOOD_EMAIL_DOMAIN}').delete()
+
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2, sort_keys=True)
+                file.write('\n')
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"{'server':<12} {'phase':<9} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>6}  flood statuses"
+        )
+        for name in SERVERS:
+            for phase in ('baseline', 'flood'):
+                stats = report[name][phase]
+                flood = ', '.join(f'{status}: {count}' for status, count in stats['flood'].items()) or '-'
+                self.stdout.write(
+                    f"{name:<12} {phase:<9} {stats['catalog_rps']:>7.1f} {stats['p50_ms']:>8.2f} "
+                    f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} {stats['catalog_errors']:>6}  {flood}"
+                )
+            self.stdout.write(f"{name}: {report[name]['inserted']} flood inquiries inserted")
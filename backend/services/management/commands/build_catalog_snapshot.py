@@ -0,0 +1,22 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from services.snapshot import build_catalog_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the public catalog snapshot (categories, services, featured testimonials) '
+        'with its gzip/brotli variants; run after collectstatic on deploy'
+    )
+
+    def handle(self, *args, **options):
+        manifest = build_catalog_snapshot()
+        path = os.path.join(settings.MEDIA_ROOT, manifest['url'][len(settings.MEDIA_URL):])
+        sizes = ', '.join(
+            f"{suffix or 'json'} {os.path.getsize(path + suffix)} bytes"
+            for suffix in ('', '.gz', '.br') if os.path.exists(path + suffix)
+        )
+        self.stdout.write(self.style.SUCCESS(f"Catalog snapshot {manifest['version']} at {manifest['url']} ({sizes})"))
@@ -0,0 +1,25 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from legal_backend.schema import FORMATS, build_schema, code_version, schema_path
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate the OpenAPI schema served by /api/schema/ (YAML and JSON with gzip variants) '
+        'for the current code version; run after collectstatic on deploy'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate even if this version exists')
+
+    def handle(self, *args, **options):
+        built = build_schema(force=options['force'])
+        sizes = ', '.join(
+            f"{format} {os.path.getsize(schema_path(format))} bytes "
+            f"({os.path.getsize(schema_path(format, 'gzip'))} gzipped)"
+            for format in FORMATS
+        )
+        state = 'built' if built else 'already built'
+        self.stdout.write(self.style.SUCCESS(f"OpenAPI schema {code_version()} {state}: {sizes}"))
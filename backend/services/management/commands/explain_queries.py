@@ -0,0 +1,125 @@
+import re
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from services.models import Service
+from services.seeding import seed_catalog
+
+
+SQLITE_SCAN = re.compile(r'\bSCAN (\w+)(.*)')
+SQLITE_SUBQUERY = re.compile(r'\b(?:CO-ROUTINE|MATERIALIZE) (\w+)')
+POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a large synthetic dataset, replay the API list/detail requests and EXPLAIN '
+        'every query they run; fails if any query sequentially scans a table (changes are rolled back)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--services', type=int, default=20000)
+        parser.add_argument('--inquiries', type=int, default=50000)
+        parser.add_argument('--testimonials', type=int, default=20000)
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every query plan')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            seed_catalog(
+                categories=options['categories'], services=options['services'],
+                testimonials=options['testimonials'], inquiries=options['inquiries'],
+                clients=5000, prefix='explain',
+            )
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+
+            failures = []
+            for label, user, url in self.requests():
+                for sql, plan, scans in self.explain_request(user, url):
+                    if options['verbose_plans'] or scans:
+                        self.stdout.write(f"{label} {url}\n  {sql}\n  " + '\n  '.join(plan))
+                    if scans:
+                        failures.append(f"{label} {url}: sequential scan on {', '.join(scans)}")
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError('Sequential scans found:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('No sequential scans'))
+
+    def requests(self):
+        service = Service.objects.filter(status='active').first()
+        staff = User.objects.create_user('explain-staff', is_staff=True)
+        client = User.objects.create_user('explain-client', email='client1@example.com')
+        category_id = service.category_id
+
+        yield 'anonymous', None, '/api/categories/'
+        yield 'anonymous', None, f'/api/categories/{category_id}/'
+        yield 'anonymous', None, '/api/services/'
+        yield 'anonymous', None, '/api/services/?page_size=20'
+        yield 'anonymous', None, f'/api/services/?category={category_id}&page_size=20'
+        yield 'anonymous', None, '/api/services/featured/'
+        yield 'anonymous', None, f'/api/services/by_category/?category_id={category_id}'
+        yield 'anonymous', None, f'/api/services/{service.slug}/'
+        yield 'anonymous', None, '/api/services/?search=law&page_size=20'
+        yield 'anonymous', None, '/api/testimonials/?page_size=20'
+        yield 'anonymous', None, f'/api/testimonials/?service={service.pk}&page_size=20'
+        yield 'anonymous', None, '/api/testimonials/featured/'
+        yield 'staff', staff, '/api/inquiries/?page_size=20'
+        yield 'staff', staff, '/api/inquiries/?status=pending&page_size=20'
+        yield 'staff', staff, f'/api/inquiries/?service={service.pk}&page_size=20'
+        yield 'client', client, '/api/inquiries/'
+
+    def explain_request(self, user, url):
+        api = APIClient()
+        if user is not None:
+            api.force_authenticate(user)
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = api.get(url)
+            if response.status_code != 200:
+                raise CommandError(f"{url} returned {response.status_code}")
+            data = response.json()
+            # Page two exercises the keyset filter as well as the first page
+            if isinstance(data, dict) and data.get('next'):
+                cache.clear()
+                api.get(data['next'])
+
+        for query in context.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            plan = self.explain(sql)
+            yield sql, plan, self.sequential_scans(plan)
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                return [row[-1] for row in cursor.fetchall()]
+            cursor.execute(f'EXPLAIN {sql}')
+            return [row[0] for row in cursor.fetchall()]
+
+    def sequential_scans(self, plan):
+        scans = []
+        # Scanning the rows of a subquery (e.g. Django's "qualify" window filter) is not a table scan
+        subqueries = {match.group(1) for line in plan for match in SQLITE_SUBQUERY.finditer(line)}
+        for line in plan:
+            if connection.vendor == 'sqlite':
+                match = SQLITE_SCAN.search(line)
+                # Index scans, rowid lookups, FTS5 and subquery/CTE scans are fine
+                if match and match.group(1) not in subqueries and not re.search(
+                    r'USING (COVERING )?INDEX|USING INTEGER PRIMARY KEY|VIRTUAL TABLE', match.group(2)
+                ):
+                    scans.append(match.group(1))
+            else:
+                match = POSTGRES_SCAN.search(line)
+                if match:
+                    scans.append(match.group(1))
+        return scans
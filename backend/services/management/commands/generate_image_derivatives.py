@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from services.images import IMAGE_FIELDS, update_derivatives
+from services.jobs import enqueue_job
+from services.snapshot import invalidate_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        'Backfill the resized WebP/JPEG copies of service and testimonial images '
+        'that have none yet (or all of them with --force)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate images that already have derivatives')
+        parser.add_argument('--enqueue', action='store_true', help='Queue jobs for run_jobs instead of resizing here')
+
+    def handle(self, *args, **options):
+        updated_models = []
+        for model, (image_field, derivatives_field) in IMAGE_FIELDS.items():
+            queryset = model.objects.exclude(**{image_field: ''}).exclude(**{f'{image_field}__isnull': True})
+            if not options['force']:
+                queryset = queryset.filter(**{derivatives_field: {}})
+
+            done = failed = 0
+            for instance in queryset.order_by('pk').iterator():
+                if options['enqueue']:
+                    enqueue_job('image_derivatives', payload={'model': model._meta.label_lower, 'pk': instance.pk})
+                    done += 1
+                    continue
+                try:
+                    # One catalog invalidation at the end rather than one per image
+                    if update_derivatives(instance, invalidate=False) is not None:
+                        done += 1
+                except (OSError, ValueError) as e:
+                    # Missing or unreadable originals; keep going with the rest
+                    failed += 1
+                    self.stderr.write(f'{model._meta.label} {instance.pk}: {e}')
+
+            if done and not options['enqueue']:
+                updated_models.append(model)
+            action = 'Queued' if options['enqueue'] else 'Generated derivatives for'
+            self.stdout.write(self.style.SUCCESS(
+                f'{action} {done} {model._meta.verbose_name_plural}' + (f', {failed} failed' if failed else '')
+            ))
+
+        if updated_models:
+            invalidate_catalog(updated_models)
@@ -0,0 +1,40 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from services.outbox import claim_due_messages, deliver
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued inquiry notifications as per-recipient email digests'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--digest-window', type=int, default=settings.OUTBOX_DIGEST_WINDOW,
+            help='Seconds to collect notifications into one digest'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=5.0,
+            help='Seconds to wait between checks for due notifications'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once no notifications are due'
+        )
+
+    def handle(self, *args, **options):
+        window = timedelta(seconds=options['digest_window'])
+        self.stdout.write(f"Delivering notifications in {options['digest_window']}s digests")
+        while True:
+            close_old_connections()
+            messages = claim_due_messages(window)
+            if messages:
+                emails = deliver(messages)
+                self.stdout.write(f"{len(messages)} notification(s) in {emails} email(s)")
+                continue
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
@@ -0,0 +1,98 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+# Worker processes are spawned and unpickle these functions by reference,
+# so this module must not import models before django.setup() has run.
+
+def setup_worker():
+    django.setup()
+
+
+def execute_job(job_id):
+    from services.jobs import run_job
+    return run_job(job_id)
+
+
+class Command(BaseCommand):
+    help = 'Run queued admin import/export jobs in a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=getattr(settings, 'JOB_WORKERS', 2),
+            help='Number of worker processes'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help='Seconds to wait between checks for new jobs'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once no jobs are pending or running'
+        )
+        parser.add_argument(
+            '--stale-after', type=int, default=getattr(settings, 'JOB_STALE_AFTER', 3600),
+            help='Requeue jobs left running for this many seconds by a run_jobs that died'
+        )
+
+    def handle(self, *args, **options):
+        from services.jobs import claim_pending_jobs, fail_job, requeue_stale_jobs
+
+        requeued = requeue_stale_jobs(options['stale_after'])
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale running job(s)")
+
+        workers = options['workers']
+        # Spawn rather than fork so workers never inherit this process's DB connection
+        context = multiprocessing.get_context('spawn')
+        self.stdout.write(f"Processing jobs with {workers} worker(s)")
+
+        pool = self.start_pool(workers, context)
+        running = {}
+        try:
+            while True:
+                lost = []
+                for job_id in claim_pending_jobs(workers - len(running)):
+                    try:
+                        running[pool.submit(execute_job, job_id)] = job_id
+                    except BrokenProcessPool:
+                        lost.append(job_id)
+
+                if running:
+                    done, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job_id = running.pop(future)
+                        try:
+                            self.stdout.write(f"Job {job_id}: {future.result()}")
+                        except BrokenProcessPool:
+                            lost.append(job_id)
+                        except Exception as e:
+                            fail_job(job_id, f"Worker error: {e}")
+                            self.stderr.write(f"Job {job_id}: worker error: {e}")
+                elif not lost:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                if lost:
+                    # A worker died (killed, out of memory, crashed): the pool gives up on
+                    # every job it held and accepts no more, so fail them and start a new one
+                    lost += running.values()
+                    running.clear()
+                    for job_id in lost:
+                        fail_job(job_id, "Worker process died while running the job")
+                        self.stderr.write(f"Job {job_id}: worker process died")
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self.start_pool(workers, context)
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    def start_pool(self, workers, context):
+        return ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=setup_worker)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from services.models import ServiceCategory
+from services.seeding import SEED_PREFIX, clear_seeded_catalog, seed_catalog
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic catalog of categories, services, testimonials and inquiries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--services', type=int, default=500)
+        parser.add_argument('--testimonials', type=int, default=2000)
+        parser.add_argument('--inquiries', type=int, default=5000)
+        parser.add_argument('--clients', type=int, default=500, help='Distinct inquiry email addresses')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for reproducible catalogs')
+        parser.add_argument('--prefix', default=SEED_PREFIX, help='Marks the generated rows')
+        parser.add_argument('--clear', action='store_true', help='Delete previously seeded rows first')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if options['clear']:
+            deleted = clear_seeded_catalog(prefix)
+            self.stdout.write(f"Deleted {deleted} previously seeded rows")
+        elif ServiceCategory.objects.filter(name__startswith=f'{prefix.title()} ').exists():
+            raise CommandError(f"A catalog with prefix '{prefix}' is already seeded; pass --clear to replace it")
+
+        counts = seed_catalog(
+            categories=options['categories'], services=options['services'],
+            testimonials=options['testimonials'], inquiries=options['inquiries'],
+            clients=options['clients'], seed=options['seed'], prefix=prefix,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            'Seeded ' + ', '.join(f'{count} {name}' for name, count in counts.items())
+        ))
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.1 on 2026-10-18 12:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='service',
+            name='features',
+            field=models.JSONField(blank=True, default=list, help_text='List of service features'),
+        ),
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('import_service_categories', 'Import service categories'), ('import_services', 'Import services'), ('export_service_categories', 'Export service categories'), ('export_services', 'Export services')], max_length=50)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('input_file', models.FileField(blank=True, null=True, upload_to='jobs/input/')),
+                ('result_file', models.FileField(blank=True, null=True, upload_to='jobs/results/')),
+                ('result', models.JSONField(blank=True, default=dict, help_text='Import summary or export details')),
+                ('progress', models.PositiveSmallIntegerField(default=0, help_text='Percent complete')),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
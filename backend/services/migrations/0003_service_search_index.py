@@ -0,0 +1,83 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Frozen copies of the statements in services.search, so later changes there
+# cannot alter what this migration does
+SQLITE_SETUP = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS services_service_fts USING fts5(
+        title, short_description, full_description,
+        content='services_service', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS services_service_fts_ai AFTER INSERT ON services_service BEGIN
+        INSERT INTO services_service_fts(rowid, title, short_description, full_description)
+        VALUES (new.id, new.title, new.short_description, new.full_description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS services_service_fts_ad AFTER DELETE ON services_service BEGIN
+        INSERT INTO services_service_fts(services_service_fts, rowid, title, short_description, full_description)
+        VALUES ('delete', old.id, old.title, old.short_description, old.full_description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS services_service_fts_au AFTER UPDATE ON services_service BEGIN
+        INSERT INTO services_service_fts(services_service_fts, rowid, title, short_description, full_description)
+        VALUES ('delete', old.id, old.title, old.short_description, old.full_description);
+        INSERT INTO services_service_fts(rowid, title, short_description, full_description)
+        VALUES (new.id, new.title, new.short_description, new.full_description);
+    END""",
+    "INSERT INTO services_service_fts(services_service_fts) VALUES ('rebuild')",
+]
+
+SQLITE_TEARDOWN = [
+    "DROP TRIGGER IF EXISTS services_service_fts_ai",
+    "DROP TRIGGER IF EXISTS services_service_fts_ad",
+    "DROP TRIGGER IF EXISTS services_service_fts_au",
+    "DROP TABLE IF EXISTS services_service_fts",
+]
+
+POSTGRES_SETUP = [
+    """ALTER TABLE services_service ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(short_description, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(full_description, '')), 'C')
+        ) STORED""",
+    "CREATE INDEX IF NOT EXISTS services_service_search_vector_idx ON services_service USING GIN (search_vector)",
+]
+
+POSTGRES_TEARDOWN = [
+    "DROP INDEX IF EXISTS services_service_search_vector_idx",
+    "ALTER TABLE services_service DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run_statements(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def install(apps, schema_editor):
+    run_statements(schema_editor, {'sqlite': SQLITE_SETUP, 'postgresql': POSTGRES_SETUP})
+
+
+def uninstall(apps, schema_editor):
+    run_statements(schema_editor, {'sqlite': SQLITE_TEARDOWN, 'postgresql': POSTGRES_TEARDOWN})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0002_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+        migrations.CreateModel(
+            name='ServiceSearchIndex',
+            fields=[
+                ('service', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='services.service')),
+            ],
+            options={
+                'db_table': 'services_service_fts',
+                'managed': False,
+            },
+        ),
+    ]
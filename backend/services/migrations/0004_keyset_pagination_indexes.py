@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-18 12:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0003_service_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['order', 'title', 'id'], name='service_order_title_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceinquiry',
+            index=models.Index(fields=['-created_at', '-id'], name='inquiry_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(fields=['-created_at', '-id'], name='testimonial_created_id_idx'),
+        ),
+    ]
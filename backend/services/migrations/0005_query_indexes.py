@@ -0,0 +1,67 @@
+# Generated by Django 5.0.1 on 2026-10-18 12:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0004_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(condition=models.Q(('status__in', ['active', 'featured'])), fields=['order', 'title', 'id'], name='service_public_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(condition=models.Q(('status__in', ['active', 'featured'])), fields=['category', 'order', 'title', 'id'], name='service_public_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(condition=models.Q(('status', 'featured')), fields=['order', 'title', 'id'], name='service_featured_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['category', 'status'], name='service_category_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicecategory',
+            index=models.Index(fields=['order', 'name'], name='category_order_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicecategory',
+            index=models.Index(fields=['updated_at'], name='category_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceinquiry',
+            index=models.Index(fields=['email', '-created_at', '-id'], name='inquiry_email_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceinquiry',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='inquiry_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceinquiry',
+            index=models.Index(fields=['service', '-created_at', '-id'], name='inquiry_service_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceinquiry',
+            index=models.Index(fields=['updated_at'], name='inquiry_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='testimonial_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['service', '-created_at', '-id'], name='testimonial_active_service_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_featured', True)), fields=['-created_at', '-id'], name='testimonial_featured_idx'),
+        ),
+    ]
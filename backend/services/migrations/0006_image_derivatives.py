@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-18 12:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0005_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='service',
+            name='image_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized copies of the image, see services.images'),
+        ),
+        migrations.AddField(
+            model_name='testimonial',
+            name='client_image_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized copies of the client image, see services.images'),
+        ),
+        migrations.AlterField(
+            model_name='job',
+            name='kind',
+            field=models.CharField(choices=[('import_service_categories', 'Import service categories'), ('import_services', 'Import services'), ('export_service_categories', 'Export service categories'), ('export_services', 'Export services'), ('image_derivatives', 'Generate image derivatives')], max_length=50),
+        ),
+    ]
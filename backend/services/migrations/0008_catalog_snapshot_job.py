@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 13:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0007_outbox'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='kind',
+            field=models.CharField(choices=[('import_service_categories', 'Import service categories'), ('import_services', 'Import services'), ('export_service_categories', 'Export service categories'), ('export_services', 'Export services'), ('image_derivatives', 'Generate image derivatives'), ('catalog_snapshot', 'Rebuild catalog snapshot')], max_length=50),
+        ),
+    ]
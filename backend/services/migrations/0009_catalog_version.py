@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-18 13:51
+
+import django.utils.timezone
+import services.models
+from django.db import migrations, models
+
+
+def create_catalog_version(apps, schema_editor):
+    apps.get_model('services', 'CatalogVersion').objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0008_catalog_snapshot_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=services.models.initial_catalog_version)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Last catalog write, dating every catalog route')),
+            ],
+        ),
+        migrations.RunPython(create_catalog_version, migrations.RunPython.noop),
+    ]
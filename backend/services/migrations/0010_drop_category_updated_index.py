@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-18 13:55
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0009_catalog_version'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='servicecategory',
+            name='category_updated_idx',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 13:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0010_drop_category_updated_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='delivered_to',
+            field=models.JSONField(blank=True, default=list, help_text='Recipients already emailed; retries skip them'),
+        ),
+    ]
@@ -1,8 +1,38 @@
+import time
+
 from django.db import models
+from django.db.models import Count, F, Prefetch, Q, Window
+from django.db.models.functions import RowNumber
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.utils.text import slugify
 
 
+class ServiceCategoryQuerySet(models.QuerySet):
+    def with_service_counts(self):
+        """Annotate per-status service counts in the same query as the categories"""
+        return self.annotate(
+            active_services_count=Count('services', filter=Q(services__status='active')),
+            featured_services_count=Count('services', filter=Q(services__status='featured')),
+            inactive_services_count=Count('services', filter=Q(services__status='inactive')),
+        )
+
+
+class ServiceQuerySet(models.QuerySet):
+    def with_top_testimonials(self, limit=3):
+        """
+        Prefetch the newest ``limit`` active testimonials of every service
+        into ``top_testimonials``, numbering rows per service with a window
+        function so the whole page costs one query.
+        """
+        testimonials = Testimonial.objects.filter(is_active=True).annotate(
+            row_number=Window(
+                RowNumber(), partition_by=F('service_id'), order_by=[F('created_at').desc(), F('id').desc()]
+            )
+        ).filter(row_number__lte=limit).order_by('-created_at', '-id')
+        return self.prefetch_related(Prefetch('testimonials', queryset=testimonials, to_attr='top_testimonials'))
+
+
 class ServiceCategory(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
@@ -11,9 +41,14 @@ class ServiceCategory(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ServiceCategoryQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = "Service Categories"
         ordering = ['order', 'name']
+        indexes = [
+            models.Index(fields=['order', 'name'], name='category_order_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -33,6 +68,9 @@ class Service(models.Model):
     full_description = models.TextField()
     icon = models.CharField(max_length=50, blank=True)
     image = models.ImageField(upload_to='services/', blank=True, null=True)
+    image_derivatives = models.JSONField(
+        default=dict, blank=True, editable=False, help_text="Resized copies of the image, see services.images"
+    )
     price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     price_unit = models.CharField(max_length=50, default='per case', blank=True)
     duration = models.CharField(max_length=100, blank=True, help_text="e.g., '1-2 weeks'")
@@ -43,8 +81,29 @@ class Service(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='services_created')
 
+    objects = ServiceQuerySet.as_manager()
+
     class Meta:
         ordering = ['order', 'title']
+        indexes = [
+            # Keyset pagination key, see services.pagination
+            models.Index(fields=['order', 'title', 'id'], name='service_order_title_id_idx'),
+            # Public catalog: status IN (active, featured) ordered by order, title
+            models.Index(
+                fields=['order', 'title', 'id'], name='service_public_order_idx',
+                condition=Q(status__in=['active', 'featured'])
+            ),
+            models.Index(
+                fields=['category', 'order', 'title', 'id'], name='service_public_category_idx',
+                condition=Q(status__in=['active', 'featured'])
+            ),
+            models.Index(
+                fields=['order', 'title', 'id'], name='service_featured_order_idx',
+                condition=Q(status='featured')
+            ),
+            # Per-status service counts on the category list
+            models.Index(fields=['category', 'status'], name='service_category_status_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -55,6 +114,23 @@ class Service(models.Model):
         return self.title
 
 
+class ServiceSearchIndex(models.Model):
+    """
+    The SQLite FTS5 table over services, kept in sync by triggers.
+
+    Only used to join search results to their FTS row; the table is created
+    by migration and does not exist on PostgreSQL (see services.search).
+    """
+    service = models.OneToOneField(
+        Service, primary_key=True, db_column='rowid', db_constraint=False,
+        on_delete=models.DO_NOTHING, related_name='search_index'
+    )
+
+    class Meta:
+        managed = False
+        db_table = 'services_service_fts'
+
+
 class ServiceInquiry(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -79,6 +155,14 @@ class ServiceInquiry(models.Model):
     class Meta:
         verbose_name_plural = "Service Inquiries"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='inquiry_created_id_idx'),
+            # Clients list their own inquiries by email; staff filter by status and service
+            models.Index(fields=['email', '-created_at', '-id'], name='inquiry_email_created_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='inquiry_status_created_idx'),
+            models.Index(fields=['service', '-created_at', '-id'], name='inquiry_service_created_idx'),
+            models.Index(fields=['updated_at'], name='inquiry_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.service.title}"
@@ -90,6 +174,9 @@ class Testimonial(models.Model):
     client_title = models.CharField(max_length=200, blank=True)
     client_company = models.CharField(max_length=200, blank=True)
     client_image = models.ImageField(upload_to='testimonials/', blank=True, null=True)
+    client_image_derivatives = models.JSONField(
+        default=dict, blank=True, editable=False, help_text="Resized copies of the client image, see services.images"
+    )
     rating = models.IntegerField(default=5, choices=[(i, i) for i in range(1, 6)])
     content = models.TextField()
     is_featured = models.BooleanField(default=False)
@@ -98,6 +185,116 @@ class Testimonial(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='testimonial_created_id_idx'),
+            # Public reads only see active testimonials
+            models.Index(
+                fields=['-created_at', '-id'], name='testimonial_active_idx',
+                condition=Q(is_active=True)
+            ),
+            models.Index(
+                fields=['service', '-created_at', '-id'], name='testimonial_active_service_idx',
+                condition=Q(is_active=True)
+            ),
+            models.Index(
+                fields=['-created_at', '-id'], name='testimonial_featured_idx',
+                condition=Q(is_active=True, is_featured=True)
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.client_name} - {self.rating} stars"
+
+
+class Job(models.Model):
+    KIND_CHOICES = [
+        ('import_service_categories', 'Import service categories'),
+        ('import_services', 'Import services'),
+        ('export_service_categories', 'Export service categories'),
+        ('export_services', 'Export services'),
+        ('image_derivatives', 'Generate image derivatives'),
+        ('catalog_snapshot', 'Rebuild catalog snapshot'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    payload = models.JSONField(default=dict, blank=True)
+    input_file = models.FileField(upload_to='jobs/input/', blank=True, null=True)
+    result_file = models.FileField(upload_to='jobs/results/', blank=True, null=True)
+    result = models.JSONField(default=dict, blank=True, help_text="Import summary or export details")
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Percent complete")
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.status})"
+
+
+class OutboxMessage(models.Model):
+    """
+    A notification recorded in the same transaction as the change it reports,
+    delivered later by ``manage.py process_outbox`` (see services.outbox).
+    """
+    TOPIC_CHOICES = [
+        ('inquiry_created', 'Inquiry created'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    topic = models.CharField(max_length=50, choices=TOPIC_CHOICES)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(help_text="Not delivered before this time (retry backoff)")
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    claim = models.UUIDField(null=True, blank=True, help_text="Worker batch that is delivering the message")
+    sent_at = models.DateTimeField(null=True, blank=True)
+    delivered_to = models.JSONField(
+        default=list, blank=True, help_text="Recipients already emailed; retries skip them"
+    )
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='outbox_status_available_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_topic_display()} #{self.pk} ({self.status})"
+
+
+def initial_catalog_version():
+    # Seeded from the clock so a recreated row never reuses versions still in the cache
+    return time.time_ns() // 1000
+
+
+class CatalogVersion(models.Model):
+    """
+    The single row versioning the catalog, bumped after every catalog write
+    so all processes agree on which cached pages are current (see services.cache).
+    """
+    version = models.PositiveBigIntegerField(default=initial_catalog_version)
+    changed_at = models.DateTimeField(default=timezone.now, help_text="Last catalog write, dating every catalog route")
 
     def __str__(self):
-        return f"{self.client_name} - {self.rating} stars"
\ No newline at end of file
+        return f"Catalog version {self.version}"
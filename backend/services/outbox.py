@@ -0,0 +1,153 @@
+"""
+Transactional outbox for staff notifications.
+
+Creating an inquiry records an ``OutboxMessage`` in the same transaction
+(``add_to_outbox``); nothing is sent on the request path, so a slow or failing
+mail server cannot delay or break the submission. ``manage.py
+process_outbox`` claims due messages once the oldest has waited
+``OUTBOX_DIGEST_WINDOW`` seconds, groups them per recipient (the inquiry's
+assignee, or ``INQUIRY_NOTIFICATION_EMAILS`` / active staff while
+unassigned) and sends one digest per recipient over a single backend
+connection. Each message records the recipients it reached, so a failed
+delivery is retried with exponential backoff for the other recipients
+only; messages left ``sending`` by a crashed worker are reclaimed after
+``CLAIM_TIMEOUT``.
+"""
+import logging
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import OutboxMessage, ServiceInquiry
+
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF = timedelta(minutes=1)
+CLAIM_TIMEOUT = timedelta(minutes=10)
+CLAIM_BATCH_SIZE = 500
+
+
+def add_to_outbox(topic, **payload):
+    """Add a message to the outbox; call inside the transaction that makes the change"""
+    return OutboxMessage.objects.create(topic=topic, payload=payload, available_at=timezone.now())
+
+
+def claim_due_messages(window, limit=CLAIM_BATCH_SIZE):
+    """
+    Atomically move up to ``limit`` due messages to ``sending`` and return
+    them, or nothing while the oldest has waited less than ``window``.
+    """
+    now = timezone.now()
+    OutboxMessage.objects.filter(status='sending', claimed_at__lt=now - CLAIM_TIMEOUT).update(
+        status='pending', claim=None, claimed_at=None
+    )
+    due = OutboxMessage.objects.filter(status='pending', available_at__lte=now)
+    if not due.filter(available_at__lte=now - window).exists():
+        return []
+
+    claim = uuid.uuid4()
+    ids = list(due.order_by('available_at', 'pk').values_list('pk', flat=True)[:limit])
+    # The status condition makes concurrent workers claim disjoint rows
+    OutboxMessage.objects.filter(pk__in=ids, status='pending').update(status='sending', claim=claim, claimed_at=now)
+    return list(OutboxMessage.objects.filter(claim=claim).order_by('created_at', 'pk'))
+
+
+def default_recipients():
+    if settings.INQUIRY_NOTIFICATION_EMAILS:
+        return list(settings.INQUIRY_NOTIFICATION_EMAILS)
+    staff = User.objects.filter(is_staff=True, is_active=True).exclude(email='').order_by('pk')
+    return list(staff.values_list('email', flat=True))
+
+
+def inquiry_digest(inquiries):
+    subject = (
+        f'New service inquiry: {inquiries[0].name} ({inquiries[0].service.title})' if len(inquiries) == 1
+        else f'{len(inquiries)} new service inquiries'
+    )
+    body = render_to_string('services/inquiry_digest.txt', {
+        'inquiries': [
+            (inquiry, settings.BACKEND_URL + reverse('admin:services_serviceinquiry_change', args=[inquiry.pk]))
+            for inquiry in inquiries
+        ],
+    })
+    return subject, body
+
+
+def deliver(messages):
+    """Send ``messages`` as per-recipient digests and record the outcome; returns the number of emails sent"""
+    inquiries = ServiceInquiry.objects.select_related('service', 'assigned_to').in_bulk(
+        [message.payload['inquiry'] for message in messages]
+    )
+    fallback = None
+    digests = defaultdict(list)
+    failed = {}
+    for message in messages:
+        inquiry = inquiries.get(message.payload['inquiry'])
+        if inquiry is None:
+            # Deleted before delivery; nothing to report
+            continue
+        if inquiry.assigned_to and inquiry.assigned_to.email:
+            recipients = [inquiry.assigned_to.email]
+        else:
+            fallback = default_recipients() if fallback is None else fallback
+            recipients = fallback
+        if not recipients:
+            failed[message.pk] = 'No recipients: set INQUIRY_NOTIFICATION_EMAILS or give staff users an email'
+        for recipient in recipients:
+            if recipient not in message.delivered_to:
+                digests[recipient].append((message, inquiry))
+
+    emails = 0
+    try:
+        with get_connection() as connection:
+            for recipient, entries in digests.items():
+                subject, body = inquiry_digest([inquiry for _, inquiry in entries])
+                try:
+                    EmailMessage(subject, body, to=[recipient], connection=connection).send()
+                    emails += 1
+                except Exception as e:
+                    logger.exception("Outbox delivery to %s failed", recipient)
+                    for message, _ in entries:
+                        failed[message.pk] = f'{recipient}: {e}'
+                else:
+                    for message, _ in entries:
+                        message.delivered_to.append(recipient)
+    except Exception as e:
+        # Opening or closing the connection failed; retry whatever was not sent
+        logger.exception("Outbox delivery failed")
+        for recipient, entries in digests.items():
+            for message, _ in entries:
+                if recipient not in message.delivered_to:
+                    failed.setdefault(message.pk, str(e))
+
+    finish(messages, failed)
+    return emails
+
+
+def finish(messages, failed):
+    now = timezone.now()
+    sent = [message.pk for message in messages if message.pk not in failed]
+    OutboxMessage.objects.filter(pk__in=sent).update(status='sent', sent_at=now, claim=None, error='')
+    retries = []
+    for message in messages:
+        if message.pk not in failed:
+            continue
+        message.attempts += 1
+        message.error = failed[message.pk]
+        message.claim = None
+        if message.attempts >= MAX_ATTEMPTS:
+            message.status = 'failed'
+        else:
+            message.status = 'pending'
+            message.available_at = now + RETRY_BACKOFF * 2 ** (message.attempts - 1)
+        retries.append(message)
+    OutboxMessage.objects.bulk_update(retries, ['attempts', 'error', 'claim', 'status', 'available_at', 'delivered_to'])
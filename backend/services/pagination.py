@@ -0,0 +1,191 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are selected with ``WHERE (key) > (last key seen)`` on a unique,
+indexed ordering instead of OFFSET, so page 1000 costs the same as page 1.
+Cursors are opaque base64 tokens holding the boundary row's key values.
+
+For existing clients, which expect a bare list, a list route is only
+paginated when the request carries ``cursor`` or ``page_size``; set
+``API_PAGINATION_COMPAT = False`` to always paginate.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def key_value(value):
+    """JSON-safe cursor value; datetimes keep their microseconds"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def keyset_filter(ordering, values):
+    """
+    Rows strictly after ``values`` in ``ordering``, expanded as
+    ``a > x OR (a = x AND b > y) OR ...`` with a leading range on the first
+    column so the composite index can be used for a range scan.
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    first = ordering[0]
+    leading = Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": values[0]})
+    return leading & condition
+
+
+def reverse_ordering(ordering):
+    return [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginate on the view's ``keyset_ordering``, which must end in a unique,
+    non-null column. The ``ordering`` query parameter is not applied to
+    paginated responses.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 20
+    max_page_size = 100
+    keyset_ordering = ('-created_at', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        return list(getattr(view, 'keyset_ordering', self.keyset_ordering))
+
+    def is_requested(self, request):
+        if not getattr(settings, 'API_PAGINATION_COMPAT', True):
+            return True
+        return self.cursor_query_param in request.query_params or self.page_size_query_param in request.query_params
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, obj, reverse):
+        # Rows are model instances, or dicts on the values() fast path
+        get = obj.get if isinstance(obj, dict) else lambda name: getattr(obj, name)
+        values = [key_value(get(field.lstrip('-'))) for field in self.ordering]
+        token = urlsafe_b64encode(json.dumps({'k': values, 'r': reverse}).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request, queryset):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            data = json.loads(urlsafe_b64decode(token.encode()))
+            values, reverse = data['k'], bool(data['r'])
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return [self.to_python(queryset, field, value) for field, value in zip(self.ordering, values)], reverse
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound('Invalid cursor')
+
+    def to_python(self, queryset, field, value):
+        try:
+            return queryset.model._meta.get_field(field.lstrip('-')).to_python(value)
+        except FieldDoesNotExist:
+            # Annotations such as search_rank are stored as plain JSON values
+            return value
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.base_url = remove_query_param(request.build_absolute_uri(), self.cursor_query_param)
+        self.ordering = self.get_ordering(request, queryset, view)
+        page_size = self.get_page_size(request)
+        values, reverse = self.decode_cursor(request, queryset)
+
+        ordering = reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(keyset_filter(ordering, values))
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+        self.page = results
+        return results
+
+    def get_next_link(self):
+        if not (self.has_next and self.page):
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not (self.has_previous and self.page):
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': f'Number of results to return per page (at most {self.max_page_size}).',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+
+class ServiceKeysetPagination(KeysetPagination):
+    """Page search results by rank, everything else by the catalog order"""
+    keyset_ordering = ('order', 'title', 'id')
+
+    def get_ordering(self, request, queryset, view):
+        if 'search_rank' in queryset.query.annotations:
+            return ['-search_rank', 'id']
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,185 @@
+"""
+Full-text search over services.
+
+PostgreSQL uses a stored, generated ``search_vector`` tsvector column with a
+GIN index; SQLite uses an external-content FTS5 table kept in sync by
+triggers. Both are maintained by the database itself, so regular saves,
+bulk_create and the Excel importers all stay indexed. Other databases fall
+back to DRF's icontains SearchFilter.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, TextField
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+
+SEARCH_TABLE = 'services_service'
+FTS_TABLE = 'services_service_fts'
+SNIPPET_START = '<mark>'
+SNIPPET_END = '</mark>'
+
+SQLITE_SETUP = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, short_description, full_description,
+        content='{SEARCH_TABLE}', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {SEARCH_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, short_description, full_description)
+        VALUES (new.id, new.title, new.short_description, new.full_description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {SEARCH_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, short_description, full_description)
+        VALUES ('delete', old.id, old.title, old.short_description, old.full_description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {SEARCH_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, short_description, full_description)
+        VALUES ('delete', old.id, old.title, old.short_description, old.full_description);
+        INSERT INTO {FTS_TABLE}(rowid, title, short_description, full_description)
+        VALUES (new.id, new.title, new.short_description, new.full_description);
+    END""",
+]
+
+SQLITE_TEARDOWN = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_SETUP = [
+    f"""ALTER TABLE {SEARCH_TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(short_description, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(full_description, '')), 'C')
+        ) STORED""",
+    f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_search_vector_idx ON {SEARCH_TABLE} USING GIN (search_vector)",
+]
+
+POSTGRES_TEARDOWN = [
+    f"DROP INDEX IF EXISTS {SEARCH_TABLE}_search_vector_idx",
+    f"ALTER TABLE {SEARCH_TABLE} DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def search_words(text):
+    """Split user input into plain words; query syntax characters are dropped"""
+    return re.findall(r'\w+', text)
+
+
+class PostgresSearchBackend:
+    def __init__(self, words):
+        # Every word must match, the last one as a prefix
+        self.query = ' & '.join(f'{word}:*' if i == len(words) - 1 else word for i, word in enumerate(words))
+
+    def search(self, queryset):
+        tsquery = "to_tsquery('english', %s)"
+        return queryset.filter(
+            RawSQL(f"{SEARCH_TABLE}.search_vector @@ {tsquery}", [self.query], output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(f"ts_rank({SEARCH_TABLE}.search_vector, {tsquery})", [self.query], output_field=FloatField()),
+            search_snippet=RawSQL(
+                f"ts_headline('english', {SEARCH_TABLE}.title || ' ' || {SEARCH_TABLE}.short_description, {tsquery}, "
+                f"'StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, MaxWords=30, MinWords=10')",
+                [self.query], output_field=TextField()
+            ),
+        )
+
+
+class SQLiteSearchBackend:
+    def __init__(self, words):
+        # Every word must match, the last one as a prefix
+        self.query = ' '.join(f'"{word}"*' if i == len(words) - 1 else f'"{word}"' for i, word in enumerate(words))
+
+    def search(self, queryset):
+        # Join the FTS table once (via ServiceSearchIndex) so bm25() and snippet()
+        # are evaluated on the matching rows instead of a subquery per service
+        return queryset.filter(search_index__isnull=False).filter(
+            RawSQL(f"{FTS_TABLE} MATCH %s", [self.query], output_field=BooleanField())
+        ).annotate(
+            # bm25() is lower-is-better; negate so both backends rank descending
+            search_rank=RawSQL(f"-bm25({FTS_TABLE}, 10.0, 4.0, 1.0)", [], output_field=FloatField()),
+            search_snippet=RawSQL(
+                f"snippet({FTS_TABLE}, -1, '{SNIPPET_START}', '{SNIPPET_END}', '…', 16)",
+                [], output_field=TextField()
+            ),
+        )
+
+
+SEARCH_BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteSearchBackend,
+}
+
+
+def get_search_backend(using, text):
+    """Return a backend for the database alias, or None when full-text search is unavailable"""
+    backend_class = SEARCH_BACKENDS.get(connections[using].vendor)
+    words = search_words(text)
+    if backend_class is None or not words:
+        return None
+    return backend_class(words)
+
+
+def install_search_index(connection):
+    statements = {'sqlite': SQLITE_SETUP, 'postgresql': POSTGRES_SETUP}.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+        if connection.vendor == 'sqlite':
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def uninstall_search_index(connection):
+    statements = {'sqlite': SQLITE_TEARDOWN, 'postgresql': POSTGRES_TEARDOWN}.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def ensure_search_index(using):
+    """
+    Re-create missing SQLite FTS triggers after migrations.
+
+    SQLite applies many ALTER TABLE operations by rebuilding the table,
+    which silently drops its triggers; rebuild the index if that happened.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+            [f'{FTS_TABLE}_%'],
+        )
+        installed = cursor.fetchone()[0]
+        cursor.execute("SELECT count(*) FROM sqlite_master WHERE name = %s", [SEARCH_TABLE])
+        has_table = cursor.fetchone()[0]
+    if has_table and installed < 3:
+        install_search_index(connection)
+
+
+class ServiceSearchFilter(filters.SearchFilter):
+    """
+    Ranked full-text search on ``?search=`` with prefix matching.
+
+    Matching services are annotated with ``search_rank`` and a
+    ``search_snippet`` in which matches are wrapped in ``<mark>`` tags.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        backend = get_search_backend(queryset.db, ' '.join(self.get_search_terms(request)))
+        if backend is None:
+            return super().filter_queryset(request, queryset, view)
+        return backend.search(queryset)
+
+
+class SearchRankOrderingFilter(filters.OrderingFilter):
+    """Order search results by rank unless the client asked for an explicit ordering"""
+
+    def get_ordering(self, request, queryset, view):
+        if not request.query_params.get(self.ordering_param) and 'search_rank' in queryset.query.annotations:
+            return ['-search_rank'] + list(self.get_default_ordering(view) or [])
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,125 @@
+"""
+Synthetic catalog data for benchmarks and query-plan checks.
+
+Seeded rows are recognisable by their prefix (category names, service
+slugs) so they can be removed again without touching real content.
+"""
+import random
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .importers import bulk_update_rows
+from .models import Service, ServiceCategory, ServiceInquiry, Testimonial
+from .snapshot import invalidate_catalog
+
+
+SEED_PREFIX = 'seed'
+SEED_BATCH_SIZE = 2000
+
+TOPICS = [
+    'Company Formation', 'Trademark Registration', 'Contract Review', 'Employment Law',
+    'Immigration', 'Property Transfer', 'Tax Advisory', 'Family Law', 'Litigation',
+    'Arbitration', 'Intellectual Property', 'Banking and Finance', 'Probate', 'Compliance',
+]
+FEATURES = [
+    'Initial consultation', 'Document drafting', 'Government filing', 'Court representation',
+    'Due diligence', 'Negotiation', 'Follow-up support', 'Translation', 'Notarisation',
+]
+STATUSES = ['active'] * 6 + ['featured', 'inactive']
+INQUIRY_STATUSES = [choice for choice, _ in ServiceInquiry.STATUS_CHOICES]
+CATALOG_MODELS = [ServiceCategory, Service, Testimonial]
+
+
+def clear_seeded_catalog(prefix=SEED_PREFIX):
+    """Delete previously seeded categories; services, inquiries and testimonials cascade"""
+    with transaction.atomic():
+        deleted, _ = ServiceCategory.objects.filter(name__startswith=f'{prefix.title()} ').delete()
+        invalidate_catalog(CATALOG_MODELS)
+    return deleted
+
+
+def seed_catalog(categories=20, services=500, testimonials=2000, inquiries=5000,
+                 clients=500, seed=0, prefix=SEED_PREFIX):
+    """
+    Bulk-create a synthetic catalog and return the row counts.
+
+    Services spread evenly over categories with a realistic status mix;
+    testimonials and inquiries spread over services, inquiries coming from
+    ``clients`` distinct ``client<n>@example.com`` addresses.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    label = prefix.title()
+
+    with transaction.atomic():
+        category_rows = ServiceCategory.objects.bulk_create([
+            ServiceCategory(
+                name=f'{label} {TOPICS[i % len(TOPICS)]} {i}',
+                description=f'Synthetic category {i}',
+                icon='fa-gavel',
+                order=i,
+            )
+            for i in range(categories)
+        ], batch_size=SEED_BATCH_SIZE)
+
+        service_rows = Service.objects.bulk_create((
+            Service(
+                title=f'{TOPICS[i % len(TOPICS)]} Service {i}',
+                slug=f'{prefix}-service-{i}',
+                category=category_rows[i % len(category_rows)],
+                short_description=f'{TOPICS[i % len(TOPICS)]} support for individuals and companies',
+                full_description=' '.join(rng.choices(TOPICS + FEATURES, k=40)),
+                features=rng.sample(FEATURES, rng.randint(2, 6)),
+                price=rng.randrange(2000, 200000, 500),
+                duration=f'{rng.randint(1, 4)}-{rng.randint(5, 8)} weeks',
+                icon='fa-file',
+                status=STATUSES[i % len(STATUSES)],
+                order=rng.randint(0, 100),
+            )
+            for i in range(services)
+        ), batch_size=SEED_BATCH_SIZE) if category_rows else []
+
+        testimonial_rows, inquiry_rows = [], []
+        if service_rows:
+            testimonial_rows = Testimonial.objects.bulk_create((
+                Testimonial(
+                    service=service_rows[i % len(service_rows)],
+                    client_name=f'Client {i}',
+                    client_company=f'Company {i % 97}',
+                    rating=rng.randint(3, 5),
+                    content='Clear advice and quick turnaround.',
+                    is_active=i % 10 != 0,
+                    is_featured=i % 20 == 0,
+                )
+                for i in range(testimonials)
+            ), batch_size=SEED_BATCH_SIZE)
+            inquiry_rows = ServiceInquiry.objects.bulk_create((
+                ServiceInquiry(
+                    service=service_rows[i % len(service_rows)],
+                    name=f'Client {i % clients}',
+                    email=f'client{i % clients}@example.com',
+                    phone='+8801700000000',
+                    message='I would like to know more about this service.',
+                    status=INQUIRY_STATUSES[i % len(INQUIRY_STATUSES)],
+                )
+                for i in range(inquiries)
+            ), batch_size=SEED_BATCH_SIZE)
+
+        # bulk_create stamps every row with the same auto_now_add time; spread
+        # created_at so ordering and keyset pagination see distinct values
+        for model, rows in ((Testimonial, testimonial_rows), (ServiceInquiry, inquiry_rows)):
+            for minutes, obj in enumerate(reversed(rows)):
+                obj.created_at = now - timedelta(minutes=minutes)
+            bulk_update_rows(model, rows, ['created_at'], SEED_BATCH_SIZE)
+
+        # Bulk writes skip post_save, so invalidate the catalog cache explicitly
+        invalidate_catalog(CATALOG_MODELS)
+
+    return {
+        'categories': len(category_rows),
+        'services': len(service_rows),
+        'testimonials': len(testimonial_rows),
+        'inquiries': len(inquiry_rows),
+    }
@@ -1,29 +1,79 @@
 from rest_framework import serializers
+from .images import srcset
 from .models import ServiceCategory, Service, ServiceInquiry, Testimonial
 from django.contrib.auth.models import User
 
 
+class ImageSrcsetField(serializers.Field):
+    """
+    ``{'webp': 'url 320w, url 640w', 'jpeg': ...}`` for the derivatives of
+    ``image_field`` (see services.images); empty until they have been generated.
+    """
+    def __init__(self, image_field, **kwargs):
+        self.image_field = image_field
+        kwargs['read_only'] = True
+        kwargs.setdefault('source', f'{image_field}_derivatives')
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        storage = self.parent.Meta.model._meta.get_field(self.image_field).storage
+        if request is None:
+            return srcset(value, storage.url)
+        return srcset(value, lambda name: request.build_absolute_uri(storage.url(name)))
+
+
 class ServiceCategorySerializer(serializers.ModelSerializer):
     services_count = serializers.SerializerMethodField()
+    status_counts = serializers.SerializerMethodField()
 
     class Meta:
         model = ServiceCategory
-        fields = ['id', 'name', 'description', 'icon', 'order', 'services_count', 'created_at']
+        fields = ['id', 'name', 'description', 'icon', 'order', 'services_count', 'status_counts', 'created_at']
         read_only_fields = ['created_at']
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The per-status breakdown is opt-in via ?include_status_counts=true
+        request = self.context.get('request')
+        if not (request and request.query_params.get('include_status_counts') in ('1', 'true', 'True')):
+            self.fields.pop('status_counts')
+
     def get_services_count(self, obj):
-        return obj.services.filter(status='active').count()
+        # Served from ServiceCategory.objects.with_service_counts() when available
+        count = getattr(obj, 'active_services_count', None)
+        if count is None:
+            return obj.services.filter(status='active').count()
+        return count
+
+    def get_status_counts(self, obj):
+        if not hasattr(obj, 'active_services_count'):
+            obj = ServiceCategory.objects.with_service_counts().get(pk=obj.pk)
+        return {
+            'active': obj.active_services_count,
+            'featured': obj.featured_services_count,
+            'inactive': obj.inactive_services_count,
+        }
 
 
 class ServiceListSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
+    image_srcset = ImageSrcsetField('image')
     
     class Meta:
         model = Service
         fields = ['id', 'title', 'slug', 'category', 'category_name', 'short_description', 
-                 'icon', 'image', 'price', 'price_unit', 'status', 'order', 'created_at']
+                 'icon', 'image', 'image_srcset', 'price', 'price_unit', 'status', 'order', 'created_at']
         read_only_fields = ['slug', 'created_at']
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Present only on ?search= results; matches in the snippet are wrapped in <mark>
+        if hasattr(instance, 'search_rank'):
+            data['search_rank'] = instance.search_rank
+            data['search_snippet'] = instance.search_snippet
+        return data
+
 
 class ServiceDetailSerializer(serializers.ModelSerializer):
     category = ServiceCategorySerializer(read_only=True)
@@ -34,14 +84,19 @@ class ServiceDetailSerializer(serializers.ModelSerializer):
     )
     testimonials = serializers.SerializerMethodField()
     created_by_name = serializers.CharField(source='created_by.username', read_only=True)
+    image_srcset = ImageSrcsetField('image')
 
     class Meta:
         model = Service
-        fields = '__all__'
+        exclude = ['image_derivatives']
         read_only_fields = ['slug', 'created_at', 'updated_at', 'created_by']
 
     def get_testimonials(self, obj):
-        testimonials = obj.testimonials.filter(is_active=True)[:3]
+        # Prefetched by Service.objects.with_top_testimonials() on the read paths
+        if hasattr(obj, 'top_testimonials'):
+            testimonials = obj.top_testimonials
+        else:
+            testimonials = obj.testimonials.filter(is_active=True).select_related('service')[:3]
         return TestimonialSerializer(testimonials, many=True).data
 
     def create(self, validated_data):
@@ -69,12 +124,38 @@ class ServiceInquiryAdminSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
 
 
+class ServiceInquiryBulkUpdateSerializer(serializers.Serializer):
+    """
+    Select inquiries by ``ids`` or by a ``filter`` on the list endpoint's
+    filter fields, and set any of ``status``, ``notes`` and ``assigned_to``.
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), min_length=1, max_length=1000, required=False
+    )
+    filter = serializers.DictField(required=False)
+    status = serializers.ChoiceField(choices=ServiceInquiry.STATUS_CHOICES, required=False)
+    notes = serializers.CharField(required=False, allow_blank=True)
+    assigned_to = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.filter(is_staff=True), required=False, allow_null=True
+    )
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError('Provide either ids or filter.')
+        if 'filter' in attrs and not attrs['filter']:
+            raise serializers.ValidationError({'filter': 'An empty filter would match every inquiry.'})
+        if not {'status', 'notes', 'assigned_to'} & attrs.keys():
+            raise serializers.ValidationError('Nothing to update; set status, notes or assigned_to.')
+        return attrs
+
+
 class TestimonialSerializer(serializers.ModelSerializer):
     service_title = serializers.CharField(source='service.title', read_only=True, allow_null=True)
+    client_image_srcset = ImageSrcsetField('client_image')
     
     class Meta:
         model = Testimonial
         fields = ['id', 'service', 'service_title', 'client_name', 'client_title', 
-                 'client_company', 'client_image', 'rating', 'content', 
+                 'client_company', 'client_image', 'client_image_srcset', 'rating', 'content', 
                  'is_featured', 'is_active', 'created_at']
         read_only_fields = ['created_at']
\ No newline at end of file
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from .images import needs_derivatives, reset_stale_derivatives
+from .jobs import enqueue_job
+from .models import ServiceCategory, Service, Testimonial
+from .snapshot import invalidate_catalog
+
+
+@receiver(post_save, sender=ServiceCategory)
+@receiver(post_save, sender=Service)
+@receiver(post_save, sender=Testimonial)
+@receiver(post_delete, sender=ServiceCategory)
+@receiver(post_delete, sender=Service)
+@receiver(post_delete, sender=Testimonial)
+def invalidate_catalog_cache(sender, **kwargs):
+    invalidate_catalog([sender])
+
+
+@receiver(pre_save, sender=Service)
+@receiver(pre_save, sender=Testimonial)
+def reset_image_derivatives(sender, instance, **kwargs):
+    reset_stale_derivatives(instance)
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_save, sender=Testimonial)
+def queue_image_derivatives(sender, instance, **kwargs):
+    # Resizing happens in run_jobs, off the request that uploaded the image
+    if needs_derivatives(instance):
+        enqueue_job('image_derivatives', payload={'model': sender._meta.label_lower, 'pk': instance.pk})
@@ -0,0 +1,235 @@
+"""
+Pre-rendered JSON snapshot of the public catalog.
+
+The snapshot holds what nearly every public page needs (categories,
+public services and featured testimonials) in one content-addressed file
+under ``MEDIA_ROOT/catalog/``, written next to gzip and (when the
+``brotli`` package is installed) brotli variants. nginx serves these
+files directly; ``/api/catalog/`` only redirects to the current version.
+
+Each section is also kept rendered on disk (shared by every worker), so a
+change only re-renders the sections that depend on the changed model.
+Changes queue that rebuild as a background job (``manage.py run_jobs``).
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+from legal_backend.renderers import ORJSONRenderer
+
+from .cache import bump_catalog_version
+from .models import Service, ServiceCategory, Testimonial
+from .serializers import ServiceCategorySerializer, ServiceListSerializer, TestimonialSerializer
+
+try:
+    import brotli
+except ImportError:  # optional; without it only gzip variants are written
+    brotli = None
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines build without a lock
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = 'catalog'
+SECTIONS_DIR = 'sections'
+MANIFEST_NAME = 'current.json'
+LOCK_NAME = '.lock'
+
+SECTIONS = ('categories', 'services', 'testimonials')
+
+# Sections whose rendered output reads from each model: category lists count
+# services, service rows carry category_name, testimonials carry service_title
+SECTION_DEPENDENCIES = {
+    ServiceCategory: ('categories', 'services'),
+    Service: ('categories', 'services', 'testimonials'),
+    Testimonial: ('testimonials',),
+}
+
+
+def render_categories():
+    queryset = ServiceCategory.objects.with_service_counts().order_by('order', 'name')
+    return ServiceCategorySerializer(queryset, many=True).data
+
+
+def render_services():
+    queryset = Service.objects.select_related('category').filter(status__in=['active', 'featured'])
+    return ServiceListSerializer(queryset, many=True).data
+
+
+def render_testimonials():
+    queryset = Testimonial.objects.select_related('service').filter(is_active=True, is_featured=True)
+    return TestimonialSerializer(queryset, many=True).data
+
+
+SECTION_RENDERERS = {
+    'categories': render_categories,
+    'services': render_services,
+    'testimonials': render_testimonials,
+}
+
+
+def snapshot_root():
+    return os.path.join(settings.MEDIA_ROOT, SNAPSHOT_DIR)
+
+
+def read_section(root, name):
+    try:
+        with open(os.path.join(root, SECTIONS_DIR, f'{name}.json'), 'rb') as section:
+            return section.read()
+    except OSError:
+        return None
+
+
+def render_section(root, name):
+    content = ORJSONRenderer().render(SECTION_RENDERERS[name]())
+    write_atomic(os.path.join(root, SECTIONS_DIR, f'{name}.json'), content)
+    return content
+
+
+@contextmanager
+def snapshot_lock(root):
+    """Serialise builds so concurrent workers never combine each other's stale sections"""
+    with open(os.path.join(root, LOCK_NAME), 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def write_atomic(path, content):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(content)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_manifest():
+    """Return ``{'version', 'url'}`` of the current snapshot, or None"""
+    try:
+        with open(os.path.join(snapshot_root(), MANIFEST_NAME), 'rb') as manifest:
+            return json.load(manifest)
+    except (OSError, ValueError):
+        return None
+
+
+def build_catalog_snapshot(sections=SECTIONS):
+    """
+    Re-render ``sections`` (reading the others from disk) and publish the result.
+
+    Returns the manifest. Nothing is written when the content is unchanged.
+    """
+    root = snapshot_root()
+    os.makedirs(os.path.join(root, SECTIONS_DIR), exist_ok=True)
+    with snapshot_lock(root):
+        return publish_snapshot(root, sections)
+
+
+def publish_snapshot(root, sections):
+    parts = []
+    for name in SECTIONS:
+        content = None if name in sections else read_section(root, name)
+        if content is None:
+            content = render_section(root, name)
+        parts.append(b'"%s":%s' % (name.encode(), content))
+    content = b'{' + b','.join(parts) + b'}'
+
+    version = hashlib.sha256(content).hexdigest()[:16]
+    current = read_manifest()
+    if current and current.get('version') == version:
+        return current
+
+    filename = f'catalog.{version}.json'
+    path = os.path.join(root, filename)
+    write_atomic(path, content)
+    write_atomic(path + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+    if brotli is not None:
+        write_atomic(path + '.br', brotli.compress(content, quality=11))
+
+    manifest = {'version': version, 'url': f'{settings.MEDIA_URL}{SNAPSHOT_DIR}/{filename}'}
+    write_atomic(os.path.join(root, MANIFEST_NAME), json.dumps(manifest).encode())
+    prune_snapshots(root, keep=getattr(settings, 'CATALOG_SNAPSHOT_KEEP', 5))
+    return manifest
+
+
+def prune_snapshots(root, keep):
+    """Delete all but the ``keep`` newest versions; clients may still follow older redirects"""
+    snapshots = sorted(
+        (entry for entry in os.scandir(root) if entry.name.startswith('catalog.') and entry.name.endswith('.json')),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in snapshots[keep:]:
+        for suffix in ('', '.gz', '.br'):
+            try:
+                os.unlink(entry.path + suffix)
+            except FileNotFoundError:
+                pass
+
+
+# Sections changed by the current thread's transactions but not yet queued.
+# A rolled-back change leaves its sections here; they are rebuilt (harmlessly)
+# with the next commit.
+_pending = threading.local()
+
+
+def schedule_snapshot_refresh(sections=SECTIONS):
+    """Mark ``sections`` stale; call from ``transaction.on_commit`` via ``refresh_pending_snapshot``"""
+    pending = getattr(_pending, 'sections', None)
+    if pending is None:
+        pending = _pending.sections = set()
+    pending.update(sections)
+
+
+def refresh_pending_snapshot():
+    """
+    Queue a ``catalog_snapshot`` job for the sections marked stale; run_jobs rebuilds them.
+
+    Writes no longer render the snapshot in the request. A burst of changes
+    shares one job: nothing is queued while a pending job already covers the
+    sections. A job that is already running may have rendered before this
+    commit, so it does not count.
+    """
+    from .jobs import enqueue_job
+    from .models import Job
+
+    sections = getattr(_pending, 'sections', None)
+    if not sections:
+        return
+    _pending.sections = set()
+    try:
+        for payload in Job.objects.filter(kind='catalog_snapshot', status='pending').values_list('payload', flat=True):
+            if sections.issubset(payload.get('sections', SECTIONS)):
+                return
+        enqueue_job('catalog_snapshot', payload={'sections': sorted(sections)})
+    except Exception:
+        # The API keeps working without a fresh snapshot; never fail the write
+        logger.exception("Could not queue a catalog snapshot rebuild")
+        schedule_snapshot_refresh(sections)
+
+
+def invalidate_catalog(models):
+    """
+    Invalidate the catalog cache and snapshot for changes to ``models``;
+    what the save signals do, for writes that send none (bulk writes,
+    ``QuerySet.update``) or to do it once for a batch.
+    """
+    # Bump after commit so readers never cache pre-commit rows under the new version
+    transaction.on_commit(bump_catalog_version)
+    for model in models:
+        schedule_snapshot_refresh(SECTION_DEPENDENCIES[model])
+    transaction.on_commit(refresh_pending_snapshot)
@@ -1,3 +1,1497 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from contextlib import redirect_stderr
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import openpyxl
+import pandas as pd
+from PIL import Image
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import F
+from django.test import AsyncClient, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path
+from django.utils import timezone
+from django.utils.http import http_date
+from django.utils.translation import gettext_lazy
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from legal_backend import renderers
+from legal_backend.instrumentation import RequestMetrics, collect_queries, registry
+from legal_backend.renderers import ORJSONParser, ORJSONRenderer
+from legal_backend.schema import LOADED as LOADED_SCHEMAS, schema_digest
+from legal_backend.throttling import LOCAL_BUCKETS, consume, consume_all
+from legal_backend.warmup import process_memory, warm_up
+
+from .admin_excel import write_service_categories_excel, write_services_excel
+from .async_views import async_catalog_urls, serves_async
+from .cache import LOCAL_CATALOG_VERSION, bump_catalog_version, get_catalog_version
+from .importers import import_service_categories, import_services
+from .jobs import claim_pending_jobs, enqueue_job, run_job
+from .search import ensure_search_index
+from .fast_serializers import ValuesSerializer
+from .images import update_derivatives
+from .serializers import (
+    ServiceDetailSerializer, ServiceInquiryAdminSerializer, ServiceInquirySerializer, ServiceListSerializer,
+    TestimonialSerializer,
+)
+from .snapshot import build_catalog_snapshot, read_manifest
+from .management.commands.run_jobs import Command as RunJobsCommand
+from .urls import router
+from .models import CatalogVersion, ServiceCategory, Service, ServiceInquiry, Testimonial, Job, OutboxMessage
+from .outbox import claim_due_messages, deliver
+
+
+def temporary_media_root(test):
+    """Point MEDIA_ROOT at a new directory that is removed when ``test`` finishes"""
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    test.enterContext(test.settings(MEDIA_ROOT=directory.name))
+    return directory.name
+
+
+def pin_catalog_version(test):
+    """Read the catalog version once, so requests in ``test`` only re-read it after a bump"""
+    LOCAL_CATALOG_VERSION.clear()
+    test.enterContext(test.settings(CATALOG_VERSION_REFRESH_INTERVAL=60))
+    get_catalog_version()
+
+
+def temporary_path(test, name):
+    """A path for ``name`` in a directory that is removed when ``test`` finishes"""
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    return os.path.join(directory.name, name)
+
+
+def make_service(category, title, status='active', **kwargs):
+    kwargs.setdefault('short_description', f'{title} short')
+    kwargs.setdefault('full_description', f'{title} full')
+    return Service.objects.create(title=title, category=category, status=status, **kwargs)
+
+
+class ServiceCategoryCountsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        pin_catalog_version(self)
+        self.client = APIClient()
+
+    def make_categories(self, count):
+        for i in range(count):
+            category = ServiceCategory.objects.create(name=f'Category {i}', order=i)
+            make_service(category, f'Active {i}')
+            make_service(category, f'Featured {i}', status='featured')
+            make_service(category, f'Inactive {i}', status='inactive')
+
+    def test_list_query_count_is_constant(self):
+        # Only the annotated category query
+        self.make_categories(2)
+        with self.assertNumQueries(1):
+            self.client.get('/api/categories/')
+
+        ServiceCategory.objects.all().delete()
+        self.make_categories(10)
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/categories/')
+        self.assertEqual(len(response.json()), 10)
+
+    def test_services_count_counts_active_only(self):
+        self.make_categories(1)
+        data = self.client.get('/api/categories/').json()
+        self.assertEqual(data[0]['services_count'], 1)
+        self.assertNotIn('status_counts', data[0])
+
+    def test_status_counts_opt_in(self):
+        self.make_categories(3)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/categories/?include_status_counts=true')
+        self.assertEqual(
+            response.json()[0]['status_counts'],
+            {'active': 1, 'featured': 1, 'inactive': 1}
+        )
+
+    def test_service_detail_nested_category_count(self):
+        self.make_categories(1)
+        service = Service.objects.get(title='Active 0')
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/services/{service.slug}/')
+        self.assertEqual(response.json()['category']['services_count'], 1)
+
+
+class ServiceSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.category = ServiceCategory.objects.create(name='Corporate')
+        make_service(self.category, 'Company Registration', full_description='Incorporate a new company')
+        make_service(self.category, 'Trademark Filing', short_description='Register a trademark for your brand')
+        make_service(self.category, 'Registered Office', status='inactive')
+
+    def search(self, query, **params):
+        return self.client.get('/api/services/', {'search': query, **params}).json()
+
+    def test_prefix_match_ranks_title_hits_first(self):
+        results = self.search('regist')
+        self.assertEqual([item['title'] for item in results], ['Company Registration', 'Trademark Filing'])
+        self.assertGreater(results[0]['search_rank'], results[1]['search_rank'])
+        self.assertIn('<mark>', results[0]['search_snippet'])
+
+    def test_all_words_must_match(self):
+        self.assertEqual([item['title'] for item in self.search('trademark brand')], ['Trademark Filing'])
+        self.assertEqual(self.search('trademark company'), [])
+
+    def test_explicit_ordering_overrides_rank(self):
+        results = self.search('regist', ordering='-title')
+        self.assertEqual([item['title'] for item in results], ['Trademark Filing', 'Company Registration'])
+
+    def test_query_syntax_is_ignored(self):
+        self.assertEqual(len(self.search('"regist*) (')), 2)
+        self.assertNotIn('search_rank', self.client.get('/api/services/').json()[0])
+
+    def test_index_follows_updates_and_bulk_writes(self):
+        service = Service.objects.get(title='Trademark Filing')
+        service.title = 'Patent Filing'
+        service.short_description = 'Protect an invention'
+        service.save()
+        Service.objects.bulk_create([Service(
+            title='Patent Search', slug='patent-search', category=self.category,
+            short_description='Prior art search', full_description='Search',
+        )])
+        cache.clear()
+        self.assertEqual(sorted(item['title'] for item in self.search('patent')), ['Patent Filing', 'Patent Search'])
+        self.assertEqual(self.search('brand'), [])
+
+    def test_index_restored_after_table_rebuild(self):
+        from django.db import connection
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER services_service_fts_ai")
+        ensure_search_index('default')
+        make_service(self.category, 'Patent Search')
+        self.assertEqual([item['title'] for item in self.search('patent')], ['Patent Search'])
+
+
+class TestimonialPrefetchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        pin_catalog_version(self)
+        self.client = APIClient()
+        self.category = ServiceCategory.objects.create(name='Corporate')
+
+    def add_testimonials(self, service, count, **kwargs):
+        return [
+            Testimonial.objects.create(service=service, client_name=f'{service.title} {i}', content='Good', **kwargs)
+            for i in range(count)
+        ]
+
+    def test_detail_query_count_with_testimonials(self):
+        service = make_service(self.category, 'Company Formation')
+        newest = self.add_testimonials(service, 5)[-3:]
+        self.add_testimonials(service, 2, is_active=False)
+        # Service + created_by, category counts, testimonials
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/services/{service.slug}/')
+        testimonials = response.json()['testimonials']
+        self.assertEqual([item['id'] for item in testimonials], [t.pk for t in reversed(newest)])
+        self.assertEqual(testimonials[0]['service_title'], 'Company Formation')
+
+    def test_top_testimonials_per_service(self):
+        services = [make_service(self.category, f'Service {i}') for i in range(4)]
+        for service in services:
+            self.add_testimonials(service, 4)
+        with self.assertNumQueries(2):
+            prefetched = list(Service.objects.with_top_testimonials())
+        self.assertEqual([len(service.top_testimonials) for service in prefetched], [3, 3, 3, 3])
+        self.assertTrue(all(
+            t.service_id == service.pk for service in prefetched for t in service.top_testimonials
+        ))
+
+    def test_testimonial_list_query_count_is_constant(self):
+        for i in range(5):
+            self.add_testimonials(make_service(self.category, f'Service {i}'), 2)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/testimonials/')
+        self.assertEqual(len(response.json()), 10)
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        temporary_media_root(self)
+        cache.clear()
+        pin_catalog_version(self)
+        self.client = APIClient()
+        self.category = ServiceCategory.objects.create(name='Corporate')
+        self.service = make_service(self.category, 'Company Formation', status='featured')
+
+    def test_repeat_request_served_from_cache(self):
+        first = self.client.get('/api/services/')
+        self.assertEqual(first['X-Catalog-Cache'], 'MISS')
+        # Validators come from the catalog version, so a hit touches no table
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/services/')
+        self.assertEqual(second['X-Catalog-Cache'], 'HIT')
+        self.assertEqual(first.content, second.content)
+
+    def test_query_params_are_part_of_the_key(self):
+        self.client.get(f'/api/services/by_category/?category_id={self.category.id}')
+        response = self.client.get('/api/services/by_category/?category_id=0')
+        self.assertEqual(response['X-Catalog-Cache'], 'MISS')
+        self.assertEqual(response.json(), [])
+
+    def test_model_changes_bump_version(self):
+        self.client.get('/api/services/featured/')
+        for change in (
+            lambda: self.service.save(),
+            lambda: self.category.save(),
+            lambda: Testimonial.objects.create(service=self.service, client_name='A', content='Good'),
+            lambda: Testimonial.objects.all().delete(),
+        ):
+            version = get_catalog_version()
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            self.assertGreater(get_catalog_version(), version)
+
+        self.service.title = 'Company Registration'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.save()
+        response = self.client.get('/api/services/featured/')
+        self.assertEqual(response['X-Catalog-Cache'], 'MISS')
+        self.assertEqual(response.json()[0]['title'], 'Company Registration')
+
+    @override_settings(CATALOG_VERSION_REFRESH_INTERVAL=0)
+    def test_version_is_shared_through_the_database(self):
+        version = get_catalog_version()
+        cache.clear()
+        self.assertEqual(get_catalog_version(), version)
+        # A bump by another process reaches this one without a shared cache
+        CatalogVersion.objects.update(version=F('version') + 1)
+        self.assertEqual(get_catalog_version(), version + 1)
+
+    def test_staff_bypass_cache(self):
+        staff = User.objects.create_user('staff', password='pass12345', is_staff=True)
+        self.client.force_authenticate(staff)
+        response = self.client.get('/api/services/')
+        self.assertFalse(response.has_header('X-Catalog-Cache'))
+
+
+class CatalogSnapshotTests(TestCase):
+    def setUp(self):
+        self.media_root = temporary_media_root(self)
+        self.enterContext(self.settings(MEDIA_URL='/media/'))
+        self.category = ServiceCategory.objects.create(name='Corporate')
+        self.service = make_service(self.category, 'Company Formation', status='featured')
+        make_service(self.category, 'Dormant', status='inactive')
+        Testimonial.objects.create(service=self.service, client_name='A', content='Good', is_featured=True)
+
+    def read_snapshot(self, manifest, suffix=''):
+        path = os.path.join(self.media_root, manifest['url'][len('/media/'):] + suffix)
+        with open(path, 'rb') as snapshot:
+            return snapshot.read()
+
+    def test_snapshot_matches_api_serializers(self):
+        manifest = build_catalog_snapshot()
+        content = self.read_snapshot(manifest)
+        self.assertEqual(gzip.decompress(self.read_snapshot(manifest, '.gz')), content)
+
+        data = json.loads(content)
+        self.assertEqual([c['services_count'] for c in data['categories']], [0])
+        self.assertEqual([s['slug'] for s in data['services']], ['company-formation'])
+        self.assertEqual(data['testimonials'][0]['service_title'], 'Company Formation')
+
+    def test_redirect_builds_on_first_use(self):
+        response = self.client.get('/api/catalog/')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], read_manifest()['url'])
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+    def save(self, obj):
+        with self.captureOnCommitCallbacks(execute=True):
+            obj.save()
+        # The commit queued the rebuild; run it as run_jobs would
+        for job_id in claim_pending_jobs(5):
+            run_job(job_id)
+
+    def test_changes_rebuild_dependent_sections_only(self):
+        first = build_catalog_snapshot()
+        # Unchanged content keeps the version and writes nothing
+        self.assertEqual(build_catalog_snapshot(), first)
+
+        self.save(Testimonial(service=self.service, client_name='B', content='Fast', is_featured=True))
+        second = read_manifest()
+        self.assertNotEqual(second['version'], first['version'])
+        self.assertEqual(len(json.loads(self.read_snapshot(second))['testimonials']), 2)
+
+        # A testimonial only re-renders its own section
+        with self.assertNumQueries(1):
+            build_catalog_snapshot(sections=['testimonials'])
+
+        self.service.title = 'Company Registration'
+        self.save(self.service)
+        data = json.loads(self.read_snapshot(read_manifest()))
+        self.assertEqual(data['services'][0]['title'], 'Company Registration')
+        self.assertEqual(data['testimonials'][0]['service_title'], 'Company Registration')
+
+    def test_changes_queue_one_rebuild_off_the_request(self):
+        first = build_catalog_snapshot()
+        for title in ('One', 'Two'):
+            self.service.title = title
+            with self.captureOnCommitCallbacks(execute=True):
+                self.service.save()
+        # Nothing rendered during the writes; one pending job covers both
+        self.assertEqual(read_manifest(), first)
+        jobs = Job.objects.filter(kind='catalog_snapshot')
+        self.assertEqual([job.status for job in jobs], ['pending'])
+        self.assertEqual(jobs[0].payload, {'sections': ['categories', 'services', 'testimonials']})
+
+        self.assertEqual(run_job(jobs[0].pk), 'completed')
+        self.assertEqual(json.loads(self.read_snapshot(read_manifest()))['services'][0]['title'], 'Two')
+
+    @override_settings(CATALOG_SNAPSHOT_KEEP=2)
+    def test_old_versions_are_pruned(self):
+        for title in ('One', 'Two', 'Three'):
+            self.service.title = title
+            self.save(self.service)
+        files = os.listdir(os.path.join(self.media_root, 'catalog'))
+        self.assertEqual(len([name for name in files if name.endswith('.json.gz')]), 2)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        pin_catalog_version(self)
+        self.client = APIClient()
+        self.category = ServiceCategory.objects.create(name='Property')
+        self.service = make_service(self.category, 'Land Registration')
+
+    def test_list_revalidation_skips_the_database(self):
+        response = self.client.get('/api/services/')
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(0):
+            revalidated = self.client.get('/api/services/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated['ETag'], response['ETag'])
+
+    def test_etag_changes_with_data(self):
+        etag = self.client.get('/api/services/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            make_service(self.category, 'Mutation')
+        response = self.client.get('/api/services/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_by_slug(self):
+        url = f'/api/services/{self.service.slug}/'
+        response = self.client.get(url)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304
+        )
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304
+        )
+        self.service.short_description = 'Updated'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.save()
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200
+        )
+
+    def test_missing_detail_still_404(self):
+        self.assertEqual(self.client.get('/api/services/missing/').status_code, 404)
+
+    def test_inquiry_list_per_user(self):
+        ServiceInquiry.objects.create(
+            service=self.service, name='A', email='a@example.com', phone='1', message='Hi'
+        )
+        staff = User.objects.create_user('staff', password='pass12345', is_staff=True)
+        self.client.force_authenticate(staff)
+        etag = self.client.get('/api/inquiries/')['ETag']
+        self.assertEqual(
+            self.client.get('/api/inquiries/', HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        other = User.objects.create_user('client', email='a@example.com', password='pass12345')
+        self.client.force_authenticate(other)
+        self.assertEqual(
+            self.client.get('/api/inquiries/', HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
+
+    def test_inquiry_list_revalidates_after_delete(self):
+        for name in ('A', 'B'):
+            ServiceInquiry.objects.create(
+                service=self.service, name=name, email='a@example.com', phone='1', message='Hi'
+            )
+        self.client.force_authenticate(User.objects.create_user('staff', is_staff=True))
+        response = self.client.get('/api/inquiries/')
+        # A delete leaves max(updated_at) unchanged, so the list is not dated
+        self.assertNotIn('Last-Modified', response)
+        self.assertIn('Last-Modified', self.client.get(f'/api/inquiries/{ServiceInquiry.objects.first().pk}/'))
+
+        self.client.delete(f'/api/inquiries/{ServiceInquiry.objects.get(name="B").pk}/')
+        self.assertEqual(
+            self.client.get('/api/inquiries/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200
+        )
+        self.assertEqual(
+            self.client.get('/api/inquiries/', HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)).status_code, 200
+        )
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.category = ServiceCategory.objects.create(name='Corporate')
+        for i in range(7):
+            # Duplicate order values so the title and id tie-breakers matter
+            make_service(self.category, f'Service {i}', order=i % 3)
+        service = Service.objects.first()
+        # Same created_at for every testimonial, so only the id breaks ties
+        Testimonial.objects.bulk_create([
+            Testimonial(service=service, client_name=f'Client {i}', content='Good') for i in range(5)
+        ])
+
+    def collect(self, url):
+        items, pages = [], 0
+        while url:
+            cache.clear()
+            data = self.client.get(url).json()
+            items += data['results']
+            url = data['next']
+            pages += 1
+        return items, pages
+
+    def test_bare_list_without_pagination_params(self):
+        data = self.client.get('/api/services/').json()
+        self.assertIsInstance(data, list)
+        self.assertEqual(len(data), 7)
+
+    @override_settings(API_PAGINATION_COMPAT=False)
+    def test_always_paginated_when_compat_disabled(self):
+        data = self.client.get('/api/services/').json()
+        self.assertEqual(len(data['results']), 7)
+        self.assertIsNone(data['next'])
+
+    def test_services_walk_in_catalog_order(self):
+        items, pages = self.collect('/api/services/?page_size=3')
+        expected = list(Service.objects.order_by('order', 'title', 'id').values_list('title', flat=True))
+        self.assertEqual([item['title'] for item in items], expected)
+        self.assertEqual(pages, 3)
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get('/api/services/?page_size=3').json()
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).json()
+        back = self.client.get(second['previous']).json()
+        self.assertEqual(back['results'], first['results'])
+        self.assertIsNone(back['previous'])
+
+    def test_testimonials_tie_break_on_id(self):
+        items, _ = self.collect('/api/testimonials/?page_size=2')
+        self.assertEqual(
+            [item['id'] for item in items],
+            list(Testimonial.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        )
+
+    def test_search_results_paginate_by_rank(self):
+        items, _ = self.collect('/api/services/?search=service&page_size=2')
+        self.assertEqual(len({item['id'] for item in items}), 7)
+        ranks = [item['search_rank'] for item in items]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+
+    def test_page_size_is_capped(self):
+        Testimonial.objects.bulk_create([Testimonial(client_name='X', content='Y') for _ in range(120)])
+        data = self.client.get('/api/testimonials/?page_size=1000').json()
+        self.assertEqual(len(data['results']), 100)
+
+    def test_invalid_cursor_is_404(self):
+        self.assertEqual(self.client.get('/api/inquiries/?cursor=bogus').status_code, 401)
+        staff = User.objects.create_user('staff', password='pass12345', is_staff=True)
+        self.client.force_authenticate(staff)
+        self.assertEqual(self.client.get('/api/inquiries/?cursor=bogus').status_code, 404)
+
+
+class AsyncCatalogUrls:
+    urlpatterns = [path('api/', include(async_catalog_urls(router.urls)))]
+
+
+@override_settings(ROOT_URLCONF=AsyncCatalogUrls)
+class AsyncCatalogViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        pin_catalog_version(self)
+        self.category = ServiceCategory.objects.create(name='Corporate', order=1)
+        ServiceCategory.objects.create(name='Family', order=2)
+        self.service = make_service(self.category, 'Company Formation', status='featured', order=2)
+        make_service(self.category, 'Trademarks', order=1)
+        make_service(self.category, 'Dormant', status='inactive')
+        Testimonial.objects.create(service=self.service, client_name='A', content='Good', is_featured=True)
+        Testimonial.objects.create(service=self.service, client_name='B', content='Hidden', is_active=False)
+
+    def get_async(self, url, **headers):
+        return async_to_sync(AsyncClient().get)(url, headers=headers)
+
+    def test_async_responses_match_drf(self):
+        testimonial = Testimonial.objects.get(client_name='A')
+        for url in (
+            '/api/categories/',
+            f'/api/categories/{self.category.pk}/',
+            '/api/services/',
+            f'/api/services/?category={self.category.pk}&status=active',
+            '/api/services/featured/',
+            f'/api/services/by_category/?category_id={self.category.pk}',
+            '/api/services/by_category/',
+            '/api/services/company-formation/',
+            '/api/services/dormant/',
+            '/api/testimonials/',
+            f'/api/testimonials/?service={self.service.pk}&is_featured=true',
+            '/api/testimonials/featured/',
+            f'/api/testimonials/{testimonial.pk}/',
+        ):
+            with self.subTest(url=url):
+                cache.clear()
+                with override_settings(ROOT_URLCONF='legal_backend.urls'):
+                    expected = APIClient().get(url)
+                cache.clear()
+                response = self.get_async(url)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(response.json(), expected.json())
+                for header in ('ETag', 'Last-Modified'):
+                    self.assertEqual(response.get(header), expected.get(header))
+
+    def test_async_conditional_requests(self):
+        for url in ('/api/categories/', '/api/services/', '/api/services/featured/', '/api/services/company-formation/'):
+            with self.subTest(url=url):
+                response = self.get_async(url)
+                self.assertIn('ETag', response)
+                revalidated = self.get_async(url, if_none_match=response['ETag'])
+                self.assertEqual(revalidated.status_code, 304)
+                self.assertEqual(revalidated['ETag'], response['ETag'])
+                self.assertEqual(
+                    self.get_async(url, if_modified_since=response['Last-Modified']).status_code, 304
+                )
+
+        # Conditional requests no longer fall back to the DRF views
+        self.assertTrue(serves_async(RequestFactory().get('/api/services/', HTTP_IF_NONE_MATCH='"x"'), ()))
+        response = self.get_async('/api/services/')
+        Service.objects.filter(pk=self.service.pk).update(title='Renamed')
+        bump_catalog_version()
+        self.assertEqual(self.get_async('/api/services/', if_none_match=response['ETag']).status_code, 200)
+
+    def test_catalog_cache_is_shared_with_drf(self):
+        with override_settings(ROOT_URLCONF='legal_backend.urls'):
+            APIClient().get('/api/services/')
+        response = self.get_async('/api/services/')
+        self.assertEqual(response['X-Catalog-Cache'], 'HIT')
+
+    def test_unsupported_requests_fall_back_to_drf(self):
+        staff = User.objects.create_user('staff', is_staff=True)
+        token = RefreshToken.for_user(staff).access_token
+        response = self.get_async('/api/services/', authorization=f'Bearer {token}')
+        self.assertIn('dormant', [service['slug'] for service in response.json()])
+
+        # Paginated and browsable API requests are served by the DRF views
+        self.assertIn('results', self.get_async('/api/services/?page_size=1').json())
+        self.assertFalse(serves_async(RequestFactory().get('/api/categories/', HTTP_ACCEPT='text/html'), ()))
+        self.assertEqual(self.get_async('/api/services/?category=abc').status_code, 400)
+
+    def test_async_queries_are_instrumented(self):
+        response = self.get_async('/api/testimonials/')
+        self.assertRegex(response['Server-Timing'], r'desc="1 queries"')
+
+
+class QueryPlanTests(TestCase):
+    def test_api_queries_use_indexes(self):
+        output = StringIO()
+        call_command('explain_queries', categories=5, services=200, inquiries=300, testimonials=200, stdout=output)
+        self.assertIn('No sequential scans', output.getvalue())
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class BenchmarkToolTests(TestCase):
+    def test_seed_catalog(self):
+        output = StringIO()
+        call_command('seed_catalog', categories=3, services=12, testimonials=30, inquiries=40, stdout=output)
+        self.assertEqual(Service.objects.count(), 12)
+        self.assertEqual(ServiceInquiry.objects.values('created_at').distinct().count(), 40)
+        self.assertTrue(all(isinstance(features, list) for features in Service.objects.values_list('features', flat=True)))
+        with self.assertRaises(CommandError):
+            call_command('seed_catalog', stdout=output)
+
+        call_command('seed_catalog', categories=2, services=4, testimonials=0, inquiries=0, clear=True, stdout=output)
+        self.assertEqual((ServiceCategory.objects.count(), Service.objects.count()), (2, 4))
+        self.assertFalse(ServiceInquiry.objects.exists())
+
+    def test_bench_api_report(self):
+        call_command('seed_catalog', categories=2, services=8, testimonials=20, inquiries=20, stdout=StringIO())
+        report_path = temporary_path(self, 'report.json')
+        call_command('bench_api', requests=2, warmup=0, output=report_path, stdout=StringIO())
+        with open(report_path) as file:
+            report = json.load(file)
+
+        routes = report['test_client']
+        self.assertEqual(routes['anonymous GET /api/services/']['status'], [200])
+        self.assertEqual(routes['anonymous POST /api/auth/register/']['status'], [201])
+        self.assertEqual(routes['client PUT /api/auth/change-password/']['status'], [200])
+        self.assertTrue(all(stats['p99_ms'] >= stats['p50_ms'] for stats in routes.values()))
+        # Writes are rolled back
+        self.assertFalse(ServiceInquiry.objects.filter(email='bench@example.com').exists())
+
+    def test_workers_start_without_excel_libraries(self):
+        report_path = temporary_path(self, 'report.json')
+        call_command('bench_startup', repeat=1, output=report_path, stdout=StringIO())
+        with open(report_path) as file:
+            report = json.load(file)
+        self.assertEqual(report['worker']['heavy_modules'], [])
+        self.assertEqual(report['worker + excel libraries']['heavy_modules'], ['pandas', 'numpy', 'openpyxl'])
+        self.assertLess(report['worker']['rss_mb'], report['worker + excel libraries']['rss_mb'])
+
+
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        LOCAL_CATALOG_VERSION.clear()
+        registry.reset()
+        self.client = APIClient()
+        self.category = ServiceCategory.objects.create(name='Corporate')
+        make_service(self.category, 'Company Formation')
+
+    def test_server_timing_header(self):
+        response = self.client.get('/api/services/')
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="2 queries"')
+        for metric in ('view;dur=', 'render;dur=', 'total;dur='):
+            self.assertIn(metric, timing)
+
+    def test_request_log_line_only_built_when_enabled(self):
+        with mock.patch('legal_backend.instrumentation.json', wraps=json) as json_module:
+            self.client.get('/api/services/')
+            self.assertFalse(json_module.dumps.called)
+            with self.assertLogs('legal_backend.instrumentation', 'INFO'):
+                self.client.get('/api/services/')
+        self.assertTrue(json_module.dumps.called)
+
+    def test_metrics_endpoint_is_staff_only(self):
+        self.client.get('/api/services/')
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 401)
+
+        self.client.force_authenticate(User.objects.create_user('staff', is_staff=True))
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('http_request_duration_seconds_count{route="service-list",method="GET"} 1', body)
+        self.assertIn('http_request_queries_bucket{route="service-list",method="GET",le="2.0"} 1', body)
+        self.assertIn('http_responses_total{route="service-list",method="GET",status="200"} 1', body)
+
+    def test_repeated_sql_is_flagged(self):
+        services = [make_service(self.category, f'Service {i}') for i in range(6)]
+        metrics = RequestMetrics()
+        with collect_queries(metrics):
+            for service in Service.objects.filter(pk__in=[s.pk for s in services]):
+                service.category.name
+        self.assertEqual(list(metrics.duplicates(5).values()), [6])
+
+    def test_n_plus_one_is_logged_per_route(self):
+        with self.settings(INSTRUMENTATION_DUPLICATE_QUERY_THRESHOLD=1):
+            with self.assertLogs('legal_backend.instrumentation', 'WARNING') as logs:
+                self.client.get('/api/services/')
+        self.assertIn('"route": "service-list"', logs.output[0])
+        self.assertIn('http_n_plus_one_requests_total{route="service-list",method="GET"} 1', registry.render())
+
+
+
+class WarmupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+
+    def test_warm_up_fills_the_catalog_cache(self):
+        make_service(ServiceCategory.objects.create(name='Corporate'), 'Company Formation')
+        # The test database connection must outlive the warm-up
+        with mock.patch('legal_backend.warmup.connections'):
+            results = warm_up(['/api/health/', '/api/services/', '/api/categories/'])
+        self.assertEqual([status for status, _ in results.values()], [200, 200, 200])
+        # Warm-up requests are not reported as traffic
+        self.assertFalse(registry.responses)
+        self.assertEqual(APIClient().get('/api/services/')['X-Catalog-Cache'], 'HIT')
+
+    @skipUnless(os.path.exists('/proc/self/smaps_rollup'), 'Linux only')
+    def test_process_memory(self):
+        memory = process_memory()
+        self.assertEqual(memory['rss'], memory['shared'] + memory['private'])
+        self.assertGreater(memory['private'], 0)
+
+class ValuesSerializerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = ServiceCategory.objects.create(name='Corporate')
+        self.service = make_service(
+            self.category, 'Company Formation', price=Decimal('1500.5'), image='services/a.png', image_derivatives={
+                'source': 'services/a.png',
+                'webp': {'1280': 'services/a.1280w.webp', '320': 'services/a.320w.webp'},
+                'jpeg': {'320': 'services/a.320w.jpg'},
+            }
+        )
+        make_service(self.category, 'Trademarks', status='featured', icon='fa-tm', order=1)
+        Testimonial.objects.create(service=self.service, client_name='A', content='Good', client_image='testimonials/a.png')
+        Testimonial.objects.create(client_name='B', content='No service', rating=4, is_featured=True)
+        self.staff = User.objects.create_user('staff', is_staff=True)
+        ServiceInquiry.objects.create(
+            service=self.service, name='C', email='c@example.com', phone='1', message='Hi', assigned_to=self.staff
+        )
+        ServiceInquiry.objects.create(service=self.service, name='D', email='d@example.com', phone='2', message='Hello')
+
+    def test_output_matches_model_serializers(self):
+        request = Request(RequestFactory().get('/api/'))
+        for serializer_class, queryset in (
+            (ServiceListSerializer, Service.objects.all()),
+            (TestimonialSerializer, Testimonial.objects.all()),
+            (ServiceInquirySerializer, ServiceInquiry.objects.all()),
+            (ServiceInquiryAdminSerializer, ServiceInquiry.objects.all()),
+        ):
+            for context in ({}, {'request': request}):
+                with self.subTest(serializer=serializer_class.__name__, context=bool(context)):
+                    expected = JSONRenderer().render(serializer_class(queryset, many=True, context=context).data)
+                    values_serializer = ValuesSerializer(serializer_class)
+                    rows = queryset.values(*values_serializer.lookups)
+                    self.assertEqual(JSONRenderer().render(values_serializer.serialize(rows, context)), expected)
+
+    def test_list_endpoints_use_values(self):
+        api = APIClient()
+        with self.assertNumQueries(1):
+            data = api.get('/api/testimonials/').json()
+        self.assertEqual([t['service_title'] for t in data], [None, 'Company Formation'])
+
+        api.force_authenticate(self.staff)
+        data = api.get('/api/inquiries/').json()
+        self.assertEqual([('assigned_to_name' in i) for i in data], [False, True])
+
+        first = api.get('/api/services/?page_size=1').json()
+        second = api.get(first['next']).json()
+        self.assertEqual([s['slug'] for s in first['results'] + second['results']], ['company-formation', 'trademarks'])
+
+
+class ORJSONRendererTests(TestCase):
+    def test_output_matches_json_renderer(self):
+        category = ServiceCategory.objects.create(name='Corporate')
+        service = make_service(category, 'Company Formation', price=Decimal('1500.50'), features=['Filing', 'Ünïcode'])
+        Testimonial.objects.create(service=service, client_name='A', content='Line\u2028separator')
+        data = {
+            'service': ServiceDetailSerializer(service).data,
+            'raw': {
+                'decimal': Decimal('12.50'),
+                'utc': datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc),
+                'offset': datetime(2024, 1, 2, 3, 4, 5, tzinfo=dt_timezone(timedelta(hours=6))),
+                'naive': datetime(2024, 1, 2),
+                'duration': timedelta(minutes=90),
+                'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+                'lazy': gettext_lazy('Not found.'),
+                1: 'integer key',
+            },
+        }
+        expected = JSONRenderer().render(data)
+        self.assertEqual(ORJSONRenderer().render(data), expected)
+        self.assertIn(b'\\u2028', expected)
+        # Pretty-printing is delegated to the stdlib renderer
+        self.assertEqual(
+            ORJSONRenderer().render(data, 'application/json; indent=4'),
+            JSONRenderer().render(data, 'application/json; indent=4'),
+        )
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(ORJSONRenderer().render(data), expected)
+
+    def test_parser(self):
+        body = '{"name": "Ünïcode", "items": [1, 2.5, null, true]}'.encode()
+        self.assertEqual(ORJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body)))
+        for invalid in (b'{"a": ', b'{"a": NaN}'):
+            with self.assertRaises(ParseError):
+                ORJSONParser().parse(BytesIO(invalid))
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(ORJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body)))
+
+    def test_api_uses_orjson(self):
+        response = APIClient().post('/api/inquiries/', {'name': 'x'}, format='json')
+        self.assertIsInstance(response.accepted_renderer, ORJSONRenderer)
+        self.assertEqual(response.status_code, 400)
+
+
+class BulkImportTests(TestCase):
+    def setUp(self):
+        temporary_media_root(self)
+        self.category = ServiceCategory.objects.create(name='Family')
+        self.service = make_service(self.category, 'Divorce', price=Decimal('100.00'))
+
+    def test_services_create_update_and_errors(self):
+        df = pd.DataFrame({
+            'ID': [self.service.id, None, None, None, 'abc'],
+            'Title': ['Divorce Filing', 'Custody', 'Adoption', 'Orphan', 'Bad'],
+            'Slug': [None, None, None, None, None],
+            'Category': ['Family', 'Family', 'Family', 'Missing', 'Family'],
+            'Short Description': ['Short', 'Short', None, 'Short', 'Short'],
+            'Full Description': ['Full', 'Full', 'Full', 'Full', 'Full'],
+            'Features': ['A, B', None, '', 'C', None],
+            'Price': [250, 'n/a', None, None, None],
+            'Order': [3, 1, 2, 4, 5],
+        })
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            result = import_services(df)
+
+        self.assertEqual(result['created'], 1)
+        self.assertEqual(result['updated'], 1)
+        self.assertEqual(result['errors'], [
+            "Row 4: Short description is required",
+            "Row 5: Category 'Missing' not found",
+            "Row 6: ID must be a number",
+        ])
+        # Catalog version bump and snapshot refresh
+        self.assertEqual(len(callbacks), 2)
+
+        self.service.refresh_from_db()
+        self.assertEqual(self.service.title, 'Divorce Filing')
+        self.assertEqual(self.service.slug, 'divorce')
+        self.assertEqual(self.service.features, ['A', 'B'])
+        self.assertEqual(self.service.price, Decimal('250.00'))
+        custody = Service.objects.get(slug='custody')
+        self.assertEqual(custody.features, [])
+        self.assertIsNone(custody.price)
+
+    def test_services_duplicate_slug_reported_per_row(self):
+        df = pd.DataFrame({
+            'Title': ['Divorce', 'Mediation', 'Mediation'],
+            'Category': ['Family'] * 3,
+            'Short Description': ['Short'] * 3,
+            'Full Description': ['Full'] * 3,
+        })
+        result = import_services(df)
+        self.assertEqual(result['created'], 1)
+        self.assertEqual(result['errors'], [
+            "Row 2: Service with slug 'divorce' already exists",
+            "Row 4: Service with slug 'mediation' already exists",
+        ])
+
+    def test_services_long_derived_slug_and_fractional_numbers_reported(self):
+        long_title = 'Cross Border Commercial Litigation And Arbitration Services'
+        df = pd.DataFrame({
+            'Title': [long_title, long_title, 'Mediation'],
+            'Slug': [None, 'cross-border-litigation', None],
+            'Category': ['Family'] * 3,
+            'Short Description': ['Short'] * 3,
+            'Full Description': ['Full'] * 3,
+            'Order': [1, 2, 2.7],
+        })
+        result = import_services(df)
+        self.assertEqual(result['created'], 1)
+        self.assertEqual(result['errors'], [
+            "Row 2: Slug derived from Title must be at most 50 characters; fill in Slug",
+            "Row 4: Order must be a whole number",
+        ])
+        self.assertEqual(Service.objects.get(slug='cross-border-litigation').order, 2)
+
+    def test_out_of_range_numbers_reported_per_row(self):
+        df = pd.DataFrame({
+            'Title': ['Mediation', 'Probate', 'Custody'],
+            'Category': ['Family'] * 3,
+            'Short Description': ['Short'] * 3,
+            'Full Description': ['Full'] * 3,
+            'Price': [123456789, 99999999.994, 99999999.995],
+            'Order': [2 ** 31, -2 ** 31, 1],
+        })
+        with self.captureOnCommitCallbacks(execute=True):
+            result = import_services(df)
+        # The bad rows no longer abort the bulk write for the others
+        self.assertEqual(result['created'], 1)
+        self.assertEqual(result['errors'], [
+            "Row 2: Price must have at most 8 digits before the decimal point",
+            "Row 2: Order must be between -2147483648 and 2147483647",
+            "Row 4: Price must have at most 8 digits before the decimal point",
+        ])
+        probate = Service.objects.get(slug='probate')
+        self.assertEqual((probate.price, probate.order), (Decimal('99999999.99'), -2 ** 31))
+
+    def test_query_count_does_not_grow_with_rows(self):
+        rows = 50
+        df = pd.DataFrame({
+            'Title': [f'Service {i}' for i in range(rows)],
+            'Category': ['Family'] * rows,
+            'Short Description': ['Short'] * rows,
+            'Full Description': ['Full'] * rows,
+        })
+        with self.assertNumQueries(5):
+            import_services(df, chunk_size=rows)
+
+    def test_categories(self):
+        df = pd.DataFrame({
+            'ID': [self.category.id, None, None],
+            'Name': ['Family Law', 'Tax', 'Tax'],
+            'Order': [2, 1, 'x'],
+        })
+        result = import_service_categories(df)
+        self.assertEqual((result['created'], result['updated']), (1, 1))
+        self.assertEqual(result['errors'], ["Row 4: Order must be a number"])
+        self.category.refresh_from_db()
+        self.assertEqual((self.category.name, self.category.order), ('Family Law', 2))
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        self.category = ServiceCategory.objects.create(name='Tax', icon='fa-coins')
+        self.service = make_service(
+            self.category, 'VAT Registration', features=['Filing', 'Advice'], price=Decimal('1500.00')
+        )
+
+    def write_sheet(self, writer, queryset, sheet_name):
+        output = BytesIO()
+        writer(queryset, output)
+        output.seek(0)
+        return openpyxl.load_workbook(output)[sheet_name]
+
+    def test_services_export(self):
+        sheet = self.write_sheet(write_services_excel, Service.objects.all(), 'Services')
+        rows = list(sheet.values)
+        self.assertEqual(rows[0][:4], ('ID', 'Title', 'Slug', 'Category'))
+        self.assertEqual(rows[1][:4], (self.service.id, 'VAT Registration', 'vat-registration', 'Tax'))
+        self.assertEqual(rows[1][6:8], ('Filing, Advice', '1500.00'))
+        self.assertEqual(sheet.column_dimensions['B'].width, len('VAT Registration') + 2)
+
+    def test_categories_export_round_trips_through_import(self):
+        sheet = self.write_sheet(write_service_categories_excel, ServiceCategory.objects.all(), 'Service Categories')
+        df = pd.DataFrame(list(sheet.values)[1:], columns=list(sheet.values)[0])
+        result = import_service_categories(df)
+        self.assertEqual((result['created'], result['updated'], result['errors']), (0, 1, []))
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        temporary_media_root(self)
+        self.staff = User.objects.create_superuser('admin', 'admin@example.com', 'pass12345')
+        self.client.force_login(self.staff)
+        self.category = ServiceCategory.objects.create(name='Corporate')
+        make_service(self.category, 'Company Formation')
+
+    def test_export_action_enqueues_job(self):
+        response = self.client.post('/admin/services/service/', {
+            'action': 'export_services_excel',
+            '_selected_action': list(Service.objects.values_list('pk', flat=True)),
+        })
+        job = Job.objects.get()
+        self.assertRedirects(response, f'/admin/services/job/{job.pk}/status/', fetch_redirect_response=False)
+        self.assertEqual((job.kind, job.status), ('export_services', 'pending'))
+
+        self.assertEqual(claim_pending_jobs(5), [job.pk])
+        self.assertEqual(claim_pending_jobs(5), [])
+        self.assertEqual(run_job(job.pk), 'completed')
+
+        state = self.client.get(f'/admin/services/job/{job.pk}/progress/').json()
+        self.assertEqual((state['status'], state['progress'], state['result']), ('completed', 100, {'rows': 1}))
+        download = self.client.get(state['download_url'])
+        workbook = openpyxl.load_workbook(BytesIO(b''.join(download.streaming_content)))
+        self.assertEqual(list(workbook['Services'].values)[1][1], 'Company Formation')
+
+    def test_select_all_export_stores_the_changelist_filter(self):
+        make_service(self.category, 'Dormant', status='inactive')
+        self.client.post('/admin/services/service/?status__exact=active&q=formation&p=2', {
+            # "Select all" still posts the checked rows of the visible page
+            'action': 'export_services_excel', 'select_across': '1',
+            '_selected_action': list(Service.objects.values_list('pk', flat=True)),
+        })
+        job = Job.objects.get()
+        self.assertEqual(job.payload, {'query': 'status__exact=active&q=formation'})
+        self.assertEqual(run_job(job.pk), 'completed')
+        job.refresh_from_db()
+        self.assertEqual(job.result, {'rows': 1})
+
+    def test_select_all_export_rebuilds_the_changelist(self):
+        make_service(self.category, 'Dormant', status='inactive')
+        make_service(self.category, 'Archive', status='featured')
+        # Multi-valued and changelist-only parameters the ORM would not accept
+        job = enqueue_job('export_services', self.staff, payload={'query': 'status__in=active,inactive&o=-1'})
+        self.assertEqual(run_job(job.pk), 'completed')
+        job.refresh_from_db()
+        sheet = openpyxl.load_workbook(job.result_file.open('rb'))['Services']
+        self.assertEqual([row[1] for row in list(sheet.values)[1:]], ['Dormant', 'Company Formation'])
+
+        job = enqueue_job('export_services', self.staff, payload={'query': 'created_by__password__startswith=p'})
+        with self.assertLogs('services.jobs', 'ERROR'):
+            self.assertEqual(run_job(job.pk), 'failed')
+
+    def test_download_limited_to_the_creator(self):
+        job = enqueue_job('export_services', self.staff, payload={'ids': []})
+        run_job(job.pk)
+        url = f'/admin/services/job/{job.pk}/download/'
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.client.force_login(User.objects.create_user('clerk', is_staff=True))
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_import_view_enqueues_job(self):
+        output = BytesIO()
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            pd.DataFrame({'Name': ['Tax', 'Family']}).to_excel(writer, sheet_name='Service Categories', index=False)
+        upload = SimpleUploadedFile('categories.xlsx', output.getvalue())
+
+        response = self.client.post('/admin/services/servicecategory/import-excel/', {'excel_file': upload})
+        job = Job.objects.get()
+        self.assertRedirects(response, f'/admin/services/job/{job.pk}/status/', fetch_redirect_response=False)
+
+        self.assertEqual(run_job(job.pk), 'completed')
+        job.refresh_from_db()
+        self.assertEqual(job.result, {'created': 2, 'updated': 0, 'errors': []})
+        self.assertTrue(ServiceCategory.objects.filter(name='Family').exists())
+
+    def test_failed_job_records_error(self):
+        job = Job.objects.create(kind='import_services')
+        with self.assertLogs('services.jobs', 'ERROR') as logs:
+            self.assertEqual(run_job(job.pk), 'failed')
+        self.assertIn(f'Job {job.pk} failed', logs.output[0])
+        job.refresh_from_db()
+        self.assertIn('ValueError', job.error)
+
+    def run_jobs(self, *pools, **options):
+        with mock.patch.object(RunJobsCommand, 'start_pool', side_effect=pools):
+            call_command('run_jobs', once=True, workers=2, stdout=StringIO(), stderr=StringIO(), **options)
+
+    def test_broken_pool_fails_its_jobs_and_is_replaced(self):
+        for _ in range(3):
+            Job.objects.create(kind='catalog_snapshot')
+        self.run_jobs(InlinePool(broken=True), InlinePool())
+        statuses = sorted(Job.objects.values_list('status', flat=True))
+        self.assertEqual(statuses, ['completed', 'failed', 'failed'])
+        self.assertEqual(
+            set(Job.objects.filter(status='failed').values_list('error', flat=True)),
+            {'Worker process died while running the job'},
+        )
+
+    def test_stale_running_jobs_are_requeued_at_startup(self):
+        started_at = timezone.now() - timedelta(hours=2)
+        stale = Job.objects.create(kind='catalog_snapshot', status='running', started_at=started_at)
+        recent = Job.objects.create(kind='catalog_snapshot', status='running', started_at=timezone.now())
+        self.run_jobs(InlinePool(), stale_after=3600)
+        self.assertEqual(Job.objects.get(pk=stale.pk).status, 'completed')
+        self.assertEqual(Job.objects.get(pk=recent.pk).status, 'running')
+
+
+class InlinePool:
+    """Stands in for run_jobs' process pool: runs jobs in-process, or fails them like a pool whose worker died"""
+
+    def __init__(self, broken=False):
+        self.broken = broken
+
+    def submit(self, fn, *args):
+        future = Future()
+        if self.broken:
+            future.set_exception(BrokenProcessPool('A process in the process pool was terminated abruptly'))
+        else:
+            future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, **kwargs):
+        pass
+
+
+def image_upload(name, size, mode='RGB', image_format='PNG'):
+    output = BytesIO()
+    Image.new(mode, size, 'red').save(output, image_format)
+    return SimpleUploadedFile(name, output.getvalue())
+
+
+@override_settings(IMAGE_DERIVATIVE_WIDTHS=[320, 640, 1280])
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        temporary_media_root(self)
+        cache.clear()
+        self.category = ServiceCategory.objects.create(name='Corporate')
+
+    def test_upload_queues_derivatives_job(self):
+        service = make_service(self.category, 'Company Formation', image=image_upload('office.png', (2000, 1000)))
+        job = Job.objects.get(kind='image_derivatives')
+        self.assertEqual(job.payload, {'model': 'services.service', 'pk': service.pk})
+        self.assertEqual(run_job(job.pk), 'completed')
+
+        service.refresh_from_db()
+        derivatives = service.image_derivatives
+        self.assertEqual(derivatives['source'], service.image.name)
+        self.assertEqual(sorted(derivatives['webp'], key=int), ['320', '640', '1280'])
+        with service.image.storage.open(derivatives['jpeg']['640']) as file:
+            thumbnail = Image.open(file)
+            self.assertEqual((thumbnail.format, thumbnail.size), ('JPEG', (640, 320)))
+
+        data = APIClient().get(f'/api/services/{service.slug}/').json()
+        base = service.image.name[:-len('.png')]
+        self.assertEqual(data['image_srcset']['webp'].split(', ')[0], f'http://testserver/media/{base}.320w.webp 320w')
+        listed = APIClient().get('/api/services/').json()[0]
+        self.assertEqual(listed['image_srcset'], data['image_srcset'])
+        self.assertNotIn('image_derivatives', data)
+
+    def test_small_images_are_not_upscaled(self):
+        testimonial = Testimonial.objects.create(
+            client_name='A', content='Good', client_image=image_upload('a.png', (200, 200), mode='RGBA')
+        )
+        derivatives = update_derivatives(testimonial)
+        self.assertEqual({name: list(derivatives[name]) for name in ('webp', 'jpeg')}, {'webp': ['200'], 'jpeg': ['200']})
+        base = testimonial.client_image.name[:-len('.png')]
+        self.assertEqual(TestimonialSerializer(testimonial).data['client_image_srcset'], {
+            'webp': f'/media/{base}.200w.webp 200w', 'jpeg': f'/media/{base}.200w.jpg 200w',
+        })
+
+    def test_replacing_image_resets_derivatives(self):
+        service = make_service(self.category, 'Company Formation', image=image_upload('old.png', (800, 400)))
+        old = update_derivatives(service)
+        service.image = image_upload('new.png', (800, 400))
+        with self.captureOnCommitCallbacks(execute=True):
+            service.save()
+        service.refresh_from_db()
+        self.assertEqual(service.image_derivatives, {})
+        self.assertEqual(Job.objects.filter(kind='image_derivatives').count(), 2)
+        self.assertEqual(ServiceListSerializer(service).data['image_srcset'], {})
+        storage = service.image.storage
+        self.assertFalse(any(storage.exists(name) for name in old['webp'].values()))
+
+        new = update_derivatives(service)
+        self.assertTrue(all(storage.exists(name) for name in new['jpeg'].values()))
+        service.image = None
+        with self.captureOnCommitCallbacks(execute=True):
+            service.save()
+        self.assertEqual(Job.objects.filter(kind='image_derivatives').count(), 2)
+        self.assertFalse(any(storage.exists(name) for name in new['jpeg'].values()))
+
+    def test_backfill_command(self):
+        service = make_service(self.category, 'Company Formation', image=image_upload('office.png', (700, 300)))
+        make_service(self.category, 'Tax Advice', image=image_upload('tax.png', (400, 300)))
+        make_service(self.category, 'Trademarks')
+        output = StringIO()
+        with self.captureOnCommitCallbacks() as callbacks:
+            call_command('generate_image_derivatives', stdout=output)
+        self.assertIn('Generated derivatives for 2 services', output.getvalue())
+        # One catalog version bump and snapshot refresh for the whole backfill
+        self.assertEqual(len(callbacks), 2)
+        service.refresh_from_db()
+        self.assertEqual(list(service.image_derivatives['webp']), ['320', '640', '700'])
+
+        call_command('generate_image_derivatives', stdout=output)
+        self.assertIn('Generated derivatives for 0 services', output.getvalue())
+
+
+class InquiryBulkUpdateTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_superuser('admin', 'admin@example.com', 'pass12345')
+        self.other = User.objects.create_user('paralegal', is_staff=True)
+        category = ServiceCategory.objects.create(name='Corporate')
+        self.service = make_service(category, 'Company Formation')
+        self.inquiries = [
+            ServiceInquiry.objects.create(
+                service=self.service, name=f'Client {i}', email=f'c{i}@example.com', phone='1', message='Hi',
+                status='pending' if i < 3 else 'contacted',
+            )
+            for i in range(4)
+        ]
+        self.api = APIClient()
+        self.api.force_authenticate(self.staff)
+
+    def updates(self, queries):
+        return [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "services_serviceinquiry"')
+        ]
+
+    def test_update_by_ids_in_one_statement(self):
+        ids = [inquiry.pk for inquiry in self.inquiries[:3]]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.api.patch('/api/inquiries/bulk_update/', {
+                'ids': ids + [999], 'status': 'in_progress', 'notes': 'Batch call', 'assigned_to': self.other.pk,
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'updated': 3, 'missing': [999],
+            'changes': {'status': 'in_progress', 'notes': 'Batch call', 'assigned_to': self.other.pk},
+        })
+        self.assertEqual(len(self.updates(queries)), 1)
+        self.assertEqual(
+            set(ServiceInquiry.objects.filter(pk__in=ids).values_list('status', 'notes', 'assigned_to')),
+            {('in_progress', 'Batch call', self.other.pk)},
+        )
+        self.assertEqual(ServiceInquiry.objects.get(pk=self.inquiries[3].pk).status, 'contacted')
+
+    def test_update_by_filter_assigns_requesting_user(self):
+        response = self.api.patch('/api/inquiries/bulk_update/', {
+            'filter': {'status': 'pending', 'service': self.service.pk}, 'status': 'cancelled',
+        }, format='json')
+        self.assertEqual(response.json(), {
+            'updated': 3, 'changes': {'status': 'cancelled', 'assigned_to': self.staff.pk},
+        })
+        self.assertEqual(ServiceInquiry.objects.filter(status='cancelled', assigned_to=self.staff).count(), 3)
+
+    def test_rejects_invalid_requests(self):
+        for payload in (
+            {'ids': [self.inquiries[0].pk], 'status': 'archived'},
+            {'ids': [self.inquiries[0].pk]},
+            {'status': 'contacted'},
+            {'filter': {}, 'status': 'contacted'},
+            {'filter': {'email': 'c0@example.com'}, 'status': 'contacted'},
+            {'filter': {'status': 'unknown'}, 'status': 'contacted'},
+        ):
+            with self.subTest(payload=payload):
+                self.assertEqual(self.api.patch('/api/inquiries/bulk_update/', payload, format='json').status_code, 400)
+        self.assertFalse(ServiceInquiry.objects.exclude(status__in=['pending', 'contacted']).exists())
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('client', email='c0@example.com'))
+        response = client.patch('/api/inquiries/bulk_update/', {'filter': {'status': 'pending'}, 'status': 'completed'},
+                                format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_admin_list_editable_uses_bulk_update(self):
+        self.client.force_login(self.staff)
+        inquiries = list(ServiceInquiry.objects.order_by('-created_at'))
+        data = {'form-TOTAL_FORMS': len(inquiries), 'form-INITIAL_FORMS': len(inquiries), '_save': 'Save'}
+        for i, inquiry in enumerate(inquiries):
+            data[f'form-{i}-id'] = inquiry.pk
+            data[f'form-{i}-status'] = 'completed' if inquiry.status == 'pending' else inquiry.status
+            data[f'form-{i}-assigned_to'] = self.other.pk if inquiry.status == 'pending' else ''
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/admin/services/serviceinquiry/', data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(self.updates(queries)), 1)
+        self.assertEqual(
+            set(ServiceInquiry.objects.filter(status='completed').values_list('assigned_to', flat=True)), {self.other.pk}
+        )
+        self.assertEqual(ServiceInquiry.objects.filter(status='completed').count(), 3)
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    THROTTLE_BUCKETS={
+        'inquiry_create': {'ip': '100/hour:100', 'email': '1/hour:1', 'global': '100/hour:3'},
+        'register': {'ip': '1/hour:1'},
+    },
+)
+class ThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        LOCAL_BUCKETS.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(LOCAL_BUCKETS.clear)
+        self.service = make_service(ServiceCategory.objects.create(name='Corporate'), 'Company Formation')
+        self.api = APIClient()
+
+    def inquiry(self, email, **extra):
+        data = {'service': self.service.pk, 'name': 'A', 'email': email, 'phone': '1', 'message': 'Hi', **extra}
+        return self.api.post('/api/inquiries/', data, format='json')
+
+    def test_token_bucket_refills(self):
+        self.assertEqual([consume('bucket', '60/min:2', now=0)[0] for _ in range(3)], [True, True, False])
+        self.assertEqual(consume('bucket', '60/min:2', now=0.5), (False, 0.5))
+        self.assertEqual(consume('bucket', '60/min:2', now=1)[0], True)
+
+    def test_rejection_takes_no_tokens_from_other_buckets(self):
+        rates = {'ip': '1/min:2', 'global': '1/min:1'}
+        self.assertEqual(consume_all(rates, now=0), (True, 0))
+        # The empty global bucket rejects the request without spending the client's token
+        allowed, wait = consume_all(rates, now=1)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 59)
+        self.assertEqual([consume('ip', '1/min:2', now=1)[0] for _ in range(2)], [True, False])
+
+    def test_inquiries_limited_per_email_before_validation(self):
+        self.assertEqual(self.inquiry('a@example.com').status_code, 201)
+        with self.assertNumQueries(0):
+            response = self.api.post('/api/inquiries/', {'email': ' A@Example.com'}, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '3600')
+        self.assertEqual(self.inquiry('b@example.com').status_code, 201)
+        # Listing is not a throttled action
+        self.assertEqual(self.api.get('/api/inquiries/').status_code, 401)
+
+    def test_global_bucket_sheds_writes(self):
+        statuses = [self.inquiry(f'{i}@example.com').status_code for i in range(4)]
+        self.assertEqual(statuses, [201, 201, 201, 429])
+        self.assertEqual(ServiceInquiry.objects.count(), 3)
+        with override_settings(THROTTLE_ENABLED=False):
+            self.assertEqual(self.inquiry('4@example.com').status_code, 201)
+
+    def test_register_limited_per_ip(self):
+        def register(username):
+            return self.api.post('/api/auth/register/', {
+                'username': username, 'email': f'{username}@example.com',
+                'password': 'Secret-pass-123', 'password_confirm': 'Secret-pass-123',
+            }, format='json')
+        self.assertEqual(register('first').status_code, 201)
+        self.assertEqual(register('second').status_code, 429)
+        self.assertEqual(self.api.post('/api/auth/register/', {}, format='json', REMOTE_ADDR='10.0.0.2').status_code, 400)
+
+    def test_falls_back_to_local_buckets(self):
+        cache_down = mock.patch('django.core.cache.backends.locmem.LocMemCache.get', side_effect=ConnectionError)
+        with cache_down, self.assertLogs('legal_backend.throttling', 'WARNING'):
+            self.assertEqual(self.inquiry('a@example.com').status_code, 201)
+            self.assertEqual(self.inquiry('a@example.com').status_code, 429)
+
+
+@override_settings(INQUIRY_NOTIFICATION_EMAILS=['desk@example.com'], BACKEND_URL='https://api.example.com')
+class OutboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.service = make_service(ServiceCategory.objects.create(name='Corporate'), 'Company Formation')
+        self.lawyer = User.objects.create_user('lawyer', email='lawyer@example.com', is_staff=True)
+
+    def submit(self, name):
+        response = APIClient().post('/api/inquiries/', {
+            'service': self.service.pk, 'name': name, 'email': f'{name.lower()}@example.com', 'phone': '1',
+            'message': f'Message from {name}',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return ServiceInquiry.objects.get(pk=response.json()['id'])
+
+    def process(self, window=0):
+        call_command('process_outbox', once=True, digest_window=window, stdout=StringIO())
+
+    def test_inquiry_writes_outbox_row_without_sending(self):
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages') as send:
+            inquiry = self.submit('Alice')
+        send.assert_not_called()
+        message = OutboxMessage.objects.get()
+        self.assertEqual(
+            (message.topic, message.payload, message.status), ('inquiry_created', {'inquiry': inquiry.pk}, 'pending')
+        )
+
+        # Still inside the digest window
+        self.process(window=300)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_digest_per_recipient(self):
+        self.submit('Alice')
+        self.submit('Bob')
+        assigned = self.submit('Carol')
+        assigned.assigned_to = self.lawyer
+        assigned.save()
+
+        self.process()
+        emails = {email.to[0]: email for email in mail.outbox}
+        self.assertEqual(set(emails), {'desk@example.com', 'lawyer@example.com'})
+        self.assertEqual(emails['desk@example.com'].subject, '2 new service inquiries')
+        self.assertIn('Message from Bob', emails['desk@example.com'].body)
+        self.assertEqual(emails['lawyer@example.com'].subject, 'New service inquiry: Carol (Company Formation)')
+        self.assertIn(f'https://api.example.com/admin/services/serviceinquiry/{assigned.pk}/change/',
+                      emails['lawyer@example.com'].body)
+        self.assertEqual(set(OutboxMessage.objects.values_list('status', flat=True)), {'sent'})
+
+        self.process()
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_failed_delivery_is_retried_with_backoff(self):
+        self.submit('Alice')
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('down')), \
+                self.assertLogs('services.outbox', 'ERROR'):
+            self.assertEqual(deliver(claim_due_messages(timedelta(0))), 0)
+        message = OutboxMessage.objects.get()
+        self.assertEqual((message.status, message.attempts), ('pending', 1))
+        self.assertIn('down', message.error)
+        self.assertEqual(claim_due_messages(timedelta(0)), [])
+
+        OutboxMessage.objects.update(available_at=message.created_at, attempts=4)
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('down')), \
+                self.assertLogs('services.outbox', 'ERROR'):
+            deliver(claim_due_messages(timedelta(0)))
+        self.assertEqual(OutboxMessage.objects.get().status, 'failed')
+
+    @override_settings(INQUIRY_NOTIFICATION_EMAILS=['desk@example.com', 'ops@example.com'])
+    def test_retry_skips_recipients_already_emailed(self):
+        send_messages = EmailBackend.send_messages
+
+        def ops_down(backend, messages):
+            if messages[0].to == ['ops@example.com']:
+                raise OSError('down')
+            return send_messages(backend, messages)
+
+        self.submit('Alice')
+        with mock.patch.object(EmailBackend, 'send_messages', autospec=True, side_effect=ops_down), \
+                self.assertLogs('services.outbox', 'ERROR'):
+            self.assertEqual(deliver(claim_due_messages(timedelta(0))), 1)
+        message = OutboxMessage.objects.get()
+        self.assertEqual((message.status, message.delivered_to), ('pending', ['desk@example.com']))
+
+        OutboxMessage.objects.update(available_at=message.created_at)
+        self.process()
+        self.assertEqual([email.to for email in mail.outbox], [['desk@example.com'], ['ops@example.com']])
+        self.assertEqual(OutboxMessage.objects.get().status, 'sent')
+
+    def test_abandoned_claims_are_reclaimed(self):
+        self.submit('Alice')
+        [message] = claim_due_messages(timedelta(0))
+        self.assertEqual(claim_due_messages(timedelta(0)), [])
+        OutboxMessage.objects.update(claimed_at=message.claimed_at - timedelta(hours=1))
+        self.process()
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class OpenAPISchemaTests(TestCase):
+    def setUp(self):
+        # A fresh media root per test, so each one generates the schema
+        temporary_media_root(self)
+        LOADED_SCHEMAS.clear()
+        self.addCleanup(LOADED_SCHEMAS.clear)
+
+    def get(self, path, **headers):
+        # Generation warns about views it cannot introspect
+        with redirect_stderr(StringIO()):
+            return self.client.get(path, **headers)
+
+    def test_schema_generated_once_per_code_version(self):
+        with mock.patch.object(SchemaGenerator, 'get_schema', autospec=True,
+                               side_effect=SchemaGenerator.get_schema) as generate:
+            yaml_response = self.get('/api/schema/')
+            # Another worker reads the artifact from disk
+            LOADED_SCHEMAS.clear()
+            json_response = self.get('/api/schema/', HTTP_ACCEPT='application/json')
+            output = StringIO()
+            call_command('build_openapi_schema', stdout=output)
+        self.assertEqual(generate.call_count, 1)
+        self.assertIn('already built', output.getvalue())
+
+        self.assertEqual(yaml_response['Content-Type'], 'application/vnd.oai.openapi; charset=utf-8')
+        self.assertIn(b'openapi: 3.0.3', yaml_response.content)
+        schema = json.loads(json_response.content)
+        self.assertIn('/api/services/', schema['paths'])
+        self.assertIn('jwtAuth', schema['components']['securitySchemes'])
+        self.assertNotEqual(yaml_response['ETag'], json_response['ETag'])
+
+    def test_etags_and_compression(self):
+        response = self.get('/api/schema/?format=json')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertEqual(self.get('/api/schema/?format=json', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        compressed = self.get('/api/schema/?format=json', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), response.content)
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        for accept_encoding, encoding in (
+            ('gzip;q=0', None), ('gzip;q=0, *', None), ('br, *;q=0', None), ('*;q=0.5', 'gzip'), ('GZIP; q=0.8', 'gzip'),
+        ):
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.get('/api/schema/?format=json', HTTP_ACCEPT_ENCODING=accept_encoding)
+                self.assertEqual(response.get('Content-Encoding'), encoding)
+
+    def test_docs_load_the_versioned_schema(self):
+        pages = [self.get(path).content.decode() for path in ('/api/docs/', '/api/redoc/')]
+        for page in pages:
+            self.assertIn(schema_digest(), page)
+        response = self.get(f'/api/schema/?format=json&v={schema_digest()}')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ServiceCategoryViewSet, ServiceViewSet, ServiceInquiryViewSet, TestimonialViewSet
+from .async_views import async_catalog_urls
+from .views import ServiceCategoryViewSet, ServiceViewSet, ServiceInquiryViewSet, TestimonialViewSet, catalog_snapshot
 
 router = DefaultRouter()
 router.register(r'categories', ServiceCategoryViewSet)
@@ -8,6 +10,13 @@ router.register(r'services', ServiceViewSet)
 router.register(r'inquiries', ServiceInquiryViewSet)
 router.register(r'testimonials', TestimonialViewSet)
 
+router_urls = router.urls
+if settings.ASYNC_CATALOG_VIEWS:
+    # Anonymous catalog reads run on the event loop under ASGI
+    router_urls = async_catalog_urls(router_urls)
+
 urlpatterns = [
-    path('', include(router.urls)),
+    # Pre-rendered public catalog (categories, services, featured testimonials)
+    path('catalog/', catalog_snapshot, name='catalog-snapshot'),
+    path('', include(router_urls)),
 ]
\ No newline at end of file
@@ -1,33 +1,64 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import HttpResponseRedirect
+from django.views.decorators.http import require_safe
+from .cache import cache_catalog_response
+from .conditional import ConditionalGetMixin, conditional_get
+from .fast_serializers import ValuesListMixin
+from .inquiries import bulk_update_inquiries
 from .models import ServiceCategory, Service, ServiceInquiry, Testimonial
+from .outbox import add_to_outbox
+from .pagination import KeysetPagination, ServiceKeysetPagination
+from .search import SearchRankOrderingFilter, ServiceSearchFilter
+from .snapshot import build_catalog_snapshot, read_manifest
 from .serializers import (
     ServiceCategorySerializer, ServiceListSerializer, ServiceDetailSerializer,
-    ServiceInquirySerializer, ServiceInquiryAdminSerializer, TestimonialSerializer
+    ServiceInquirySerializer, ServiceInquiryAdminSerializer, ServiceInquiryBulkUpdateSerializer,
+    TestimonialSerializer
 )
 
 
-class ServiceCategoryViewSet(viewsets.ModelViewSet):
-    queryset = ServiceCategory.objects.all()
+class ServiceCategoryViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = ServiceCategory.objects.with_service_counts()
     serializer_class = ServiceCategorySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['order', 'name']
     ordering = ['order']
+    conditional_uses_catalog_version = True
 
+    def get_validator_queryset(self):
+        # Skip the per-status annotations; the catalog version covers the counts
+        return ServiceCategory.objects.all()
 
-class ServiceViewSet(viewsets.ModelViewSet):
+    @conditional_get
+    @cache_catalog_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+
+class ServiceViewSet(ConditionalGetMixin, ValuesListMixin, viewsets.ModelViewSet):
     queryset = Service.objects.all()
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ServiceSearchFilter, SearchRankOrderingFilter]
     filterset_fields = ['category', 'status']
     search_fields = ['title', 'short_description', 'full_description']
-    ordering_fields = ['order', 'title', 'created_at', 'price']
+    ordering_fields = ['order', 'title', 'created_at', 'price', 'search_rank']
     ordering = ['order']
+    pagination_class = ServiceKeysetPagination
+    values_serializer_classes = (ServiceListSerializer,)
     lookup_field = 'slug'
+    conditional_uses_catalog_version = True
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -36,17 +67,37 @@ class ServiceViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         queryset = super().get_queryset()
+        if self.detail:
+            # The nested category reports services_count; annotate it up front
+            queryset = queryset.select_related('created_by').prefetch_related(
+                Prefetch('category', queryset=ServiceCategory.objects.with_service_counts())
+            ).with_top_testimonials()
+        else:
+            queryset = queryset.select_related('category')
         if self.request.user.is_staff:
             return queryset
         return queryset.filter(status__in=['active', 'featured'])
 
+    @conditional_get
+    @cache_catalog_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(detail=False, methods=['get'])
+    @conditional_get
+    @cache_catalog_response
     def featured(self, request):
         featured_services = self.get_queryset().filter(status='featured')
         serializer = ServiceListSerializer(featured_services, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @conditional_get
+    @cache_catalog_response
     def by_category(self, request):
         category_id = request.query_params.get('category_id')
         if category_id:
@@ -57,12 +108,16 @@ class ServiceViewSet(viewsets.ModelViewSet):
                        status=status.HTTP_400_BAD_REQUEST)
 
 
-class ServiceInquiryViewSet(viewsets.ModelViewSet):
+class ServiceInquiryViewSet(ConditionalGetMixin, ValuesListMixin, viewsets.ModelViewSet):
     queryset = ServiceInquiry.objects.all()
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['service', 'status']
     ordering_fields = ['created_at']
     ordering = ['-created_at']
+    pagination_class = KeysetPagination
+    values_serializer_classes = (ServiceInquirySerializer, ServiceInquiryAdminSerializer)
+    # Anonymous submissions are token-bucket limited, see settings.THROTTLE_BUCKETS
+    throttle_scopes = {'create': 'inquiry_create'}
 
     def get_permissions(self):
         if self.action == 'create':
@@ -75,13 +130,27 @@ class ServiceInquiryViewSet(viewsets.ModelViewSet):
         return ServiceInquirySerializer
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related('service', 'assigned_to')
         if self.request.user.is_staff:
             return queryset
         if self.request.user.is_authenticated:
             return queryset.filter(email=self.request.user.email)
         return queryset.none()
 
+    @conditional_get
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        # Staff are notified by process_outbox; the outbox row commits with the inquiry
+        with transaction.atomic():
+            inquiry = serializer.save()
+            add_to_outbox('inquiry_created', inquiry=inquiry.pk)
+
     @action(detail=True, methods=['patch'], permission_classes=[IsAuthenticated])
     def update_status(self, request, pk=None):
         if not request.user.is_staff:
@@ -105,8 +174,55 @@ class ServiceInquiryViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(inquiry)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['patch'], permission_classes=[IsAuthenticated])
+    def bulk_update(self, request):
+        """
+        Triage many inquiries with one UPDATE. Like update_status, the
+        inquiries are assigned to the requesting staff member unless
+        ``assigned_to`` says otherwise.
+        """
+        if not request.user.is_staff:
+            return Response({'error': 'Permission denied'},
+                          status=status.HTTP_403_FORBIDDEN)
 
-class TestimonialViewSet(viewsets.ModelViewSet):
+        serializer = ServiceInquiryBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        changes = {field: data[field] for field in ('status', 'notes') if field in data}
+        changes['assigned_to'] = data.get('assigned_to', request.user)
+
+        queryset = ServiceInquiry.objects.all()
+        if 'ids' in data:
+            queryset = queryset.filter(pk__in=data['ids'])
+        else:
+            queryset = self.filter_bulk_queryset(queryset, data['filter'])
+
+        with transaction.atomic():
+            updated = bulk_update_inquiries(queryset, **changes)
+            summary = {'updated': updated}
+            if 'ids' in data:
+                requested = set(data['ids'])
+                # Only look up which ids matched when some did not
+                found = requested if updated == len(requested) else set(queryset.values_list('pk', flat=True))
+                summary['missing'] = sorted(requested - found)
+
+        assignee = changes['assigned_to']
+        summary['changes'] = {**changes, 'assigned_to': assignee.pk if assignee else None}
+        return Response(summary)
+
+    def filter_bulk_queryset(self, queryset, filter_data):
+        """Apply a bulk update ``filter`` through the list endpoint's filterset"""
+        filterset_class = DjangoFilterBackend().get_filterset_class(self, queryset)
+        unknown = set(filter_data) - set(filterset_class.base_filters)
+        if unknown:
+            raise ValidationError({'filter': [f"Unknown filter field(s): {', '.join(sorted(unknown))}"]})
+        filterset = filterset_class(filter_data, queryset=queryset, request=self.request)
+        if not filterset.is_valid():
+            raise ValidationError({'filter': filterset.errors})
+        return filterset.qs
+
+
+class TestimonialViewSet(ValuesListMixin, viewsets.ModelViewSet):
     queryset = Testimonial.objects.all()
     serializer_class = TestimonialSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -114,9 +230,11 @@ class TestimonialViewSet(viewsets.ModelViewSet):
     filterset_fields = ['service', 'is_featured', 'is_active', 'rating']
     ordering_fields = ['created_at', 'rating']
     ordering = ['-created_at']
+    pagination_class = KeysetPagination
+    values_serializer_classes = (TestimonialSerializer,)
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related('service')
         if self.request.user.is_staff:
             return queryset
         return queryset.filter(is_active=True)
@@ -125,4 +243,14 @@ class TestimonialViewSet(viewsets.ModelViewSet):
     def featured(self, request):
         featured_testimonials = self.get_queryset().filter(is_featured=True)
         serializer = self.get_serializer(featured_testimonials, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+
+@require_safe
+def catalog_snapshot(request):
+    """Redirect to the current pre-rendered catalog snapshot, building it on first use"""
+    manifest = read_manifest() or build_catalog_snapshot()
+    response = HttpResponseRedirect(manifest['url'])
+    # The target is immutable; only this pointer must be revalidated
+    response['Cache-Control'] = 'no-cache'
+    return response